@@ -0,0 +1,398 @@
+"""Benchmark the request pipeline without a server.
+
+The app is driven through App.__call__ with synthetic scopes and receive/send
+callables, so this needs neither uvicorn nor wrk and can run in CI.
+
+Usage:
+
+    python -m benchmarks.inprocess [--app xpresso|fastapi|starlette] [--scenario NAME ...] [--rounds N] [--json PATH]
+
+For each scenario this reports the throughput (median of all rounds),
+p50/p99 latency and the memory allocated while handling a single request.
+Use --json to save the results for comparisons between commits.
+"""
+import argparse
+import contextlib
+import gc
+import importlib
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+)
+
+import anyio
+from pydantic import BaseModel
+from starlette.types import ASGIApp, Message
+
+from xpresso import App, Json, Path, WebSocket, WebSocketRoute
+from xpresso.typing import Annotated
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+    price: float
+    tags: List[str]
+
+
+ITEMS = [
+    Item(id=i, name=f"item {i}", price=i * 1.5, tags=["a", "b", "c"])
+    for i in range(100)
+]
+
+ITEMS_JSON = json.dumps([item.dict() for item in ITEMS]).encode()
+
+
+async def parse_body(items: Annotated[List[Item], Json()]) -> None:
+    """An endpoint that parses and validates a JSON body"""
+
+
+async def encode_response() -> List[Item]:
+    """An endpoint that returns models that need to be encoded"""
+    return ITEMS
+
+
+async def echo(ws: WebSocket) -> None:
+    await ws.accept()
+    async for message in ws.iter_text():
+        await ws.send_text(message)
+
+
+WEBSOCKET_MESSAGES = 100
+
+extra_app = App(
+    routes=[
+        Path("/body", post=parse_body),
+        Path("/encoding", get=encode_response),
+        WebSocketRoute("/ws", echo),
+    ]
+)
+
+
+class Scenario(NamedTuple):
+    name: str
+    request: Callable[[ASGIApp], Awaitable[None]]
+    # number of requests per round
+    iterations: int = 1_000
+    # run against this app instead of the one being benchmarked
+    app: Optional[ASGIApp] = None
+
+
+def http_request(
+    path: str,
+    method: str = "GET",
+    query_string: bytes = b"",
+    body: bytes = b"",
+    headers: Sequence[Sequence[bytes]] = (),
+) -> Callable[[ASGIApp], Awaitable[None]]:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query_string,
+        "headers": [
+            (b"host", b"testserver"),
+            (b"content-length", str(len(body)).encode()),
+            *((k, v) for k, v in headers),
+        ],
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+    }
+
+    async def request(app: ASGIApp) -> None:
+        body_sent = False
+        status: Optional[int] = None
+
+        async def receive() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await anyio.Event().wait()
+            raise AssertionError("unreachable")  # pragma: no cover
+
+        async def send(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await app(dict(scope), receive, send)
+        if status != 200:
+            raise AssertionError(f"{method} {path} returned {status}")
+
+    return request
+
+
+def websocket_session(path: str, messages: int) -> Callable[[ASGIApp], Awaitable[None]]:
+    scope = {
+        "type": "websocket",
+        "asgi": {"version": "3.0"},
+        "scheme": "ws",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"testserver")],
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+        "subprotocols": [],
+    }
+
+    async def session(app: ASGIApp) -> None:
+        inbox: List[Message] = [
+            {"type": "websocket.connect"},
+            *({"type": "websocket.receive", "text": "ping"} for _ in range(messages)),
+            {"type": "websocket.disconnect", "code": 1000},
+        ]
+        inbox.reverse()
+        replies = 0
+
+        async def receive() -> Message:
+            return inbox.pop()
+
+        async def send(message: Message) -> None:
+            nonlocal replies
+            if message["type"] == "websocket.send":
+                replies += 1
+
+        await app(dict(scope), receive, send)
+        if replies != messages:
+            raise AssertionError(f"{path} replied to {replies}/{messages} messages")
+
+    return session
+
+
+SIMPLE = Scenario("simple", http_request("/simple"))
+ROUTING = Scenario("routing", http_request("/routing/two/two-three/two-three-three"))
+
+# routes in {xpresso,fastapi}_app.py
+HTTP_SCENARIOS = [
+    SIMPLE,
+    Scenario("fast_deps", http_request("/fast_deps")),
+    # each dependency sleeps for 1-100ms
+    Scenario("slow_deps", http_request("/slow_deps"), iterations=10),
+    ROUTING,
+    Scenario(
+        "parameters",
+        http_request("/parameters/abc/123", query_string=b"q1=abc&q2=123"),
+    ),
+]
+
+XPRESSO_SCENARIOS = [
+    Scenario(
+        "body",
+        http_request(
+            "/body",
+            method="POST",
+            body=ITEMS_JSON,
+            headers=[(b"content-type", b"application/json")],
+        ),
+        iterations=200,
+        app=extra_app,
+    ),
+    Scenario("encoding", http_request("/encoding"), iterations=200, app=extra_app),
+    # each op is a whole session of WEBSOCKET_MESSAGES round trips
+    Scenario(
+        "websocket",
+        websocket_session("/ws", WEBSOCKET_MESSAGES),
+        iterations=100,
+        app=extra_app,
+    ),
+]
+
+SCENARIOS = {
+    "xpresso": [*HTTP_SCENARIOS, *XPRESSO_SCENARIOS],
+    "fastapi": HTTP_SCENARIOS,
+    "starlette": [SIMPLE, ROUTING],
+}
+
+
+def load_app(name: str) -> ASGIApp:
+    with contextlib.redirect_stdout(None):  # type: ignore[type-var]
+        # some of these modules print the size of the DAGs they generate
+        module = importlib.import_module(f"benchmarks.{name}_app")
+    return module.app  # type: ignore[no-any-return]
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: ASGIApp) -> AsyncIterator[None]:
+    started = anyio.Event()
+    shutdown = anyio.Event()
+    messages = [{"type": "lifespan.startup"}]
+
+    async def receive() -> Message:
+        if messages:
+            return messages.pop()
+        await shutdown.wait()
+        return {"type": "lifespan.shutdown"}
+
+    async def send(message: Message) -> None:
+        if message["type"] == "lifespan.startup.complete":
+            started.set()
+        elif message["type"].endswith(".failed"):
+            raise RuntimeError(message.get("message", ""))
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(
+            app, {"type": "lifespan", "asgi": {"version": "3.0"}}, receive, send
+        )
+        await started.wait()
+        try:
+            yield
+        finally:
+            shutdown.set()
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def measure_allocations(
+    app: ASGIApp, scenario: Scenario, iterations: int
+) -> Dict[str, float]:
+    peaks: List[int] = []
+    gc.collect()
+    tracemalloc.start()
+    try:
+        blocks_before = sys.getallocatedblocks()
+        for _ in range(iterations):
+            current, _ = tracemalloc.get_traced_memory()
+            if hasattr(tracemalloc, "reset_peak"):  # Python >= 3.9
+                tracemalloc.reset_peak()
+            await scenario.request(app)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - current)
+        gc.collect()
+        blocks_after = sys.getallocatedblocks()
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_peak_bytes": statistics.median(peaks),
+        # anything still allocated after the requests finished
+        "retained_blocks_per_op": (blocks_after - blocks_before) / iterations,
+    }
+
+
+async def run_scenario(app: ASGIApp, scenario: Scenario, rounds: int) -> Dict[str, Any]:
+    app = scenario.app or app
+    async with lifespan(app):
+        for _ in range(max(1, scenario.iterations // 10)):  # warm up
+            await scenario.request(app)
+        ops_per_sec: List[float] = []
+        p50s: List[float] = []
+        p99s: List[float] = []
+        latencies: List[float] = []
+        for _ in range(rounds):
+            gc.collect()
+            round_latencies: List[float] = []
+            round_start = time.perf_counter()
+            for _ in range(scenario.iterations):
+                start = time.perf_counter()
+                await scenario.request(app)
+                round_latencies.append(time.perf_counter() - start)
+            ops_per_sec.append(
+                scenario.iterations / (time.perf_counter() - round_start)
+            )
+            p50s.append(percentile(round_latencies, 0.5) * 1e6)
+            p99s.append(percentile(round_latencies, 0.99) * 1e6)
+            latencies.extend(round_latencies)
+        allocations = await measure_allocations(
+            app, scenario, max(1, scenario.iterations // 10)
+        )
+    return {
+        "iterations": scenario.iterations,
+        "ops_per_sec": statistics.median(ops_per_sec),
+        "p50_us": percentile(latencies, 0.5) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+        # per round, for comparisons between runs
+        "rounds": {"ops_per_sec": ops_per_sec, "p50_us": p50s, "p99_us": p99s},
+        **allocations,
+    }
+
+
+def run_benchmarks(
+    app_name: str,
+    scenarios: Optional[Sequence[str]] = None,
+    rounds: int = 5,
+) -> Dict[str, Any]:
+    app = load_app(app_name)
+    results: Dict[str, Any] = {}
+    for scenario in SCENARIOS[app_name]:
+        if scenarios and scenario.name not in scenarios:
+            continue
+        res = results[scenario.name] = anyio.run(run_scenario, app, scenario, rounds)
+        print(  # noqa: T201
+            f"{scenario.name:<12}"
+            f" {res['ops_per_sec']:>10.1f} ops/s"
+            f"  p50 {res['p50_us']:>9.1f}us"
+            f"  p99 {res['p99_us']:>9.1f}us"
+            f"  {res['alloc_peak_bytes'] / 1024:>8.1f} KiB/op"
+        )
+    return {
+        "app": app_name,
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rounds": rounds,
+        "results": results,
+    }
+
+
+def get_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--app", choices=list(SCENARIOS), default="xpresso")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted({s.name for scenarios in SCENARIOS.values() for s in scenarios}),
+        help="run only these scenarios (default: all of the app's scenarios)",
+    )
+    parser.add_argument("--rounds", type=int, default=5)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    add_arguments(parser)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.app, args.scenario, args.rounds)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Measure how long it takes to generate the OpenAPI document for a large app.
+
+Usage:
+
+    python -m benchmarks.openapi_generation [n_operations]
+"""
+import sys
+import time
+from typing import Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel, create_model
+
+from xpresso import App, FromJson, FromQuery, Operation, Path
+from xpresso.testclient import TestClient
+
+N_MODELS = 50
+
+
+def make_models(n: int) -> List[Type[BaseModel]]:
+    """Build n models that each nest a couple of the previous ones"""
+    models: List[Type[BaseModel]] = []
+    for i in range(n):
+        fields: Dict[str, Any] = {"id": (int, ...), "name": (str, ...)}
+        for j in range(max(0, i - 2), i):
+            fields[f"child_{j}"] = (Optional[models[j]], None)  # type: ignore[valid-type]
+        models.append(create_model(f"Model{i}", **fields))
+    return models
+
+
+def make_app(n_operations: int) -> App:
+    models = make_models(N_MODELS)
+    paths: List[Path] = []
+    for i in range(n_operations):
+        model = models[i % len(models)]
+
+        async def endpoint(body: FromJson[model], limit: FromQuery[int] = 10) -> model:  # type: ignore[valid-type]
+            raise NotImplementedError
+
+        paths.append(
+            Path(f"/resource{i}", post=Operation(endpoint, tags=[f"tag{i % 20}"]))
+        )
+    return App(paths)
+
+
+def main(n_operations: int = 1_000) -> None:
+    app = make_app(n_operations)
+    with TestClient(app):
+        start = time.perf_counter()
+        app.get_openapi(servers=[])
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        app.get_openapi(servers=[])
+        warm = time.perf_counter() - start
+    print(f"{n_operations} operations, {N_MODELS} models")  # noqa: T201
+    print(f"first generation: {cold:.3f}s")  # noqa: T201
+    print(f"second generation (cached fragments): {warm:.3f}s")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
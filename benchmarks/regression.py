@@ -0,0 +1,201 @@
+"""Compare a benchmark run against a stored baseline and fail on regressions.
+
+Usage:
+
+    # record a baseline (on the machine that will run the comparisons)
+    python -m benchmarks.regression --update
+
+    # compare against it, exits with a non-zero status if anything got slower
+    # (or if there is no baseline to compare against)
+    python -m benchmarks.regression
+
+A scenario regresses when its throughput drops or its p50/p99 latency rises
+by more than the threshold *and* the per-round samples of the two runs are
+significantly different (one-sided Mann-Whitney U test), so that noisy runs
+don't fail the check on their own.
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from benchmarks.inprocess import add_arguments, run_benchmarks
+
+BASELINES_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+# metric -> whether higher is better
+METRICS = {"ops_per_sec": True, "p50_us": False, "p99_us": False}
+
+
+def mann_whitney_u_pvalue(xs: Sequence[float], ys: Sequence[float]) -> float:
+    """Probability of values in xs being at least this much larger than those in ys by chance.
+
+    Uses the exact distribution of U for small samples and the normal
+    approximation otherwise.
+    """
+    n, m = len(xs), len(ys)
+    u = 0.0
+    for x, y in itertools.product(xs, ys):
+        if x > y:
+            u += 1
+        elif x == y:
+            u += 0.5
+    if n * m <= 400:
+        # number of ways to get each value of U, built up one element at a time
+        # see https://en.wikipedia.org/wiki/Mann%E2%80%93Whitney_U_test
+        counts = _u_counts(n, m)
+        total = sum(counts)
+        return sum(counts[math.ceil(u) :]) / total
+    mean = n * m / 2
+    std = math.sqrt(n * m * (n + m + 1) / 12)
+    z = (u - mean - 0.5) / std
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def _u_counts(n: int, m: int) -> List[int]:
+    # table[i][j][u] = arrangements of i xs and j ys with statistic u
+    table: Dict[Any, List[int]] = {}
+    for i in range(n + 1):
+        for j in range(m + 1):
+            if i == 0 or j == 0:
+                table[i, j] = [1]
+                continue
+            # the largest element is either an x (beating all j ys) or a y
+            with_x = [0] * j + table[i - 1, j]
+            with_y = table[i, j - 1]
+            size = max(len(with_x), len(with_y))
+            table[i, j] = [
+                (with_x[k] if k < len(with_x) else 0)
+                + (with_y[k] if k < len(with_y) else 0)
+                for k in range(size)
+            ]
+    return table[n, m]
+
+
+class Comparison(NamedTuple):
+    scenario: str
+    metric: str
+    baseline: float
+    current: float
+    change: float
+    pvalue: float
+    regressed: bool
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    *,
+    threshold: float,
+    alpha: float,
+) -> List[Comparison]:
+    comparisons: List[Comparison] = []
+    for scenario, res in current["results"].items():
+        if scenario not in baseline["results"]:
+            continue
+        base = baseline["results"][scenario]
+        for metric, higher_is_better in METRICS.items():
+            change = res[metric] / base[metric] - 1
+            worse, better = res["rounds"][metric], base["rounds"][metric]
+            if higher_is_better:
+                worse, better = better, worse
+                regression = -change
+            else:
+                regression = change
+            pvalue = mann_whitney_u_pvalue(worse, better)
+            comparisons.append(
+                Comparison(
+                    scenario=scenario,
+                    metric=metric,
+                    baseline=base[metric],
+                    current=res[metric],
+                    change=change,
+                    pvalue=pvalue,
+                    regressed=regression > threshold and pvalue < alpha,
+                )
+            )
+    return comparisons
+
+
+def format_comparisons(comparisons: Sequence[Comparison]) -> str:
+    lines = [
+        f"{'scenario':<12} {'metric':<12} {'baseline':>12} {'current':>12} {'change':>8} {'p':>6}"
+    ]
+    for c in comparisons:
+        lines.append(
+            f"{c.scenario:<12} {c.metric:<12} {c.baseline:>12.1f} {c.current:>12.1f}"
+            f" {c.change:>+8.1%} {c.pvalue:>6.3f}"
+            + ("  REGRESSION" if c.regressed else "")
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    add_arguments(parser)
+    parser.add_argument(
+        "--baseline",
+        help="baseline file (default: benchmarks/baselines/<app>.json)",
+    )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="store this run as the new baseline instead of comparing",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative change in a metric that counts as a regression (default: 0.1)",
+    )
+    parser.add_argument(
+        "--alpha",
+        type=float,
+        default=0.05,
+        help="significance level for the comparisons (default: 0.05)",
+    )
+    parser.set_defaults(rounds=10)
+    args = parser.parse_args(argv)
+
+    baseline_path = args.baseline or os.path.join(BASELINES_DIR, f"{args.app}.json")
+    if not args.update and not os.path.exists(baseline_path):
+        # don't let a regression check pass without comparing anything
+        print(  # noqa: T201
+            f"No baseline found at {baseline_path}, record one with --update",
+            file=sys.stderr,
+        )
+        return 2
+
+    report = run_benchmarks(args.app, args.scenario, args.rounds)
+
+    if args.update:
+        os.makedirs(os.path.dirname(os.path.abspath(baseline_path)), exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Stored baseline in {baseline_path}")  # noqa: T201
+        return 0
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    print(  # noqa: T201
+        f"\nComparing with the baseline from commit {baseline.get('commit')}"
+        f" (Python {baseline.get('python')} on {baseline.get('platform')})\n"
+    )
+    comparisons = compare(baseline, report, threshold=args.threshold, alpha=args.alpha)
+    print(format_comparisons(comparisons))  # noqa: T201
+    regressions = [c for c in comparisons if c.regressed]
+    if regressions:
+        print(  # noqa: T201
+            f"\n{len(regressions)} regression(s) of more than {args.threshold:.0%}"
+            f" (p < {args.alpha})"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Measure the per-message overhead of the middleware stack for streaming responses.
+
+The app is called directly (no server, no sockets) so that most of the time
+is spent in xpresso and Starlette.
+
+Usage:
+
+    python -m benchmarks.streaming [n_chunks] [n_requests]
+"""
+import sys
+import time
+from typing import AsyncIterator, List
+
+import anyio
+from starlette.middleware import Middleware
+from starlette.responses import StreamingResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from xpresso import App, Path
+
+
+class WrapSendMiddleware:
+    """Wrap send() like ExceptionMiddleware used to, for comparison"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        response_started = False
+
+        async def sender(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        await self.app(scope, receive, sender)
+
+
+def make_app(n_chunks: int, wrap_send: bool) -> App:
+    async def chunks() -> AsyncIterator[bytes]:
+        for _ in range(n_chunks):
+            yield b"x"
+
+    async def endpoint() -> StreamingResponse:
+        return StreamingResponse(chunks())
+
+    middleware: List[Middleware] = []
+    if wrap_send:
+        middleware.append(Middleware(WrapSendMiddleware))
+    return App([Path("/", get=endpoint)], middleware=middleware)
+
+
+async def run(app: App, n_requests: int) -> float:
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/",
+        "raw_path": b"/",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+    }
+
+    async def receive() -> Message:
+        await anyio.sleep(float("inf"))
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    async def send(message: Message) -> None:
+        pass
+
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+
+def main(n_chunks: int = 10_000, n_requests: int = 20) -> None:
+    print(f"{n_requests} requests streaming {n_chunks} chunks each")  # noqa: T201
+    for wrap_send in (False, True):
+        app = make_app(n_chunks, wrap_send)
+        anyio.run(run, app, 1)  # warm up
+        elapsed = anyio.run(run, app, n_requests)
+        per_chunk = elapsed / (n_requests * n_chunks) * 1e6
+        label = "one extra send() wrapper" if wrap_send else "xpresso"
+        print(f"{label}: {elapsed:.3f}s ({per_chunk:.2f}us per chunk)")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
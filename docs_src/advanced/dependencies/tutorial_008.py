@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+from typing import Dict, List
+
+from xpresso import App, Depends, Path
+from xpresso.dependencies import TTLCache
+from xpresso.typing import Annotated
+
+
+@dataclass
+class JWKS:
+    keys: List[Dict[str, str]]
+
+
+jwks_cache = TTLCache(ttl=300, maxsize=16, stale_while_revalidate=60)
+
+
+async def get_jwks() -> JWKS:
+    # in a real app this would fetch the keys from your identity provider
+    return JWKS(keys=[{"kid": "1", "kty": "RSA"}])
+
+
+JWKSDepends = Annotated[JWKS, Depends(get_jwks, cache=jwks_cache)]
+
+
+async def list_key_ids(jwks: JWKSDepends) -> List[str]:
+    return [key["kid"] for key in jwks.keys]
+
+
+app = App(routes=[Path("/keys", get=list_key_ids)])
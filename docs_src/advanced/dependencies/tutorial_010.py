@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+
+from xpresso import App, Depends, Operation, Path
+from xpresso.threadpool import ThreadPool
+from xpresso.typing import Annotated
+
+
+class User(BaseModel):
+    username: str
+
+
+class Report(BaseModel):
+    username: str
+    orders: int
+
+
+def get_user() -> User:
+    # blocking database IO
+    return User(username="adriangb")
+
+
+def render_report(user: Annotated[User, Depends(get_user, thread_pool="db")]) -> Report:
+    return Report(username=user.username, orders=42)
+
+
+app = App(
+    routes=[Path("/report", get=Operation(render_report, thread_pool="reports"))],
+    thread_pools=[
+        ThreadPool("db", max_workers=10),
+        ThreadPool("reports", max_workers=4),
+    ],
+)
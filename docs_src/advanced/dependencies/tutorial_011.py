@@ -0,0 +1,11 @@
+from xpresso import App, FromQuery, Operation, Path
+
+
+def fibonacci(n: FromQuery[int]) -> int:
+    return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)
+
+
+app = App(
+    routes=[Path("/fib", get=Operation(fibonacci, run_in_process=True))],
+    process_pool_max_workers=4,
+)
@@ -0,0 +1,30 @@
+from typing import Dict
+
+import anyio
+
+from xpresso import App, Depends, Path
+from xpresso.instrumentation import DependencyLatencyCollector
+from xpresso.typing import Annotated
+
+
+async def get_exchange_rate() -> float:
+    await anyio.sleep(0.01)  # pretend this calls an external API
+    return 1.25
+
+
+async def convert(
+    rate: Annotated[float, Depends(get_exchange_rate)],
+) -> Dict[str, float]:
+    return {"EUR": 100 * rate}
+
+
+collector = DependencyLatencyCollector()
+app = App(
+    routes=[Path("/convert", get=convert)],
+    dependency_hooks=[collector],
+)
+
+
+def print_latencies() -> None:
+    for (route, dependency), histogram in collector.histograms.items():
+        print(route, dependency, histogram.count, histogram.quantile(0.99))
@@ -0,0 +1,11 @@
+from xpresso import App, FromQuery, Path
+
+
+async def read_item(item_id: FromQuery[int]) -> int:
+    return item_id
+
+
+app = App(
+    routes=[Path("/items", get=read_item)],
+    handle_validation_errors_in_routes=True,
+)
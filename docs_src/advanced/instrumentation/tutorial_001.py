@@ -0,0 +1,15 @@
+from typing import List
+
+from xpresso import App, Path
+from xpresso.middleware import Middleware
+from xpresso.middleware.server_timing import ServerTimingMiddleware
+
+
+async def list_items() -> List[str]:
+    return ["apple", "banana"]
+
+
+app = App(
+    routes=[Path("/items", get=list_items)],
+    middleware=[Middleware(ServerTimingMiddleware)],
+)
@@ -0,0 +1,20 @@
+from typing import List
+
+from xpresso import App, Depends, FromHeader, HTTPException, Path
+from xpresso.profiling import SamplingProfiler
+
+
+def check_admin_token(x_admin_token: FromHeader[str]) -> None:
+    if x_admin_token != "change-me":
+        raise HTTPException(status_code=403)
+
+
+async def list_items() -> List[str]:
+    return ["apple", "banana"]
+
+
+profiler = SamplingProfiler(
+    path="/_profile",
+    dependencies=[Depends(check_admin_token)],
+)
+app = App(routes=[Path("/items", get=list_items)], profiler=profiler)
@@ -0,0 +1,21 @@
+from typing import List
+
+from xpresso import App, Depends, FromHeader, HTTPException, Path
+from xpresso.profiling import AllocationTracker
+
+
+def check_admin_token(x_admin_token: FromHeader[str]) -> None:
+    if x_admin_token != "change-me":
+        raise HTTPException(status_code=403)
+
+
+async def list_items() -> List[str]:
+    return ["apple", "banana"]
+
+
+tracker = AllocationTracker(
+    sample_rate=0.01,
+    path="/_allocations",
+    dependencies=[Depends(check_admin_token)],
+)
+app = App(routes=[Path("/items", get=list_items)], allocation_tracker=tracker)
@@ -0,0 +1,16 @@
+import time
+
+from xpresso import App, Path
+from xpresso.monitoring import EventLoopMonitor
+
+
+def generate_report() -> str:
+    time.sleep(0.5)  # oops, this blocks the event loop
+    return "done"
+
+
+monitor = EventLoopMonitor(interval=0.1, lag_threshold=0.1)
+app = App(
+    routes=[Path("/report", get=generate_report)],
+    event_loop_monitor=monitor,
+)
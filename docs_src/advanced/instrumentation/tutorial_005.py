@@ -0,0 +1,30 @@
+from typing import List
+
+from pydantic import BaseModel
+
+from xpresso import App, Depends, FromHeader, FromJson, HTTPException, Path
+from xpresso.metrics import MetricsRegistry
+
+
+def check_metrics_token(x_metrics_token: FromHeader[str]) -> None:
+    if x_metrics_token != "change-me":
+        raise HTTPException(status_code=403)
+
+
+metrics = MetricsRegistry(
+    path="/metrics",
+    dependencies=[Depends(check_metrics_token)],
+)
+jobs = metrics.counter("jobs_total", "Jobs that were run.", labelnames=["queue"])
+
+
+class Emails(BaseModel):
+    addresses: List[str]
+
+
+async def send_emails(emails: FromJson[Emails]) -> None:
+    # send the emails
+    jobs.inc("emails")
+
+
+app = App(routes=[Path("/emails", post=send_emails)], metrics=metrics)
@@ -0,0 +1,13 @@
+from typing import List
+
+from xpresso import App, Path
+
+
+async def list_items() -> List[str]:
+    return ["apple", "banana"]
+
+
+app = App(
+    routes=[Path("/items", get=list_items)],
+    openapi_generation="background",
+)
@@ -0,0 +1,20 @@
+from typing import List
+
+from xpresso import App, Operation, Path
+
+
+async def list_items() -> List[str]:
+    return ["apple", "banana"]
+
+
+async def list_users() -> List[str]:
+    return ["adriangb"]
+
+
+app = App(
+    routes=[
+        Path("/items", get=Operation(list_items, tags=["items"])),
+        Path("/users", get=Operation(list_users, tags=["users"])),
+    ],
+    split_openapi_by="tag",
+)
@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+
+from xpresso import App, FromJson, Path, WebSocket, WebSocketRoute
+from xpresso.broadcast import BroadcastHub
+
+
+class Price(BaseModel):
+    symbol: str
+    price: float
+
+
+async def feed(ws: WebSocket, hub: BroadcastHub) -> None:
+    # send everything published to "prices" to this client until it disconnects
+    await hub.serve(ws, "prices")
+
+
+async def update_price(hub: BroadcastHub, price: FromJson[Price]) -> None:
+    await hub.publish("prices", price)
+
+
+app = App(
+    routes=[
+        WebSocketRoute("/prices", feed),
+        Path("/prices", post=update_price),
+    ],
+    broadcast_hub=BroadcastHub(max_queue=100),
+)
@@ -0,0 +1,32 @@
+import json
+from decimal import Decimal
+from functools import partial
+from typing import AsyncIterator
+
+from pydantic import BaseModel
+
+from xpresso import App, WebSocket, WebSocketRoute
+from xpresso.typing import Annotated
+from xpresso.websockets import WebSocketMessages
+
+
+class Order(BaseModel):
+    item_id: int
+    price: Decimal
+
+
+Orders = Annotated[
+    AsyncIterator[Order],
+    WebSocketMessages(
+        decoder=partial(json.loads, parse_float=Decimal),
+        close_code=1008,
+    ),
+]
+
+
+async def take_orders(ws: WebSocket, orders: Orders) -> None:
+    async for order in orders:
+        await ws.send_text(f"Ordered {order.item_id} for {order.price}")
+
+
+app = App(routes=[WebSocketRoute("/orders", take_orders)])
@@ -0,0 +1,36 @@
+from typing import Dict
+
+from xpresso import App, Depends, FromWebSocketMessages, WebSocket, WebSocketRoute
+from xpresso.exceptions import WebSocketValidationError
+from xpresso.typing import Annotated
+
+MAX_MESSAGES_PER_USER = 100
+
+# in a real app this would live in a shared store like Redis
+messages_sent: Dict[str, int] = {}
+
+
+def get_user(ws: WebSocket) -> str:
+    return ws.query_params["user"]
+
+
+def check_rate_limit(user: Annotated[str, Depends(get_user)]) -> None:
+    messages_sent[user] = messages_sent.get(user, 0) + 1
+    if messages_sent[user] > MAX_MESSAGES_PER_USER:
+        raise WebSocketValidationError([], close_code=1008)
+
+
+async def chat(ws: WebSocket, messages: FromWebSocketMessages[str]) -> None:
+    async for message in messages:
+        await ws.send_text(message)
+
+
+app = App(
+    routes=[
+        WebSocketRoute(
+            "/chat",
+            chat,
+            message_dependencies=[Depends(check_rate_limit)],
+        )
+    ]
+)
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+from xpresso import App, FromWebSocketMessages, WebSocket, WebSocketRoute
+
+
+class Order(BaseModel):
+    item_id: int
+    quantity: int
+
+
+async def take_orders(ws: WebSocket, orders: FromWebSocketMessages[Order]) -> None:
+    async for order in orders:
+        await ws.send_text(f"Ordered {order.quantity} of {order.item_id}")
+
+
+app = App(routes=[WebSocketRoute("/orders", take_orders)])
@@ -0,0 +1,20 @@
+from xpresso import App, Depends, WebSocket, WebSocketRoute
+from xpresso.typing import Annotated
+from xpresso.websockets import WebSocketReceiver, WebSocketSender
+
+
+def get_sender(ws: WebSocket) -> WebSocketSender:
+    return WebSocketSender(ws, mode="json", max_queue=100, policy="drop_oldest")
+
+
+async def echo(
+    receiver: WebSocketReceiver,
+    sender: Annotated[WebSocketSender, Depends(get_sender)],
+) -> None:
+    async with receiver, sender:
+        async for batch in receiver.batches():
+            for message in batch:
+                await sender.send({"echo": message})
+
+
+app = App(routes=[WebSocketRoute("/echo", echo)])
@@ -0,0 +1,19 @@
+from typing import List
+
+from xpresso import App, Operation, Path
+from xpresso.middleware import Middleware
+from xpresso.middleware.gzip import GZipMiddleware
+
+
+async def list_items() -> List[str]:
+    return [f"item {i}" for i in range(1000)]
+
+
+app = App(
+    routes=[
+        Path(
+            "/items",
+            get=Operation(list_items, middleware=[Middleware(GZipMiddleware)]),
+        ),
+    ]
+)
@@ -0,0 +1,97 @@
+import math
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from benchmarks.regression import compare, main, mann_whitney_u_pvalue
+
+
+@pytest.mark.parametrize(
+    "xs,ys,pvalue",
+    [
+        # every x beats every y: only 1 of the C(n + m, n) arrangements is as extreme
+        ([3, 4], [1, 2], 1 / 6),
+        ([4, 5, 6], [1, 2, 3], 1 / 20),
+        ([5, 6, 7, 8], [1, 2, 3, 4, 0], 1 / 126),
+        # every y beats every x
+        ([1, 2, 3], [4, 5, 6], 1.0),
+        # U = 3 out of 4, P(U >= 3) = 2 / 6
+        ([2, 4], [1, 3], 2 / 6),
+        # ties count as half a win: U = 2, P(U >= 2) = 4 / 6
+        ([1, 1], [1, 1], 4 / 6),
+    ],
+)
+def test_mann_whitney_u_pvalue_exact(
+    xs: List[float], ys: List[float], pvalue: float
+) -> None:
+    assert mann_whitney_u_pvalue(xs, ys) == pytest.approx(pvalue)
+
+
+def test_mann_whitney_u_pvalue_normal_approximation() -> None:
+    xs = [float(i) for i in range(25, 50)]
+    ys = [float(i) for i in range(25)]
+    # U = 625, z = (625 - 312.5 - 0.5) / sqrt(625 * 51 / 12)
+    assert mann_whitney_u_pvalue(xs, ys) == pytest.approx(
+        0.5 * math.erfc(312 / math.sqrt(625 * 51 / 12) / math.sqrt(2))
+    )
+    assert mann_whitney_u_pvalue(xs, ys) < 1e-8
+    assert mann_whitney_u_pvalue(ys, xs) > 1 - 1e-8
+    # identical samples: U = n * m / 2
+    assert mann_whitney_u_pvalue(xs, xs) == pytest.approx(0.5, abs=0.01)
+
+
+def _report(ops_per_sec: List[float], p50_us: List[float]) -> Dict[str, Any]:
+    return {
+        "results": {
+            "scenario": {
+                "ops_per_sec": sum(ops_per_sec) / len(ops_per_sec),
+                "p50_us": sum(p50_us) / len(p50_us),
+                "p99_us": 100.0,
+                "rounds": {
+                    "ops_per_sec": ops_per_sec,
+                    "p50_us": p50_us,
+                    "p99_us": [100.0] * len(p50_us),
+                },
+            }
+        }
+    }
+
+
+def test_compare_regression() -> None:
+    baseline = _report([1000, 1010, 990, 1005, 995], [10, 10.1, 9.9, 10, 10])
+    # 20% fewer requests per second and 20% slower
+    current = _report([800, 810, 790, 805, 795], [12, 12.1, 11.9, 12, 12])
+    comparisons = {
+        c.metric: c for c in compare(baseline, current, threshold=0.1, alpha=0.05)
+    }
+    assert comparisons["ops_per_sec"].regressed
+    assert comparisons["ops_per_sec"].change == pytest.approx(-0.2)
+    assert comparisons["p50_us"].regressed
+    assert not comparisons["p99_us"].regressed
+
+
+def test_compare_no_regression() -> None:
+    baseline = _report([1000, 1010, 990, 1005, 995], [10, 10.1, 9.9, 10, 10])
+    # faster
+    improved = _report([1200, 1210, 1190, 1205, 1195], [8, 8.1, 7.9, 8, 8])
+    assert not any(
+        c.regressed for c in compare(baseline, improved, threshold=0.1, alpha=0.05)
+    )
+    # slower, but by less than the threshold
+    slightly_worse = _report([950, 960, 940, 955, 945], [10.5, 10.6, 10.4, 10.5, 10.5])
+    assert not any(
+        c.regressed
+        for c in compare(baseline, slightly_worse, threshold=0.1, alpha=0.05)
+    )
+    # slower on average, but not significantly so
+    noisy = _report([1000, 600, 1010, 620, 990], [10, 10.1, 9.9, 10, 10])
+    assert not any(
+        c.regressed for c in compare(baseline, noisy, threshold=0.1, alpha=0.05)
+    )
+
+
+def test_missing_baseline_fails(tmp_path: Path) -> None:
+    baseline = tmp_path / "baseline.json"
+    assert main(["--baseline", str(baseline)]) == 2
+    assert not baseline.exists()
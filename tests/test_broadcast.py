@@ -0,0 +1,270 @@
+from typing import List, Tuple
+
+import anyio
+import pytest
+from pydantic import BaseModel
+from starlette.types import Message, Send
+
+from xpresso import App, FromJson, Path, WebSocket, WebSocketRoute
+from xpresso.broadcast import BroadcastHub, InMemoryBackend, Payload
+from xpresso.testclient import TestClient
+
+
+class Price(BaseModel):
+    symbol: str
+    price: float
+
+
+async def feed(ws: WebSocket, hub: BroadcastHub) -> None:
+    await hub.serve(ws, ws.query_params["channel"])
+
+
+async def publish(hub: BroadcastHub, price: FromJson[Price]) -> None:
+    await hub.publish(price.symbol, price)
+
+
+async def wait_for_subscribers(hub: BroadcastHub, channel: str, n: int) -> None:
+    with anyio.fail_after(1):
+        while hub.subscribers(channel) != n:
+            await anyio.sleep(0.001)
+
+
+def test_fan_out() -> None:
+    encoded: List[Price] = []
+
+    def encoder(price: Price) -> Payload:
+        encoded.append(price)
+        return price.json()
+
+    hub = BroadcastHub(encoder=encoder)
+    app = App(
+        [WebSocketRoute("/feed", feed), Path("/prices", post=publish)],
+        broadcast_hub=hub,
+    )
+
+    with TestClient(app) as client:
+        assert client.portal is not None
+        with client.websocket_connect("/feed?channel=ABC") as ws1:
+            with client.websocket_connect("/feed?channel=ABC") as ws2:
+                with client.websocket_connect("/feed?channel=XYZ") as ws3:
+                    client.portal.call(wait_for_subscribers, hub, "ABC", 2)
+                    client.portal.call(wait_for_subscribers, hub, "XYZ", 1)
+                    resp = client.post("/prices", json={"symbol": "ABC", "price": 1})
+                    assert resp.status_code == 200, resp.content
+                    resp = client.post("/prices", json={"symbol": "XYZ", "price": 2})
+                    assert resp.status_code == 200, resp.content
+                    for ws in (ws1, ws2):
+                        assert ws.receive_json() == {"symbol": "ABC", "price": 1.0}
+                    assert ws3.receive_json() == {"symbol": "XYZ", "price": 2.0}
+        client.portal.call(wait_for_subscribers, hub, "ABC", 0)
+
+    # encoded once per publish, not per subscriber
+    assert len(encoded) == 2
+    assert hub.evicted == 0
+
+
+@pytest.mark.anyio
+async def test_slow_consumer_is_evicted() -> None:
+    hub = BroadcastHub(max_queue=2)
+    sent: List[str] = []
+    closed: List[int] = []
+    fast_done = anyio.Event()
+
+    async def fast_send(message: Message) -> None:
+        if message["type"] == "websocket.send":
+            sent.append(message["text"])
+            if len(sent) == 5:
+                fast_done.set()
+
+    async def slow_send(message: Message) -> None:
+        if message["type"] == "websocket.close":
+            closed.append(message["code"])
+        elif message["type"] == "websocket.send":
+            await anyio.sleep(1)
+
+    async def receive() -> Message:
+        return {"type": "websocket.connect"}
+
+    def connect(send: Send) -> WebSocket:
+        scope = {"type": "websocket", "path": "/", "headers": []}
+        return WebSocket(scope, receive, send)
+
+    async with anyio.create_task_group() as tg:
+        await tg.start(hub.run)
+        async with hub.subscribe(connect(fast_send), "c") as fast, hub.subscribe(
+            connect(slow_send), "c"
+        ) as slow:
+            tg.start_soon(fast.run)
+            tg.start_soon(slow.run)
+            for i in range(5):
+                await hub.publish("c", str(i))
+                # let the fan out run
+                await anyio.sleep(0.01)
+            with anyio.fail_after(1):
+                await fast_done.wait()
+            assert slow.evicted
+            assert not fast.evicted
+            assert hub.subscribers("c") == 1
+        tg.cancel_scope.cancel()
+
+    assert sent == ["0", "1", "2", "3", "4"]
+    assert closed == [1013]
+    assert hub.evicted == 1
+
+
+@pytest.mark.anyio
+async def test_backend_subscriptions() -> None:
+    class RecordingBackend(InMemoryBackend):
+        def __init__(self) -> None:
+            super().__init__()
+            self.calls: List[Tuple[str, str]] = []
+
+        async def subscribe(self, channel: str) -> None:
+            self.calls.append(("subscribe", channel))
+            await super().subscribe(channel)
+
+        async def unsubscribe(self, channel: str) -> None:
+            self.calls.append(("unsubscribe", channel))
+            await super().unsubscribe(channel)
+
+    backend = RecordingBackend()
+    hub = BroadcastHub(backend)
+
+    async def receive() -> Message:
+        return {"type": "websocket.connect"}
+
+    async def send(message: Message) -> None:
+        ...
+
+    def connect() -> WebSocket:
+        scope = {"type": "websocket", "path": "/", "headers": []}
+        return WebSocket(scope, receive, send)
+
+    async with hub.subscribe(connect(), "a", "b"):
+        async with hub.subscribe(connect(), "a"):
+            pass
+        # nobody is listening on "c"
+        await hub.publish("c", "dropped")
+
+    assert backend.calls == [
+        ("subscribe", "a"),
+        ("subscribe", "b"),
+        ("unsubscribe", "a"),
+        ("unsubscribe", "b"),
+    ]
+    assert backend.channels == set()
+
+
+def _connect(messages: List[Message]) -> WebSocket:
+    async def receive() -> Message:
+        return {"type": "websocket.connect"}
+
+    async def send(message: Message) -> None:
+        messages.append(message)
+
+    return WebSocket({"type": "websocket", "path": "/", "headers": []}, receive, send)
+
+
+@pytest.mark.anyio
+async def test_publish_without_listener() -> None:
+    hub = BroadcastHub()
+    # nobody is subscribed, the message is dropped
+    await hub.publish("c", "dropped")
+    async with hub.subscribe(_connect([]), "c"):
+        with pytest.raises(RuntimeError, match="lifespan"):
+            await hub.publish("c", "stuck")
+
+
+@pytest.mark.anyio
+async def test_hubs_sharing_a_backend() -> None:
+    backend = InMemoryBackend()
+    hub1, hub2 = BroadcastHub(backend), BroadcastHub(backend)
+    received1: List[Message] = []
+    received2: List[Message] = []
+
+    async with anyio.create_task_group() as tg:
+        await tg.start(hub1.run)
+        await tg.start(hub2.run)
+        async with hub1.subscribe(_connect(received1), "c") as sub1:
+            tg.start_soon(sub1.run)
+            async with hub2.subscribe(_connect(received2), "c") as sub2:
+                tg.start_soon(sub2.run)
+                await hub1.publish("c", "1")
+                with anyio.fail_after(1):
+                    while len(received1) != 2 or len(received2) != 2:
+                        await anyio.sleep(0.001)
+            # hub1 is still subscribed
+            assert backend.channels == {"c"}
+            await hub2.publish("c", "2")
+            with anyio.fail_after(1):
+                while len(received1) != 3:
+                    await anyio.sleep(0.001)
+        tg.cancel_scope.cancel()
+
+    assert backend.channels == set()
+    assert [m.get("text") for m in received1] == [None, "1", "2"]
+    assert [m.get("text") for m in received2] == [None, "1"]
+
+
+class RecordingBackend(InMemoryBackend):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: List[Tuple[str, str]] = []
+
+    async def subscribe(self, channel: str) -> None:
+        self.calls.append(("subscribe", channel))
+        await super().subscribe(channel)
+
+    async def unsubscribe(self, channel: str) -> None:
+        self.calls.append(("unsubscribe", channel))
+        await super().unsubscribe(channel)
+
+
+@pytest.mark.anyio
+async def test_backend_subscription_after_eviction() -> None:
+    backend = RecordingBackend()
+    hub = BroadcastHub(backend, max_queue=1)
+
+    async with anyio.create_task_group() as tg:
+        await tg.start(hub.run)
+        evicted = await hub.subscribe(_connect([]), "c").__aenter__()
+        # nothing is sent to this subscriber, so it falls behind
+        await hub.publish("c", "1")
+        await hub.publish("c", "2")
+        with anyio.fail_after(1):
+            while not evicted.evicted:
+                await anyio.sleep(0.001)
+        assert hub.subscribers("c") == 0
+        # a new subscriber re-uses the backend subscription
+        subscription = await hub.subscribe(_connect([]), "c").__aenter__()
+        assert hub.subscribers("c") == 1
+        await evicted.__aexit__(None, None, None)
+        assert backend.channels == {"c"}
+        await subscription.__aexit__(None, None, None)
+        tg.cancel_scope.cancel()
+
+    assert backend.calls == [("subscribe", "c"), ("unsubscribe", "c")]
+    assert backend.channels == set()
+
+
+@pytest.mark.anyio
+async def test_failed_subscribe_is_undone() -> None:
+    class FailingBackend(RecordingBackend):
+        async def subscribe(self, channel: str) -> None:
+            await super().subscribe(channel)
+            if channel == "b":
+                raise ConnectionError
+
+    backend = FailingBackend()
+    hub = BroadcastHub(backend)
+
+    with pytest.raises(ConnectionError):
+        async with hub.subscribe(_connect([]), "a", "b"):
+            raise AssertionError("should not be reached")  # pragma: no cover
+
+    assert hub.subscribers("a") == hub.subscribers("b") == 0
+    assert backend.calls == [
+        ("subscribe", "a"),
+        ("subscribe", "b"),
+        ("unsubscribe", "a"),
+    ]
@@ -0,0 +1,226 @@
+import gc
+import weakref
+from typing import List
+
+import anyio
+import httpx
+import pytest
+
+from xpresso import App, Depends, FromQuery, Path, WebSocket, WebSocketRoute
+from xpresso.dependencies import TTLCache
+from xpresso.dependencies._single_flight import SingleFlight, single_flight
+from xpresso.testclient import TestClient
+from xpresso.typing import Annotated
+
+
+@pytest.mark.anyio
+async def test_concurrent_requests_share_computation() -> None:
+    calls: List[int] = []
+    release = anyio.Event()
+
+    async def get_value() -> int:
+        calls.append(1)
+        await release.wait()
+        return 1
+
+    async def endpoint(
+        v: Annotated[int, Depends(get_value, single_flight=True)]
+    ) -> int:
+        return v
+
+    app = App([Path("/", get=endpoint)])
+
+    results: List[int] = []
+
+    async def make_request(client: httpx.AsyncClient) -> None:
+        resp = await client.get("/")
+        results.append(resp.json())
+
+    async with httpx.AsyncClient(app=app, base_url="http://example.com") as client:
+        async with anyio.create_task_group() as tg:
+            for _ in range(5):
+                tg.start_soon(make_request, client)
+            for _ in range(100):
+                await anyio.sleep(0)
+            release.set()
+
+    assert results == [1] * 5
+    assert calls == [1]
+
+
+@pytest.mark.anyio
+async def test_key_parameters() -> None:
+    async def get_value(a: FromQuery[int], b: FromQuery[int]) -> int:
+        await anyio.sleep(0)
+        return a
+
+    async def endpoint(
+        v: Annotated[int, Depends(get_value, single_flight=["a"])]
+    ) -> int:
+        return v
+
+    app = App([Path("/", get=endpoint)])
+
+    async with httpx.AsyncClient(app=app, base_url="http://example.com") as client:
+        resp = await client.get("/", params={"a": 1, "b": 2})
+        assert resp.json() == 1
+        resp = await client.get("/", params={"a": 2, "b": 2})
+        assert resp.json() == 2
+
+
+def test_unknown_key_parameter() -> None:
+    def get_value(a: int) -> int:
+        raise NotImplementedError
+
+    with pytest.raises(ValueError, match="are not parameters"):
+        Depends(get_value, single_flight=["b"])
+
+
+def test_wrappers_are_reused() -> None:
+    def get_value() -> int:
+        raise NotImplementedError
+
+    assert single_flight(get_value) is single_flight(get_value)
+
+
+def test_wrappers_are_not_kept_alive() -> None:
+    def get_value() -> int:
+        raise NotImplementedError
+
+    wrapper = weakref.ref(single_flight(get_value))
+    call = weakref.ref(get_value)
+    del get_value
+    gc.collect()
+
+    assert wrapper() is None
+    assert call() is None
+
+
+@pytest.mark.anyio
+async def test_apps_do_not_share_computations() -> None:
+    calls: List[int] = []
+    release = anyio.Event()
+
+    async def get_value() -> int:
+        calls.append(1)
+        await release.wait()
+        return len(calls)
+
+    async def endpoint(
+        v: Annotated[int, Depends(get_value, single_flight=True)]
+    ) -> int:
+        return v
+
+    apps = [App([Path("/", get=endpoint)]) for _ in range(2)]
+
+    results: List[int] = []
+
+    async def make_request(app: App) -> None:
+        async with httpx.AsyncClient(app=app, base_url="http://example.com") as client:
+            resp = await client.get("/")
+            results.append(resp.json())
+
+    async with anyio.create_task_group() as tg:
+        for app in apps:
+            tg.start_soon(make_request, app)
+        for _ in range(100):
+            await anyio.sleep(0)
+        release.set()
+
+    assert results == [2, 2]
+    assert calls == [1, 1]
+
+
+def test_websocket() -> None:
+    def get_value() -> int:
+        return 1
+
+    async def websocket_endpoint(
+        ws: WebSocket, v: Annotated[int, Depends(get_value, single_flight=True)]
+    ) -> None:
+        await ws.accept()
+        await ws.send_json(v)
+        await ws.close()
+
+    app = App([WebSocketRoute("/ws", websocket_endpoint)])
+
+    with TestClient(app).websocket_connect("/ws") as ws:
+        assert ws.receive_json() == 1
+
+
+def test_with_ttl_cache() -> None:
+    cache = TTLCache(ttl=10)
+
+    def get_value() -> int:
+        return 1
+
+    async def endpoint(
+        v: Annotated[int, Depends(get_value, cache=cache, single_flight=True)]
+    ) -> int:
+        return v
+
+    app = App([Path("/", get=endpoint)])
+
+    with TestClient(app) as client:
+        assert client.get("/").json() == 1
+    assert len(cache) == 1
+
+
+@pytest.mark.anyio
+async def test_errors_are_shared() -> None:
+    flights = SingleFlight()
+    started = anyio.Event()
+    release = anyio.Event()
+    errors: List[Exception] = []
+
+    async def compute() -> int:
+        started.set()
+        await release.wait()
+        raise ValueError
+
+    async def run() -> None:
+        try:
+            await flights.do("key", compute)
+        except ValueError as e:
+            errors.append(e)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(run)
+        await started.wait()
+        tg.start_soon(run)
+        await anyio.sleep(0)
+        release.set()
+
+    assert len(errors) == 2
+    assert len(flights) == 0
+
+
+@pytest.mark.anyio
+async def test_cancelled_computation_is_taken_over() -> None:
+    flights = SingleFlight()
+    started = anyio.Event()
+    results: List[int] = []
+
+    async def slow() -> int:
+        started.set()
+        await anyio.sleep(float("inf"))
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    async def fast() -> int:
+        return 2
+
+    async def leader() -> None:
+        await flights.do("key", slow)  # pragma: no cover
+
+    async def follower() -> None:
+        results.append(await flights.do("key", fast))
+
+    async with anyio.create_task_group() as tg:
+        async with anyio.create_task_group() as leader_tg:
+            leader_tg.start_soon(leader)
+            await started.wait()
+            tg.start_soon(follower)
+            await anyio.sleep(0)
+            leader_tg.cancel_scope.cancel()
+
+    assert results == [2]
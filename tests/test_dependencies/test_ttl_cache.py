@@ -0,0 +1,188 @@
+from typing import List
+
+import anyio
+import pytest
+
+from xpresso import App, Depends, FromQuery, Path
+from xpresso.dependencies import Injectable, TTLCache
+from xpresso.testclient import TestClient
+from xpresso.typing import Annotated
+
+
+class FakeTimer:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_values_are_shared_across_requests_until_they_expire() -> None:
+    timer = FakeTimer()
+    cache = TTLCache(ttl=10, timer=timer)
+    calls: List[int] = []
+
+    def get_value() -> int:
+        calls.append(1)
+        return len(calls)
+
+    async def endpoint(v: Annotated[int, Depends(get_value, cache=cache)]) -> int:
+        return v
+
+    app = App([Path("/", get=endpoint)])
+
+    with TestClient(app) as client:
+        assert client.get("/").json() == 1
+        assert client.get("/").json() == 1
+        timer.now = 11
+        assert client.get("/").json() == 2
+        assert client.get("/").json() == 2
+
+    assert len(calls) == 2
+
+
+def test_values_are_keyed_by_parameters() -> None:
+    cache = TTLCache(ttl=10)
+
+    def get_param(p: FromQuery[str]) -> str:
+        return p
+
+    async def get_value(p: Annotated[str, Depends(get_param, scope="endpoint")]) -> str:
+        return f"value-{p}"
+
+    async def endpoint(v: Annotated[str, Depends(get_value, cache=cache)]) -> str:
+        return v
+
+    app = App([Path("/", get=endpoint)])
+
+    with TestClient(app) as client:
+        assert client.get("/", params={"p": "a"}).json() == "value-a"
+        assert client.get("/", params={"p": "b"}).json() == "value-b"
+
+    assert len(cache) == 2
+
+
+def test_maxsize() -> None:
+    cache = TTLCache(ttl=10, maxsize=1)
+    counter: List[int] = []
+
+    def get_param(p: FromQuery[str]) -> str:
+        return p
+
+    def get_value(p: Annotated[str, Depends(get_param)]) -> str:
+        counter.append(1)
+        return p
+
+    async def endpoint(v: Annotated[str, Depends(get_value, cache=cache)]) -> str:
+        return v
+
+    app = App([Path("/", get=endpoint)])
+
+    with TestClient(app) as client:
+        client.get("/", params={"p": "a"})
+        client.get("/", params={"p": "b"})
+        client.get("/", params={"p": "a"})
+
+    assert len(cache) == 1
+    assert len(counter) == 3
+
+
+def test_stale_while_revalidate() -> None:
+    timer = FakeTimer()
+    cache = TTLCache(ttl=10, stale_while_revalidate=10, timer=timer)
+    calls: List[int] = []
+
+    async def get_value() -> int:
+        calls.append(1)
+        await anyio.sleep(0)
+        return len(calls)
+
+    async def endpoint(v: Annotated[int, Depends(get_value, cache=cache)]) -> int:
+        return v
+
+    app = App([Path("/", get=endpoint)])
+
+    with TestClient(app) as client:
+        assert client.get("/").json() == 1
+        timer.now = 15
+        # stale value is served and refreshed in the background
+        assert client.get("/").json() == 1
+        # give the refresh a chance to run
+        for _ in range(10):
+            if client.get("/").json() == 2:
+                break
+        else:  # pragma: no cover
+            raise AssertionError("value was never refreshed")
+        timer.now = 100
+        # past the stale window, computed inline
+        assert client.get("/").json() == 3
+
+
+def test_sync_to_thread() -> None:
+    cache = TTLCache(ttl=10)
+
+    def get_value() -> int:
+        return 1
+
+    async def endpoint(
+        v: Annotated[int, Depends(get_value, cache=cache, sync_to_thread=True)]
+    ) -> int:
+        return v
+
+    app = App([Path("/", get=endpoint)])
+
+    with TestClient(app) as client:
+        assert client.get("/").json() == 1
+
+
+def test_injectable() -> None:
+    cache = TTLCache(ttl=10)
+    instances: List[object] = []
+
+    class Config(Injectable, cache=cache):
+        def __init__(self) -> None:
+            instances.append(self)
+
+    async def endpoint(config: Config) -> None:
+        ...
+
+    app = App([Path("/", get=endpoint)])
+
+    with TestClient(app) as client:
+        client.get("/")
+        client.get("/")
+
+    assert len(instances) == 1
+
+
+def test_override_cached_dependency() -> None:
+    cache = TTLCache(ttl=10)
+
+    def get_value() -> int:
+        return 1
+
+    async def endpoint(v: Annotated[int, Depends(get_value, cache=cache)]) -> int:
+        return v
+
+    app = App([Path("/", get=endpoint)])
+    app.dependency_overrides[get_value] = lambda: 2
+
+    with TestClient(app) as client:
+        assert client.get("/").json() == 2
+
+
+def test_teardown_dependencies_cannot_be_cached() -> None:
+    def get_value() -> "object":
+        yield 1
+
+    with pytest.raises(TypeError, match="teardown"):
+        Depends(get_value, cache=TTLCache(ttl=1))
+
+
+def test_invalid_parameters() -> None:
+    with pytest.raises(ValueError):
+        TTLCache(ttl=0)
+    with pytest.raises(ValueError):
+        TTLCache(ttl=1, maxsize=0)
+    with pytest.raises(ValueError, match="explicitly declare"):
+        Depends(cache=TTLCache(ttl=1))
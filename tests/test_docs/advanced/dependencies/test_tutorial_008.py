@@ -0,0 +1,12 @@
+from docs_src.advanced.dependencies.tutorial_008 import app, jwks_cache
+from xpresso.testclient import TestClient
+
+
+def test_jwks_are_cached() -> None:
+    jwks_cache.clear()
+    with TestClient(app) as client:
+        for _ in range(2):
+            resp = client.get("/keys")
+            assert resp.status_code == 200, resp.content
+            assert resp.json() == ["1"]
+    assert len(jwks_cache) == 1
@@ -0,0 +1,11 @@
+from docs_src.advanced.dependencies.tutorial_010 import app
+from xpresso.testclient import TestClient
+
+
+def test_thread_pools() -> None:
+    with TestClient(app) as client:
+        resp = client.get("/report")
+        assert resp.status_code == 200, resp.content
+        assert resp.json() == {"username": "adriangb", "orders": 42}
+    assert app.thread_pools["db"].statistics().completed == 1
+    assert app.thread_pools["reports"].statistics().completed == 1
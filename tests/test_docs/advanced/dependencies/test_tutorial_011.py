@@ -0,0 +1,15 @@
+from docs_src.advanced.dependencies.tutorial_011 import app
+from xpresso.testclient import TestClient
+
+
+def test_run_in_process() -> None:
+    with TestClient(app) as client:
+        resp = client.get("/fib", params={"n": 10})
+        assert resp.status_code == 200, resp.content
+        assert resp.json() == 55
+
+
+def test_validation_happens_in_the_main_process() -> None:
+    with TestClient(app) as client:
+        resp = client.get("/fib", params={"n": "ten"})
+        assert resp.status_code == 422, resp.content
@@ -0,0 +1,19 @@
+import pytest
+
+from docs_src.advanced.dependencies.tutorial_012 import app, collector, print_latencies
+from xpresso.testclient import TestClient
+
+
+def test_dependency_latencies(capsys: pytest.CaptureFixture[str]) -> None:
+    collector.reset()
+    client = TestClient(app)
+    resp = client.get("/convert")
+    assert resp.status_code == 200, resp.content
+    assert resp.json() == {"EUR": 125.0}
+
+    histogram = collector.histograms[("GET /convert", "get_exchange_rate")]
+    assert histogram.count == 1
+    assert histogram.total >= 0.01
+
+    print_latencies()
+    assert "GET /convert get_exchange_rate 1" in capsys.readouterr().out
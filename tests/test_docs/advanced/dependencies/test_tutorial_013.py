@@ -0,0 +1,17 @@
+from docs_src.advanced.dependencies.tutorial_013 import app
+from xpresso.testclient import TestClient
+
+
+def test_validation_errors_in_routes() -> None:
+    client = TestClient(app)
+    resp = client.get("/items", params={"item_id": "foo"})
+    assert resp.status_code == 422, resp.content
+    assert resp.json() == {
+        "detail": [
+            {
+                "loc": ["query", "item_id"],
+                "msg": "value is not a valid integer",
+                "type": "type_error.integer",
+            }
+        ]
+    }
@@ -0,0 +1,13 @@
+from docs_src.advanced.instrumentation.tutorial_001 import app
+from xpresso.testclient import TestClient
+
+
+def test_server_timing() -> None:
+    client = TestClient(app)
+    resp = client.get("/items")
+    assert resp.status_code == 200, resp.content
+    phases = [
+        metric.split(";")[0] for metric in resp.headers["server-timing"].split(", ")
+    ]
+    assert "endpoint" in phases
+    assert "send" not in phases
@@ -0,0 +1,19 @@
+from docs_src.advanced.instrumentation.tutorial_002 import app
+from xpresso.testclient import TestClient
+
+
+def test_profile_requires_token() -> None:
+    client = TestClient(app)
+    resp = client.get(
+        "/_profile", params={"seconds": 0.01}, headers={"X-Admin-Token": "wrong"}
+    )
+    assert resp.status_code == 403, resp.content
+
+
+def test_profile() -> None:
+    client = TestClient(app)
+    resp = client.get(
+        "/_profile", params={"seconds": 0.05}, headers={"X-Admin-Token": "change-me"}
+    )
+    assert resp.status_code == 200, resp.content
+    assert resp.headers["content-type"].startswith("text/plain")
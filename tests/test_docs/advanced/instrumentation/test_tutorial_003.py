@@ -0,0 +1,15 @@
+from docs_src.advanced.instrumentation.tutorial_003 import app, tracker
+from xpresso.testclient import TestClient
+
+
+def test_allocations_require_token() -> None:
+    client = TestClient(app)
+    resp = client.get("/_allocations", headers={"X-Admin-Token": "wrong"})
+    assert resp.status_code == 403, resp.content
+
+
+def test_allocations() -> None:
+    client = TestClient(app)
+    resp = client.get("/_allocations", headers={"X-Admin-Token": "change-me"})
+    assert resp.status_code == 200, resp.content
+    assert resp.json() == tracker.report()
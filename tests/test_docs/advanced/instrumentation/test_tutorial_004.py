@@ -0,0 +1,18 @@
+import time
+
+from docs_src.advanced.instrumentation.tutorial_004 import app, monitor
+from xpresso.testclient import TestClient
+
+
+def test_event_loop_monitor() -> None:
+    with TestClient(app) as client:
+        # let the monitor get going
+        time.sleep(0.15)
+        resp = client.get("/report")
+        assert resp.status_code == 200, resp.content
+        # and record the spike
+        time.sleep(0.15)
+
+    assert monitor.spikes >= 1
+    assert monitor.max_lag >= 0.3
+    assert monitor.in_flight == {"GET /report": 0}
@@ -0,0 +1,20 @@
+from docs_src.advanced.instrumentation.tutorial_005 import app
+from xpresso.testclient import TestClient
+
+
+def test_metrics_require_token() -> None:
+    client = TestClient(app)
+    resp = client.get("/metrics", headers={"X-Metrics-Token": "wrong"})
+    assert resp.status_code == 403, resp.content
+
+
+def test_metrics() -> None:
+    client = TestClient(app)
+    resp = client.post("/emails", json={"addresses": ["user@example.com"]})
+    assert resp.status_code == 200, resp.content
+
+    resp = client.get("/metrics", headers={"X-Metrics-Token": "change-me"})
+    assert resp.status_code == 200, resp.content
+    lines = resp.text.splitlines()
+    assert 'jobs_total{queue="emails"} 1' in lines
+    assert 'xpresso_http_requests_total{route="POST /emails",status="200"} 1' in lines
@@ -0,0 +1,15 @@
+import time
+
+from docs_src.advanced.openapi.tutorial_001 import app
+from xpresso.testclient import TestClient
+
+
+def test_background_generation() -> None:
+    with TestClient(app) as client:
+        resp = client.get("/openapi.json")
+        while resp.status_code == 503:
+            assert "retry-after" in resp.headers
+            time.sleep(0.01)
+            resp = client.get("/openapi.json")
+        assert resp.status_code == 200, resp.content
+        assert list(resp.json()["paths"]) == ["/items"]
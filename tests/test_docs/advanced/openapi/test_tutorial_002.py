@@ -0,0 +1,20 @@
+from docs_src.advanced.openapi.tutorial_002 import app
+from xpresso.testclient import TestClient
+
+
+def test_split_by_tag() -> None:
+    client = TestClient(app)
+
+    assert app.get_openapi_partitions() == ["items", "users"]
+
+    resp = client.get("/openapi/items.json")
+    assert resp.status_code == 200, resp.content
+    assert list(resp.json()["paths"]) == ["/items"]
+
+    resp = client.get("/openapi/users.json")
+    assert resp.status_code == 200, resp.content
+    assert list(resp.json()["paths"]) == ["/users"]
+
+    resp = client.get("/openapi.json")
+    assert resp.status_code == 200, resp.content
+    assert list(resp.json()["paths"]) == ["/items", "/users"]
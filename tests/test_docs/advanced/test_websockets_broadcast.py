@@ -0,0 +1,24 @@
+import anyio
+
+from docs_src.advanced.websockets_broadcast import app
+from xpresso.broadcast import BroadcastHub
+from xpresso.testclient import TestClient
+
+
+async def wait_for_subscribers(hub: BroadcastHub, n: int) -> None:
+    with anyio.fail_after(1):
+        while hub.subscribers("prices") != n:
+            await anyio.sleep(0.001)
+
+
+def test_broadcast() -> None:
+    hub = app.broadcast_hub
+    with TestClient(app) as client:
+        assert client.portal is not None
+        with client.websocket_connect("/prices") as ws1:
+            with client.websocket_connect("/prices") as ws2:
+                client.portal.call(wait_for_subscribers, hub, 2)
+                resp = client.post("/prices", json={"symbol": "ABC", "price": 1})
+                assert resp.status_code == 200, resp.content
+                for ws in (ws1, ws2):
+                    assert ws.receive_json() == {"symbol": "ABC", "price": 1.0}
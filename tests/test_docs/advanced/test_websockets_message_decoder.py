@@ -0,0 +1,19 @@
+import pytest
+
+from docs_src.advanced.websockets_message_decoder import app
+from xpresso.testclient import TestClient
+from xpresso.websockets import WebSocketDisconnect
+
+
+def test_custom_decoder() -> None:
+    with TestClient(app).websocket_connect("/orders") as ws:
+        ws.send_text('{"item_id": 1, "price": 0.1}')
+        assert ws.receive_text() == "Ordered 1 for 0.1"
+
+
+def test_custom_close_code() -> None:
+    with TestClient(app).websocket_connect("/orders") as ws:
+        ws.send_text("not json")
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            ws.receive_text()
+    assert exc_info.value.code == 1008
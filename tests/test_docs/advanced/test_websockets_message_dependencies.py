@@ -0,0 +1,23 @@
+import pytest
+
+from docs_src.advanced.websockets_message_dependencies import (
+    MAX_MESSAGES_PER_USER,
+    app,
+    messages_sent,
+)
+from xpresso.testclient import TestClient
+from xpresso.websockets import WebSocketDisconnect
+
+
+def test_rate_limit() -> None:
+    messages_sent.clear()
+    with TestClient(app).websocket_connect("/chat?user=adriangb") as ws:
+        ws.send_json("hello")
+        assert ws.receive_text() == "hello"
+        assert messages_sent == {"adriangb": 1}
+
+        messages_sent["adriangb"] = MAX_MESSAGES_PER_USER
+        ws.send_json("hello again")
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            ws.receive_text()
+    assert exc_info.value.code == 1008
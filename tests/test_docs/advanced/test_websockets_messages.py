@@ -0,0 +1,21 @@
+import pytest
+
+from docs_src.advanced.websockets_messages import app
+from xpresso.testclient import TestClient
+from xpresso.websockets import WebSocketDisconnect
+
+
+def test_typed_messages() -> None:
+    with TestClient(app).websocket_connect("/orders") as ws:
+        ws.send_json({"item_id": 1, "quantity": 2})
+        assert ws.receive_text() == "Ordered 2 of 1"
+        ws.send_json({"item_id": 3, "quantity": 4})
+        assert ws.receive_text() == "Ordered 4 of 3"
+
+
+def test_invalid_message() -> None:
+    with TestClient(app).websocket_connect("/orders") as ws:
+        ws.send_json({"item_id": 1})
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            ws.receive_text()
+    assert exc_info.value.code == 1007
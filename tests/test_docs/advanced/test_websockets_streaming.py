@@ -0,0 +1,10 @@
+from docs_src.advanced.websockets_streaming import app
+from xpresso.testclient import TestClient
+
+
+def test_echo() -> None:
+    with TestClient(app).websocket_connect("/echo") as ws:
+        ws.send_text("hello")
+        ws.send_text("world")
+        assert ws.receive_json() == {"echo": "hello"}
+        assert ws.receive_json() == {"echo": "world"}
@@ -0,0 +1,10 @@
+from docs_src.tutorial.middleware.tutorial_002 import app
+from xpresso.testclient import TestClient
+
+
+def test_operation_middleware() -> None:
+    client = TestClient(app)
+    resp = client.get("/items", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200, resp.content
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.json() == [f"item {i}" for i in range(1000)]
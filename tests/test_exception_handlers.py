@@ -1,9 +1,20 @@
+import asyncio
+from decimal import Decimal
+from typing import Any, AsyncIterator, List
+
 import pytest
-from starlette.responses import JSONResponse
+from pydantic import BaseModel, ValidationError, condecimal
+from starlette.middleware import Middleware
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.routing import Router as StarletteRouter
 
-from xpresso import App, FromPath, HTTPException, Path, Request
-from xpresso.exception_handlers import ExcHandler
+from xpresso import App, FromPath, HTTPException, Path, Request, Router
+from xpresso.encoders import JsonableEncoder
+from xpresso.exception_handlers import ExcHandler, render_validation_errors
 from xpresso.exceptions import RequestValidationError
+from xpresso.middleware.exceptions import ExceptionMiddleware
+from xpresso.routing.mount import Mount
 from xpresso.testclient import TestClient
 
 
@@ -73,3 +84,250 @@ def test_override_server_error_exception_response():
     response = client.get("/server-error")
     assert response.status_code == 500
     assert response.json() == {"exception": "server-error"}
+
+
+def test_render_validation_errors_matches_jsonable_encoder() -> None:
+    class Model(BaseModel):
+        a: condecimal(gt=Decimal("1.5"))  # type: ignore[valid-type]
+        b: int
+        c: str = "ñ"
+
+    with pytest.raises(ValidationError) as exc_info:
+        Model(a="1", b="x")  # type: ignore[arg-type]
+    errors = exc_info.value.errors()
+    expected = JSONResponse(JsonableEncoder()({"detail": errors})).body
+    assert render_validation_errors(errors) == expected
+
+
+def test_handle_validation_errors_in_routes() -> None:
+    seen = []
+
+    class CatchValidationErrors:
+        def __init__(self, app):
+            self.app = app
+
+        async def __call__(self, scope, receive, send):
+            try:
+                await self.app(scope, receive, send)
+            except RequestValidationError:
+                seen.append(1)
+                raise
+
+    routes = [
+        Mount(
+            "/mount",
+            app=Router(
+                [Path("/{param}", get=route_with_request_validation_exception)],
+                middleware=[Middleware(CatchValidationErrors)],
+            ),
+        )
+    ]
+
+    app = App(routes, handle_validation_errors_in_routes=True)
+    response = TestClient(app).get("/mount/invalid")
+    assert response.status_code == 422, response.content
+    assert response.json()["detail"][0]["loc"] == ["path", "param"]
+    # the error never made it up to the Router's middleware
+    assert seen == []
+
+    # the default behavior is to let it propagate
+    app = App(routes)
+    response = TestClient(app).get("/mount/invalid")
+    assert response.status_code == 422, response.content
+    assert seen == [1]
+
+
+def test_handle_validation_errors_in_routes_with_custom_handler() -> None:
+    app = App(
+        routes=[
+            Path(
+                "/request-validation/{param}/",
+                get=route_with_request_validation_exception,
+            ),
+        ],
+        exception_handlers=[
+            ExcHandler(RequestValidationError, request_validation_exception_handler),
+        ],
+        handle_validation_errors_in_routes=True,
+    )
+    response = TestClient(app).get("/request-validation/invalid")
+    assert response.status_code == 200
+    assert response.json() == {"exception": "request-validation"}
+
+
+@pytest.mark.parametrize(
+    "exc",
+    [
+        HTTPException(status_code=404),
+        HTTPException(status_code=429, headers={"Retry-After": "1"}),
+        HTTPException(status_code=400, detail="custom"),
+        # Starlette allows any JSON serializable detail at runtime
+        HTTPException(status_code=418, detail={"nested": ["ñ"]}),  # type: ignore[arg-type]
+    ],
+)
+def test_http_exception_handler_output(exc: HTTPException) -> None:
+    async def endpoint() -> None:
+        raise exc
+
+    app = App([Path("/", get=endpoint)])
+    response = TestClient(app).get("/")
+    expected = JSONResponse(
+        {"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers
+    )
+    assert response.status_code == exc.status_code
+    assert response.content == expected.body
+    assert dict(response.headers) == dict(expected.headers)
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+@pytest.mark.parametrize("sync_to_thread", [True, False])
+def test_sync_exception_handler_sync_to_thread(sync_to_thread: bool) -> None:
+    def handler(request: Request, exc: HTTPException) -> Response:
+        return JSONResponse({"in_event_loop": _in_event_loop()})
+
+    app = App(
+        [Path("/", get=route_with_http_exception)],
+        exception_handlers=[
+            ExcHandler(HTTPException, handler, sync_to_thread=sync_to_thread)
+        ],
+    )
+    response = TestClient(app).get("/")
+    assert response.status_code == 200, response.content
+    assert response.json() == {"in_event_loop": not sync_to_thread}
+
+
+def test_exception_handler_lookup_is_cached() -> None:
+    lookups: List[Exception] = []
+
+    class CountingExceptionMiddleware(ExceptionMiddleware):
+        def _lookup_exception_handler(self, exc: Exception) -> Any:
+            lookups.append(exc)
+            return super()._lookup_exception_handler(exc)
+
+    class CustomError(ValueError):
+        pass
+
+    async def handler(request: Request, exc: Exception) -> Response:
+        return JSONResponse(type(exc).__name__)
+
+    async def endpoint(request: Request) -> None:
+        raise CustomError if request.query_params.get("custom") else ValueError
+
+    app = App(
+        [Path("/", get=endpoint)],
+        middleware=[
+            Middleware(CountingExceptionMiddleware, handlers={ValueError: handler})
+        ],
+    )
+    client = TestClient(app)
+    for _ in range(3):
+        assert client.get("/").json() == "ValueError"
+        assert client.get("/", params={"custom": "1"}).json() == "CustomError"
+    # once for ValueError and once for CustomError
+    assert len(lookups) == 2
+
+
+def test_exception_middleware_does_not_wrap_send() -> None:
+    sends: List[Any] = []
+
+    class RecordSend:
+        def __init__(self, app: Any) -> None:
+            self.app = app
+
+        async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+            sends.append(send)
+            await self.app(scope, receive, send)
+
+    async def endpoint(request: Request) -> None:
+        sends.append(request._send)
+
+    app = App([Path("/", get=endpoint)], middleware=[Middleware(RecordSend)])
+    assert TestClient(app).get("/").status_code == 200
+    assert len(sends) == 2
+    assert sends[0] is sends[1]
+
+
+def test_handled_exception_after_response_started() -> None:
+    async def chunks() -> AsyncIterator[bytes]:
+        yield b"a"
+        raise HTTPException(status_code=400)
+
+    async def endpoint() -> StreamingResponse:
+        return StreamingResponse(chunks())
+
+    app = App([Path("/", get=endpoint)])
+    with pytest.raises(
+        RuntimeError, match="Caught handled exception, but response already started"
+    ):
+        TestClient(app).get("/")
+
+
+class FailingResponse(Response):
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        raise HTTPException(status_code=409)
+
+
+@pytest.mark.parametrize(
+    "response,status_code",
+    [
+        (FileResponse("/this/file/does/not/exist"), 404),
+        (FailingResponse(), 409),
+    ],
+)
+def test_handled_exception_in_response_before_it_started(
+    response: Response, status_code: int
+) -> None:
+    async def not_found(request: Request, exc: RuntimeError) -> Response:
+        return Response(status_code=404)
+
+    async def endpoint() -> Response:
+        return response
+
+    app = App(
+        [Path("/", get=endpoint)],
+        exception_handlers=[ExcHandler(RuntimeError, not_found)],
+    )
+    assert TestClient(app).get("/").status_code == status_code
+
+
+async def _stream_then_fail(request: Request) -> StreamingResponse:
+    async def chunks() -> AsyncIterator[bytes]:
+        yield b"a"
+        raise HTTPException(status_code=400)
+
+    return StreamingResponse(chunks())
+
+
+def test_handled_exception_after_response_started_in_starlette_route() -> None:
+    app = App([Route("/", _stream_then_fail)])
+    with pytest.raises(
+        RuntimeError, match="Caught handled exception, but response already started"
+    ):
+        TestClient(app).get("/")
+
+
+def test_exception_middleware_outside_of_app() -> None:
+    async def handler(request: Request, exc: Exception) -> Response:
+        return JSONResponse("handled", status_code=418)
+
+    async def endpoint(request: Request) -> Response:
+        raise ValueError
+
+    router = StarletteRouter(
+        [Route("/", endpoint), Route("/stream", _stream_then_fail)]
+    )
+    app = ExceptionMiddleware(router, handlers={ValueError: handler})  # type: ignore[arg-type]
+    client = TestClient(app)
+    response = client.get("/")
+    assert response.status_code == 418, response.content
+    with pytest.raises(
+        RuntimeError, match="Caught handled exception, but response already started"
+    ):
+        client.get("/stream")
@@ -0,0 +1,138 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
+
+import pytest
+
+from xpresso import App, Depends, Operation, Path, WebSocket, WebSocketRoute
+from xpresso.instrumentation import (
+    DependencyExecution,
+    DependencyLatencyCollector,
+    LatencyHistogram,
+    get_dependency_name,
+)
+from xpresso.testclient import TestClient
+from xpresso.typing import Annotated
+
+
+def dep() -> int:
+    return 1
+
+
+def other_dep(v: Annotated[int, Depends(dep)]) -> int:
+    return v
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_http_dependency_hooks(concurrent: bool) -> None:
+    executions: List[DependencyExecution] = []
+
+    async def endpoint(
+        v1: Annotated[int, Depends(dep)], v2: Annotated[int, Depends(other_dep)]
+    ) -> None:
+        ...
+
+    app = App(
+        [
+            Path(
+                "/",
+                get=Operation(endpoint, execute_dependencies_concurrently=concurrent),
+            )
+        ],
+        dependency_hooks=[executions.append],
+    )
+
+    with TestClient(app) as client:
+        resp = client.get("/")
+    assert resp.status_code == 200, resp.content
+
+    executions = [e for e in executions if e.route == "GET /"]
+    names = [get_dependency_name(e.dependent) for e in executions]
+    # dep is de-duplicated in the DAG so it only gets executed once
+    assert sorted(names) == ["dep", "endpoint", "other_dep"]
+    assert all(e.duration >= 0 for e in executions)
+    assert not any(e.cache_hit for e in executions)
+
+
+def test_cache_hits_are_reported() -> None:
+    executions: List[DependencyExecution] = []
+
+    async def endpoint(v: Annotated[int, Depends(dep, scope="app")]) -> None:
+        ...
+
+    app = App([Path("/", get=endpoint)], dependency_hooks=[executions.append])
+
+    with TestClient(app) as client:
+        client.get("/")
+        executions.clear()
+        client.get("/")
+
+    (dep_execution,) = [e for e in executions if e.dependent.call is dep]
+    assert dep_execution.cache_hit
+    assert dep_execution.scope == "app"
+
+
+def test_lifespan_and_websocket_hooks() -> None:
+    executions: List[DependencyExecution] = []
+
+    @asynccontextmanager
+    async def lifespan() -> AsyncIterator[None]:
+        yield
+
+    async def websocket_endpoint(
+        ws: WebSocket, v: Annotated[int, Depends(dep)]
+    ) -> None:
+        await ws.accept()
+        await ws.close()
+
+    app = App(
+        [WebSocketRoute("/ws", websocket_endpoint)],
+        lifespan=lifespan,
+        dependency_hooks=[executions.append],
+    )
+
+    with TestClient(app) as client:
+        assert any(e.route is None for e in executions)
+        executions.clear()
+        with client.websocket_connect("/ws"):
+            pass
+
+    assert {get_dependency_name(e.dependent) for e in executions} >= {
+        "dep",
+        "websocket_endpoint",
+    }
+    assert all(e.route == "/ws" for e in executions)
+
+
+def test_latency_collector() -> None:
+    collector = DependencyLatencyCollector()
+
+    async def endpoint(v: Annotated[int, Depends(dep)]) -> None:
+        ...
+
+    app = App([Path("/items", get=endpoint)], dependency_hooks=[collector])
+
+    with TestClient(app) as client:
+        for _ in range(3):
+            client.get("/items")
+
+    histogram = collector.histograms[("GET /items", "dep")]
+    assert histogram.count == 3
+    assert sum(histogram.bucket_counts) == 3
+
+    collector.reset()
+    assert collector.histograms == {}
+
+
+def test_latency_histogram_quantile() -> None:
+    histogram = LatencyHistogram(buckets=(0.1, 1))
+    assert histogram.quantile(0.5) == 0.0
+    histogram.observe(0.05)
+    histogram.observe(0.5, cache_hit=True)
+    histogram.observe(5)
+    assert histogram.bucket_counts == [1, 1, 1]
+    assert histogram.cache_hits == 1
+    assert histogram.quantile(0.3) == 0.1
+    assert histogram.quantile(0.5) == 1
+    assert histogram.quantile(1) == float("inf")
+    with pytest.raises(ValueError):
+        histogram.quantile(2)
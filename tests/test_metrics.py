@@ -0,0 +1,235 @@
+from typing import AsyncIterator, Iterator, Optional
+
+import pytest
+from di import ScopeState
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from xpresso import App, Depends, FromHeader, FromPath, HTTPException, Json, Path
+from xpresso._utils.asgi import XpressoHTTPExtension
+from xpresso.metrics import Counter, Histogram, MetricsRegistry
+from xpresso.testclient import TestClient
+from xpresso.typing import Annotated
+
+
+def check_token(x_token: FromHeader[Optional[str]] = None) -> None:
+    if x_token != "secret":
+        raise HTTPException(status_code=403)
+
+
+async def get_item(item_id: FromPath[int]) -> str:
+    if item_id == 0:
+        raise HTTPException(status_code=404)
+    return "x" * 1000
+
+
+async def create_item(item: Annotated[str, Json()]) -> None:
+    ...
+
+
+async def error() -> None:
+    raise ValueError
+
+
+def test_request_metrics() -> None:
+    metrics = MetricsRegistry()
+    app = App(
+        [
+            Path("/items/{item_id}", get=get_item),
+            Path("/items", post=create_item),
+            Path("/error", get=error),
+        ],
+        metrics=metrics,
+    )
+
+    with TestClient(app, raise_server_exceptions=False) as client:
+        assert client.get("/items/1").status_code == 200
+        assert client.get("/items/2").status_code == 200
+        assert client.get("/items/0").status_code == 404
+        assert client.post("/items", json="y" * 200).status_code == 200
+        assert client.get("/error").status_code == 500
+        assert client.get("/missing").status_code == 404
+
+    assert metrics.requests.values == {
+        ("GET /items/{item_id}", "200"): 2,
+        ("GET /items/{item_id}", "404"): 1,
+        ("POST /items", "200"): 1,
+        ("GET /error", "500"): 1,
+        ("<no route>", "404"): 1,
+    }
+    assert metrics.request_duration.values[("GET /items/{item_id}",)].count == 3
+    # the JSON encoded string is 1002 bytes long
+    assert metrics.response_size.values[("GET /items/{item_id}",)].total > 2000
+    assert metrics.request_size.values[("POST /items",)].total == 202
+    assert metrics.request_size.values[("GET /items/{item_id}",)].total == 0
+
+
+def test_render() -> None:
+    metrics = MetricsRegistry()
+    counter = metrics.counter("jobs_total", "Jobs.", ("queue",))
+    histogram = metrics.histogram(
+        "job_duration_seconds", "Job durations.", buckets=[0.1, 1.0]
+    )
+    counter.inc('with "quotes"\n')
+    counter.inc("default", amount=2.5)
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    text = metrics.render()
+
+    assert text.endswith("\n")
+    assert (
+        "# HELP jobs_total Jobs.\n"
+        "# TYPE jobs_total counter\n"
+        'jobs_total{queue="with \\"quotes\\"\\n"} 1\n'
+        'jobs_total{queue="default"} 2.5\n'
+    ) in text
+    assert (
+        "# HELP job_duration_seconds Job durations.\n"
+        "# TYPE job_duration_seconds histogram\n"
+        'job_duration_seconds_bucket{le="0.1"} 1\n'
+        'job_duration_seconds_bucket{le="1"} 2\n'
+        'job_duration_seconds_bucket{le="+Inf"} 3\n'
+        "job_duration_seconds_sum 5.55\n"
+        "job_duration_seconds_count 3\n"
+    ) in text
+
+
+def test_metric_validation() -> None:
+    metrics = MetricsRegistry()
+    with pytest.raises(ValueError, match="already registered"):
+        metrics.counter("xpresso_http_requests_total", "Again.")
+    with pytest.raises(ValueError, match="Expected labels"):
+        Counter("c", "C.", ("a",)).inc()
+    with pytest.raises(ValueError, match="Expected labels"):
+        Histogram("h", "H.", ("a",)).observe(1, "a", "b")
+
+
+def test_metrics_route() -> None:
+    with pytest.raises(ValueError, match="must be protected"):
+        MetricsRegistry(path="/metrics")
+    metrics = MetricsRegistry(path="/metrics", dependencies=[Depends(check_token)])
+    app = App([Path("/items/{item_id}", get=get_item)], metrics=metrics)
+
+    with TestClient(app) as client:
+        assert client.get("/items/1").status_code == 200
+        assert client.get("/metrics").status_code == 403
+        resp = client.get("/metrics", headers={"x-token": "secret"})
+
+    assert resp.status_code == 200, resp.content
+    assert resp.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    assert (
+        'xpresso_http_requests_total{route="GET /items/{item_id}",status="200"} 1'
+        in resp.text.splitlines()
+    )
+    assert "/metrics" not in app.get_openapi(servers=[]).paths
+
+
+def test_sizes_that_are_not_known_upfront() -> None:
+    async def stream() -> StreamingResponse:
+        async def chunks() -> AsyncIterator[bytes]:
+            yield b"abc"
+
+        return StreamingResponse(chunks())
+
+    async def upload(request: Request) -> int:
+        return len(await request.body())
+
+    async def starlette_endpoint(request: Request) -> Response:
+        return Response(status_code=201)
+
+    metrics = MetricsRegistry()
+    app = App(
+        [
+            Path("/stream", get=stream),
+            Path("/upload", post=upload),
+            Route("/starlette", starlette_endpoint),
+        ],
+        metrics=metrics,
+    )
+
+    def chunked_body() -> Iterator[bytes]:
+        yield b"ab"
+        yield b"cd"
+
+    with TestClient(app) as client:
+        assert client.get("/stream").content == b"abc"
+        resp = client.post("/upload", content=chunked_body())
+        assert resp.json() == 4
+        assert client.get("/starlette").status_code == 201
+
+    assert metrics.requests.values == {
+        ("GET /stream", "200"): 1,
+        ("POST /upload", "200"): 1,
+        ("<no route>", "201"): 1,
+    }
+    assert ("GET /stream",) not in metrics.response_size.values
+    assert ("POST /upload",) not in metrics.request_size.values
+    assert metrics.response_size.values[("POST /upload",)].total == 1
+
+
+def test_responses_sent_by_middleware() -> None:
+    class Forbidden:
+        def __init__(self, app: ASGIApp) -> None:
+            self.app = app
+
+        async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+            if scope["type"] == "http" and scope["path"] == "/forbidden":
+                await Response(status_code=403)(scope, receive, send)
+                return
+            await self.app(scope, receive, send)
+
+    metrics = MetricsRegistry()
+    app = App(
+        [Path("/items/{item_id}", get=get_item)],
+        middleware=[
+            Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"]),
+            Middleware(Forbidden),
+        ],
+        metrics=metrics,
+    )
+
+    with TestClient(app) as client:
+        preflight = client.options(
+            "/items/1",
+            headers={
+                "Origin": "https://example.com",
+                "Access-Control-Request-Method": "GET",
+            },
+        )
+        assert preflight.status_code == 200, preflight.content
+        assert client.get("/forbidden").status_code == 403
+
+    assert metrics.requests.values == {
+        ("<no route>", "200"): 1,
+        ("<no route>", "403"): 1,
+    }
+    assert metrics.response_size.values[("<no route>",)].count == 2
+
+
+@pytest.mark.anyio
+async def test_request_without_a_response() -> None:
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        raise ValueError
+
+    metrics = MetricsRegistry()
+    scope: Scope = {
+        "type": "http",
+        "headers": [],
+        "extensions": {"xpresso": XpressoHTTPExtension(di_state=ScopeState())},
+    }
+
+    async def send(message: Message) -> None:
+        raise AssertionError("should not be called")  # pragma: no cover
+
+    with pytest.raises(ValueError):
+        await metrics.record_request(app, scope, receive=None, send=send)  # type: ignore[arg-type]
+
+    # the server sends the response, so we don't know its status
+    assert metrics.requests.values == {}
+    assert metrics.request_duration.values[("<no route>",)].count == 1
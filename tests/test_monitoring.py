@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+from typing import Dict, List
+
+import anyio
+import httpx
+import pytest
+
+from xpresso import App, Depends, HTTPException, Path
+from xpresso.monitoring import EventLoopMonitor
+from xpresso.testclient import TestClient
+from xpresso.typing import Annotated
+
+
+def blocking_dependency() -> None:
+    time.sleep(0.3)
+
+
+async def blocking_endpoint(_: Annotated[None, Depends(blocking_dependency)]) -> None:
+    ...
+
+
+def test_lag_spike_is_attributed(caplog: pytest.LogCaptureFixture) -> None:
+    monitor = EventLoopMonitor(interval=0.01, lag_threshold=0.05)
+    app = App([Path("/blocking", get=blocking_endpoint)], event_loop_monitor=monitor)
+
+    with caplog.at_level(logging.WARNING, logger="xpresso.monitoring"):
+        with TestClient(app) as client:
+            # let the monitor get going
+            time.sleep(0.05)
+            assert client.get("/blocking").status_code == 200
+            # and record the spike
+            time.sleep(0.05)
+
+    assert monitor.spikes >= 1
+    assert monitor.max_lag >= 0.2
+    assert monitor.lag_histogram.count > 0
+    messages = [r.getMessage() for r in caplog.records]
+    assert any(
+        "route GET /blocking" in message
+        and "(dependency: blocking_dependency)" in message
+        for message in messages
+    ), messages
+
+
+@pytest.mark.anyio
+async def test_in_flight() -> None:
+    monitor = EventLoopMonitor()
+    entered = anyio.Event()
+    release = anyio.Event()
+
+    async def slow() -> None:
+        entered.set()
+        await release.wait()
+
+    async def fails() -> None:
+        raise HTTPException(status_code=418)
+
+    app = App(
+        [Path("/slow", get=slow), Path("/fails", get=fails)],
+        event_loop_monitor=monitor,
+    )
+    counts: Dict[str, int] = {}
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+
+        async def request() -> None:
+            assert (await client.get("/slow")).status_code == 200
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(request)
+            await entered.wait()
+            counts = dict(monitor.in_flight)
+            release.set()
+
+        assert (await client.get("/fails")).status_code == 418
+
+    assert counts == {"GET /slow": 1, "GET /fails": 0}
+    assert monitor.in_flight == {"GET /slow": 0, "GET /fails": 0}
+
+
+def test_invalid_interval() -> None:
+    with pytest.raises(ValueError):
+        EventLoopMonitor(interval=0)
+
+
+@pytest.mark.anyio
+async def test_watchdog_stops() -> None:
+    monitor = EventLoopMonitor(interval=0.5, lag_threshold=0.5)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(monitor.run)
+        await anyio.sleep(0.01)
+        assert _watchdog_threads()
+        tg.cancel_scope.cancel()
+
+    assert not _watchdog_threads()
+
+
+def _watchdog_threads() -> List[threading.Thread]:
+    return [
+        thread
+        for thread in threading.enumerate()
+        if thread.name == "xpresso-event-loop-monitor"
+    ]
@@ -0,0 +1,142 @@
+from typing import Any, List
+
+import pytest
+
+from tests.test_openapi.model_name_conflict_resolution.user1 import User as User1
+from tests.test_openapi.model_name_conflict_resolution.user2 import User as User2
+from xpresso import App, Depends, FromJson, FromQuery, Operation, Path
+from xpresso.openapi import _builder
+from xpresso.openapi.models import PathItem
+from xpresso.testclient import TestClient
+from xpresso.typing import Annotated
+
+
+@pytest.fixture
+def generated(monkeypatch: pytest.MonkeyPatch) -> List[Operation]:
+    calls: List[Operation] = []
+    get_operation = _builder.get_operation
+
+    def wrapped(route: Operation, *args: Any, **kwargs: Any) -> Any:
+        calls.append(route)
+        return get_operation(route, *args, **kwargs)
+
+    monkeypatch.setattr(_builder, "get_operation", wrapped)
+    return calls
+
+
+def test_operations_are_not_regenerated(generated: List[Operation]) -> None:
+    async def endpoint(q: FromQuery[int]) -> None:
+        ...
+
+    operation = Operation(endpoint)
+    app = App([Path("/", get=operation)])
+
+    with TestClient(app):
+        first = app.get_openapi(servers=[])
+        assert generated == [operation]
+        second = app.get_openapi(servers=[])
+        assert generated == [operation]
+
+    assert first == second
+
+
+def test_adding_a_route(generated: List[Operation]) -> None:
+    async def endpoint(q: FromQuery[int]) -> None:
+        ...
+
+    operation1 = Operation(endpoint)
+    operation2 = Operation(endpoint)
+    app = App([Path("/1", get=operation1)])
+
+    with TestClient(app):
+        app.get_openapi(servers=[])
+        assert generated == [operation1]
+        routes = app.router.routes
+        assert isinstance(routes, list)
+        routes.append(Path("/2", get=operation2))
+        operation2.prepare(app.container, [])
+        openapi = app.get_openapi(servers=[])
+        assert generated == [operation1, operation2]
+
+    assert set(openapi.paths) == {"/1", "/2"}
+    path1, path2 = openapi.paths["/1"], openapi.paths["/2"]
+    assert isinstance(path1, PathItem) and isinstance(path2, PathItem)
+    assert path1.get is not None
+    assert path1.get == path2.get
+
+
+def test_model_name_changes_are_picked_up(generated: List[Operation]) -> None:
+    async def endpoint1(body: FromJson[User1]) -> None:
+        ...
+
+    async def endpoint2(body: FromJson[User2]) -> None:
+        ...
+
+    operation1 = Operation(endpoint1)
+    operation2 = Operation(endpoint2)
+    app = App([Path("/1", post=operation1)])
+
+    with TestClient(app):
+        openapi = app.get_openapi(servers=[])
+        assert openapi.components is not None
+        assert openapi.components.schemas is not None
+        assert set(openapi.components.schemas) == {
+            "User",
+            "ValidationError",
+            "HTTPValidationError",
+        }
+        routes = app.router.routes
+        assert isinstance(routes, list)
+        routes.append(Path("/2", post=operation2))
+        operation2.prepare(app.container, [])
+        openapi = app.get_openapi(servers=[])
+
+    # adding User2 forces User1 to get a fully qualified name
+    # so the first operation had to be re-generated
+    assert generated == [operation1, operation1, operation2]
+    assert openapi.components is not None
+    assert openapi.components.schemas is not None
+    assert "User" not in openapi.components.schemas
+    assert len([name for name in openapi.components.schemas if "User" in name]) == 2
+
+
+def test_lifespan_restart_keeps_fragments(generated: List[Operation]) -> None:
+    async def endpoint(q: FromQuery[int]) -> None:
+        ...
+
+    operation = Operation(endpoint)
+    app = App([Path("/", get=operation)])
+
+    with TestClient(app):
+        first = app.get_openapi(servers=[])
+    with TestClient(app):
+        second = app.get_openapi(servers=[])
+
+    assert generated == [operation]
+    assert first == second
+
+
+def test_dependency_overrides(generated: List[Operation]) -> None:
+    async def get_q(q: FromQuery[int]) -> int:
+        return q
+
+    async def get_p(p: FromQuery[int]) -> int:
+        return p
+
+    async def endpoint(v: Annotated[int, Depends(get_q)]) -> None:
+        ...
+
+    operation = Operation(endpoint)
+    app = App([Path("/", get=operation)])
+
+    with TestClient(app):
+        app.get_openapi(servers=[])
+    with app.dependency_overrides as overrides:
+        overrides[get_q] = get_p
+        with TestClient(app):
+            openapi = app.get_openapi(servers=[])
+
+    assert generated == [operation, operation]
+    path = openapi.paths["/"]
+    assert isinstance(path, PathItem) and path.get is not None
+    assert [param.name for param in path.get.parameters or []] == ["p"]  # type: ignore[union-attr]
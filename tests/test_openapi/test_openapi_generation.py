@@ -0,0 +1,135 @@
+import threading
+import time
+from typing import Any, List
+
+import pytest
+from pydantic import BaseModel
+
+from xpresso import App, FromJson, Path, Router
+from xpresso.openapi import _builder
+from xpresso.openapi import models as openapi_models
+from xpresso.openapi._builder import generate_openapi
+from xpresso.routing.mount import Mount
+from xpresso.testclient import TestClient
+
+
+async def endpoint() -> None:
+    ...
+
+
+class Item(BaseModel):
+    name: str
+
+
+@pytest.fixture
+def generations(monkeypatch: pytest.MonkeyPatch) -> List[int]:
+    calls: List[int] = []
+
+    def wrapped(*args: Any, **kwargs: Any) -> Any:
+        calls.append(1)
+        return generate_openapi(*args, **kwargs)
+
+    monkeypatch.setattr("xpresso.applications.generate_openapi", wrapped)
+    return calls
+
+
+def test_lazy(generations: List[int]) -> None:
+    app = App([Path("/", get=endpoint)])
+
+    with TestClient(app) as client:
+        assert generations == []
+        assert client.get("/openapi.json").status_code == 200
+        assert client.get("/openapi.json").status_code == 200
+        assert generations == [1]
+
+
+def test_startup(generations: List[int]) -> None:
+    app = App([Path("/", get=endpoint)], openapi_generation="startup")
+
+    with TestClient(app) as client:
+        assert generations == [1]
+        resp = client.get("/openapi.json")
+        assert resp.status_code == 200, resp.content
+        assert resp.json()["paths"].keys() == {"/"}
+        assert generations == [1]
+
+
+def test_background(monkeypatch: pytest.MonkeyPatch) -> None:
+    release = threading.Event()
+
+    def blocking_generate_openapi(*args: Any, **kwargs: Any) -> Any:
+        release.wait()
+        return generate_openapi(*args, **kwargs)
+
+    monkeypatch.setattr(
+        "xpresso.applications.generate_openapi", blocking_generate_openapi
+    )
+
+    app = App([Path("/", get=endpoint)], openapi_generation="background")
+
+    with TestClient(app) as client:
+        resp = client.get("/openapi.json")
+        assert resp.status_code == 503, resp.content
+        assert resp.headers["retry-after"] == "1"
+        # other routes are not blocked while the document is generated
+        assert client.get("/").status_code == 200
+        release.set()
+        deadline = time.monotonic() + 5
+        while resp.status_code == 503 and time.monotonic() < deadline:
+            time.sleep(0.01)
+            resp = client.get("/openapi.json")
+        assert resp.status_code == 200, resp.content
+        assert resp.json()["paths"].keys() == {"/"}
+
+
+def test_background_failure(monkeypatch: pytest.MonkeyPatch) -> None:
+    def broken_generate_openapi(*args: Any, **kwargs: Any) -> Any:
+        raise ValueError
+
+    monkeypatch.setattr(
+        "xpresso.applications.generate_openapi", broken_generate_openapi
+    )
+
+    app = App([Path("/", get=endpoint)], openapi_generation="background")
+
+    with TestClient(app, raise_server_exceptions=False) as client:
+        deadline = time.monotonic() + 5
+        resp = client.get("/openapi.json")
+        while resp.status_code == 503 and time.monotonic() < deadline:
+            time.sleep(0.01)
+            resp = client.get("/openapi.json")
+        # falls back to generating the document in the request
+        assert resp.status_code == 500
+
+
+def test_generation_while_generating(monkeypatch: pytest.MonkeyPatch) -> None:
+    # the background build runs in a thread while requests for
+    # other root_paths can generate documents on the event loop,
+    # so a generation can see the caches while another one is filling them
+    async def create_item(item: FromJson[Item]) -> None:
+        ...
+
+    router = Router([Path("/", post=create_item)])
+    app = App([Mount("", app=router)])
+    nested: List[openapi_models.OpenAPI] = []
+    calls: List[int] = []
+    original_get_operation = _builder.get_operation
+
+    def get_operation(*args: Any, **kwargs: Any) -> Any:
+        if not calls:
+            calls.append(1)
+            nested.append(app.get_openapi(servers=[]))
+        return original_get_operation(*args, **kwargs)
+
+    with TestClient(app):
+        app.get_openapi(servers=[])
+        # invalidate the cached fragments
+        router.tags = ["items"]
+        monkeypatch.setattr("xpresso.openapi._builder.get_operation", get_operation)
+        openapi = app.get_openapi(servers=[])
+
+    assert openapi.components is not None and openapi.components.schemas is not None
+    assert "Item" in openapi.components.schemas
+    components = nested[0].components
+    assert components is not None and components.schemas is not None
+    assert "Item" in components.schemas
@@ -0,0 +1,64 @@
+from xpresso import App, Path
+from xpresso.testclient import TestClient
+
+
+async def endpoint() -> None:
+    ...
+
+
+def test_gzip() -> None:
+    client = TestClient(App([Path("/", get=endpoint)]))
+
+    resp = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200, resp.content
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["vary"] == "Accept-Encoding"
+    # the client decompresses the content for us
+    assert resp.json()["paths"].keys() == {"/"}
+
+    resp = client.get("/openapi.json", headers={"Accept-Encoding": "identity"})
+    assert resp.status_code == 200, resp.content
+    assert "content-encoding" not in resp.headers
+    assert resp.json()["paths"].keys() == {"/"}
+
+    resp = client.get("/openapi.json", headers={"Accept-Encoding": "gzip;q=0, *"})
+    assert "content-encoding" not in resp.headers
+
+
+def test_etag() -> None:
+    client = TestClient(App([Path("/", get=endpoint)]))
+
+    resp = client.get("/openapi.json", headers={"Accept-Encoding": "identity"})
+    etag = resp.headers["etag"]
+    resp = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    gzip_etag = resp.headers["etag"]
+    # strong ETags are different for each encoding
+    assert etag != gzip_etag
+    assert etag.startswith('"')
+
+    for tag in (etag, gzip_etag, f"W/{etag}", f'"other", {etag}', "*"):
+        resp = client.get(
+            "/openapi.json",
+            headers={"Accept-Encoding": "identity", "If-None-Match": tag},
+        )
+        assert resp.status_code == 304, tag
+        assert resp.content == b""
+        assert resp.headers["etag"] == etag
+
+    resp = client.get("/openapi.json", headers={"If-None-Match": '"other"'})
+    assert resp.status_code == 200, resp.content
+
+
+def test_cache_is_keyed_by_root_path() -> None:
+    app = App([Path("/", get=endpoint)])
+
+    resp = TestClient(app, root_path="/v1").get("/openapi.json")
+    assert resp.json()["servers"] == [{"url": "/v1"}]
+    etag = resp.headers["etag"]
+
+    resp = TestClient(app, root_path="/v2").get("/openapi.json")
+    assert resp.json()["servers"] == [{"url": "/v2"}]
+    assert resp.headers["etag"] != etag
+
+    resp = TestClient(app).get("/openapi.json")
+    assert "servers" not in resp.json()
@@ -0,0 +1,117 @@
+import contextlib
+from enum import Enum
+from typing import Any, Iterator, List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from xpresso import App, FromJson, FromQuery, Operation, Path
+from xpresso.openapi import _builder
+from xpresso.testclient import TestClient
+
+
+class Color(Enum):
+    red = "red"
+    blue = "blue"
+
+
+class Tag(BaseModel):
+    name: str
+    color: Color
+
+
+class Node(BaseModel):
+    value: int
+    children: List["Node"] = []
+
+
+Node.update_forward_refs()
+
+
+class Item(BaseModel):
+    name: str
+    tags: List[Tag]
+    tree: Optional[Node] = None
+
+
+class Order(BaseModel):
+    items: List[Item]
+
+
+async def create_item(item: FromJson[Item]) -> Item:
+    raise NotImplementedError
+
+
+async def create_order(order: FromJson[Order], color: FromQuery[Color]) -> Order:
+    raise NotImplementedError
+
+
+async def get_tag(tag: FromJson[Tag]) -> Node:
+    raise NotImplementedError
+
+
+def make_app() -> App:
+    return App(
+        [
+            Path("/items", post=create_item),
+            Path("/orders", post=create_order),
+            Path("/tags", post=get_tag),
+            Path("/orders2", post=Operation(create_order)),
+        ]
+    )
+
+
+def test_memo_does_not_change_the_output(monkeypatch: pytest.MonkeyPatch) -> None:
+    app = make_app()
+    with TestClient(app):
+        memoized = app.get_openapi(servers=[]).dict(exclude_none=True, by_alias=True)
+
+    @contextlib.contextmanager
+    def no_memo() -> Iterator[Any]:
+        yield None
+
+    monkeypatch.setattr(_builder, "schema_memo", no_memo)
+    app = make_app()
+    with TestClient(app):
+        not_memoized = app.get_openapi(servers=[]).dict(
+            exclude_none=True, by_alias=True
+        )
+
+    assert memoized == not_memoized
+    assert set(memoized["components"]["schemas"]) == {
+        "Color",
+        "HTTPValidationError",
+        "Item",
+        "Node",
+        "Order",
+        "Tag",
+        "ValidationError",
+    }
+
+
+def test_operations_include_all_referenced_schemas() -> None:
+    app = App(
+        [
+            Path("/items", post=Operation(create_item, tags=["items"])),
+            Path("/orders", post=Operation(create_order, tags=["orders"])),
+        ],
+        split_openapi_by="tag",
+    )
+    with TestClient(app):
+        # Item and its sub-models get generated for the first operation
+        # and are only referenced by the second one
+        app.get_openapi(servers=[])
+        # the schema fragments of the second operation are re-used here
+        orders = app.get_openapi(servers=[], partition="orders").dict(
+            exclude_none=True, by_alias=True
+        )
+
+    assert set(orders["components"]["schemas"]) == {
+        "Color",
+        "HTTPValidationError",
+        "Item",
+        "Node",
+        "Order",
+        "Tag",
+        "ValidationError",
+    }
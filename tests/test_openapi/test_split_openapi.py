@@ -0,0 +1,133 @@
+from pydantic import BaseModel
+
+from xpresso import App, FromJson, Operation, Path, Router
+from xpresso.routing.mount import Mount
+from xpresso.testclient import TestClient
+
+
+class Item(BaseModel):
+    name: str
+
+
+class User(BaseModel):
+    username: str
+
+
+async def create_item(item: FromJson[Item]) -> None:
+    ...
+
+
+async def create_user(user: FromJson[User]) -> None:
+    ...
+
+
+async def health() -> None:
+    ...
+
+
+def test_split_by_tag() -> None:
+    app = App(
+        [
+            Path("/items", post=Operation(create_item, tags=["items"])),
+            Path(
+                "/users",
+                post=Operation(create_user, tags=["users"]),
+                get=Operation(health, tags=["users", "items"]),
+            ),
+            Path("/health", get=health),
+        ],
+        split_openapi_by="tag",
+    )
+    client = TestClient(app)
+
+    assert app.get_openapi_partitions() == ["default", "items", "users"]
+
+    resp = client.get("/openapi/items.json")
+    assert resp.status_code == 200, resp.content
+    items = resp.json()
+    assert items["paths"].keys() == {"/items", "/users"}
+    assert items["paths"]["/users"].keys() == {"get"}
+    # only the schemas used by the operations in the document
+    assert "Item" in items["components"]["schemas"]
+    assert "User" not in items["components"]["schemas"]
+
+    resp = client.get("/openapi/users.json")
+    assert resp.status_code == 200, resp.content
+    users = resp.json()
+    assert users["paths"].keys() == {"/users"}
+    assert users["paths"]["/users"].keys() == {"get", "post"}
+    assert "User" in users["components"]["schemas"]
+    assert "Item" not in users["components"]["schemas"]
+
+    resp = client.get("/openapi/default.json")
+    assert resp.status_code == 200, resp.content
+    assert resp.json()["paths"].keys() == {"/health"}
+    assert "components" not in resp.json()
+
+    # the full document is still available
+    resp = client.get("/openapi.json")
+    assert resp.status_code == 200, resp.content
+    assert resp.json()["paths"].keys() == {"/items", "/users", "/health"}
+
+    resp = client.get("/openapi/unknown.json")
+    assert resp.status_code == 404, resp.content
+
+
+def test_split_by_router() -> None:
+    app = App(
+        [
+            Mount("/items", app=Router([Path("/", post=create_item)])),
+            Mount(
+                "/users/v1",
+                app=Router(
+                    [
+                        Path("/", post=create_user),
+                        Mount("/nested", app=Router([Path("/", get=health)])),
+                    ]
+                ),
+            ),
+            Path("/health", get=health),
+        ],
+        split_openapi_by="router",
+    )
+    client = TestClient(app)
+
+    assert app.get_openapi_partitions() == ["default", "items", "users-v1"]
+
+    resp = client.get("/openapi/items.json")
+    assert resp.status_code == 200, resp.content
+    assert resp.json()["paths"].keys() == {"/items/"}
+    assert "Item" in resp.json()["components"]["schemas"]
+    assert "User" not in resp.json()["components"]["schemas"]
+
+    resp = client.get("/openapi/users-v1.json")
+    assert resp.status_code == 200, resp.content
+    assert resp.json()["paths"].keys() == {"/users/v1/", "/users/v1/nested/"}
+
+    resp = client.get("/openapi/default.json")
+    assert resp.status_code == 200, resp.content
+    assert resp.json()["paths"].keys() == {"/health"}
+
+
+def test_swagger_ui_selector() -> None:
+    app = App(
+        [Path("/items", post=Operation(create_item, tags=["items"]))],
+        split_openapi_by="tag",
+    )
+    client = TestClient(app, root_path="/api")
+
+    resp = client.get("/docs")
+    assert resp.status_code == 200, resp.content
+    assert (
+        """urls: [{"name": "items", "url": "/api/openapi/items.json"}]""" in resp.text
+    )
+    assert "StandaloneLayout" in resp.text
+
+
+def test_partitions_are_not_served_by_default() -> None:
+    app = App([Path("/items", post=Operation(create_item, tags=["items"]))])
+    client = TestClient(app)
+
+    assert app.get_openapi_partitions() == []
+    assert client.get("/openapi/items.json").status_code == 404
+    assert "urls:" not in client.get("/docs").text
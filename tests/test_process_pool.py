@@ -0,0 +1,137 @@
+import os
+from typing import Generator
+
+import pytest
+from pydantic import BaseModel
+
+from xpresso import App, Depends, FromJson, FromQuery, Operation, Path, Request
+from xpresso.dependencies import TTLCache
+from xpresso.exception_handlers import ExcHandler
+from xpresso.responses import JSONResponse
+from xpresso.testclient import TestClient
+from xpresso.typing import Annotated
+
+# these functions are executed in worker processes
+# so they need to be defined at the module level to be picklable
+
+
+def get_pid() -> int:
+    return os.getpid()
+
+
+def square(n: FromQuery[int]) -> int:
+    return n * n
+
+
+class Payload(BaseModel):
+    values: list
+
+
+def total(payload: FromJson[Payload]) -> int:
+    return sum(payload.values)
+
+
+class TeapotError(Exception):
+    pass
+
+
+def fail() -> None:
+    raise TeapotError("teapot")
+
+
+def test_endpoint_runs_in_process() -> None:
+    app = App(
+        [Path("/", get=Operation(get_pid, run_in_process=True))],
+        process_pool_max_workers=1,
+    )
+
+    with TestClient(app) as client:
+        resp = client.get("/")
+    assert resp.status_code == 200, resp.content
+    assert resp.json() != os.getpid()
+
+
+def test_dependency_runs_in_process() -> None:
+    async def endpoint(
+        pid: Annotated[int, Depends(get_pid, run_in_process=True)]
+    ) -> int:
+        return pid
+
+    app = App([Path("/", get=endpoint)], process_pool_max_workers=1)
+
+    with TestClient(app) as client:
+        resp = client.get("/")
+    assert resp.status_code == 200, resp.content
+    assert resp.json() != os.getpid()
+
+
+def test_arguments_and_validation() -> None:
+    app = App(
+        [
+            Path("/square", get=Operation(square, run_in_process=True)),
+            Path("/total", post=Operation(total, run_in_process=True)),
+        ],
+        process_pool_max_workers=1,
+    )
+
+    with TestClient(app) as client:
+        resp = client.get("/square", params={"n": 3})
+        assert resp.status_code == 200, resp.content
+        assert resp.json() == 9
+        # validation happens in the main process
+        resp = client.get("/square", params={"n": "three"})
+        assert resp.status_code == 422, resp.content
+        resp = client.post("/total", json={"values": [1, 2, 3]})
+        assert resp.status_code == 200, resp.content
+        assert resp.json() == 6
+
+
+def test_exceptions_are_propagated() -> None:
+    def handle_teapot(request: Request, exc: TeapotError) -> JSONResponse:
+        return JSONResponse({"detail": str(exc)}, status_code=418)
+
+    app = App(
+        [Path("/", get=Operation(fail, run_in_process=True))],
+        exception_handlers=[ExcHandler(TeapotError, handle_teapot)],
+        process_pool_max_workers=1,
+    )
+
+    with TestClient(app) as client:
+        resp = client.get("/")
+    assert resp.status_code == 418, resp.content
+    assert resp.json() == {"detail": "teapot"}
+
+
+def test_teardown_is_not_supported() -> None:
+    def dep() -> Generator[None, None, None]:
+        yield
+
+    with pytest.raises(TypeError, match="teardown"):
+        Depends(dep, run_in_process=True)
+
+
+def test_thread_pool_and_run_in_process_are_exclusive() -> None:
+    with pytest.raises(ValueError, match="mutually exclusive"):
+        Depends(get_pid, thread_pool="db", run_in_process=True)
+
+
+@pytest.mark.parametrize("option", ["cache", "single_flight"])
+def test_run_in_process_with_cache_or_single_flight(option: str) -> None:
+    cache = TTLCache(ttl=60)
+    if option == "cache":
+        marker = Depends(square, run_in_process=True, cache=cache)
+    else:
+        marker = Depends(square, run_in_process=True, single_flight=True)
+
+    async def endpoint(value: Annotated[int, marker]) -> int:
+        return value
+
+    app = App([Path("/", get=endpoint)], process_pool_max_workers=1)
+
+    with TestClient(app) as client:
+        for _ in range(2):
+            resp = client.get("/", params={"n": 3})
+            assert resp.status_code == 200, resp.content
+            assert resp.json() == 9
+    if option == "cache":
+        assert len(cache) == 1
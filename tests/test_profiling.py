@@ -0,0 +1,224 @@
+import gc
+import random
+import time
+import tracemalloc
+from typing import List, Optional
+
+import anyio
+import httpx
+import pytest
+
+from xpresso import App, Depends, FromHeader, HTTPException, Operation, Path
+from xpresso.profiling import AllocationTracker, SamplingProfiler, _StackInspector
+from xpresso.routing.operation import _OperationApp
+from xpresso.testclient import TestClient
+from xpresso.typing import Annotated
+
+
+def spin(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def busy_dependency() -> None:
+    spin(0.05)
+
+
+async def endpoint(_: Annotated[None, Depends(busy_dependency)]) -> None:
+    spin(0.05)
+
+
+def check_token(x_token: FromHeader[Optional[str]] = None) -> None:
+    if x_token != "secret":
+        raise HTTPException(status_code=403)
+
+
+@pytest.mark.anyio
+async def test_attribution() -> None:
+    profiler = SamplingProfiler(interval=0.001)
+    app = App([Path("/busy", get=endpoint)])
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        profiler.start()
+        try:
+            for _ in range(3):
+                resp = await client.get("/busy")
+                assert resp.status_code == 200, resp.content
+        finally:
+            profiler.stop()
+
+    assert not profiler.running
+    assert profiler.samples_by_route.get("GET /busy", 0) > 0
+    assert profiler.samples_by_dependency.get(("GET /busy", "busy_dependency"), 0) > 0
+    assert profiler.samples_by_dependency.get(("GET /busy", "endpoint"), 0) > 0
+
+    lines = profiler.collapsed().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any(
+        line.startswith("GET /busy;")
+        and "spin (" in line
+        and "busy_dependency (" in line
+        for line in lines
+    )
+
+    profiler.reset()
+    assert profiler.collapsed() == ""
+    assert profiler.samples_by_route == {}
+
+
+@pytest.mark.anyio
+async def test_profile_route() -> None:
+    profiler = SamplingProfiler(
+        interval=0.001, path="/_profile", dependencies=[Depends(check_token)]
+    )
+    app = App([Path("/busy", get=endpoint)], profiler=profiler)
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        resp = await client.get("/_profile", params={"seconds": 0.01})
+        assert resp.status_code == 403, resp.content
+
+        resp = await client.get(
+            "/_profile", params={"seconds": 1000}, headers={"x-token": "secret"}
+        )
+        assert resp.status_code == 400, resp.content
+
+        profile: Optional[httpx.Response] = None
+
+        async def take_profile() -> None:
+            nonlocal profile
+            profile = await client.get(
+                "/_profile", params={"seconds": 0.3}, headers={"x-token": "secret"}
+            )
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(take_profile)
+            await anyio.sleep(0.01)
+            resp = await client.get(
+                "/_profile", params={"seconds": 0.01}, headers={"x-token": "secret"}
+            )
+            assert resp.status_code == 409, resp.content
+            for _ in range(3):
+                assert (await client.get("/busy")).status_code == 200
+
+    assert profile is not None
+    assert profile.status_code == 200, profile.content
+    assert profile.headers["content-type"].startswith("text/plain")
+    assert any(line.startswith("GET /busy;") for line in profile.text.splitlines())
+    # the route is not documented
+    assert "/_profile" not in app.get_openapi(servers=[]).paths
+
+
+def test_route_must_be_protected() -> None:
+    with pytest.raises(ValueError, match="must be protected"):
+        SamplingProfiler(path="/_profile")
+    # but it can be served without protection if you explicitly ask for it
+    SamplingProfiler(path="/_profile", dependencies=[])
+
+
+def test_no_route_without_path() -> None:
+    routes = [Path("/", get=endpoint)]
+    app = App(routes, profiler=SamplingProfiler())
+    assert len(app.router.routes) == len(App(routes).router.routes)
+
+
+leaked: List[bytes] = []
+
+
+def leaky_dependency() -> None:
+    leaked.append(b"x" * 100_000)
+
+
+async def leaky_endpoint(_: Annotated[None, Depends(leaky_dependency)]) -> None:
+    ...
+
+
+async def clean_endpoint() -> None:
+    _ = [b"x" * 100_000]
+
+
+def test_allocation_tracking() -> None:
+    tracker = AllocationTracker(sample_rate=1.0)
+    app = App(
+        [Path("/leaky", get=leaky_endpoint), Path("/clean", get=clean_endpoint)],
+        allocation_tracker=tracker,
+    )
+    leaked.clear()
+
+    with TestClient(app) as client:
+        for _ in range(3):
+            assert client.get("/leaky").status_code == 200
+            assert client.get("/clean").status_code == 200
+
+    assert not tracemalloc.is_tracing()
+    leaky = tracker.routes["GET /leaky"]
+    assert leaky.requests == 3
+    assert leaky.size >= 3 * 100_000
+    assert leaky.dependencies["leaky_dependency"].size >= 3 * 100_000
+    assert tracker.routes["GET /clean"].size < 100_000
+
+    report = tracker.report(limit=1)
+    assert [r["route"] for r in report["routes"]] == ["GET /leaky", "GET /clean"]
+    assert report["routes"][0]["dependencies"] == [
+        {
+            "dependency": "leaky_dependency",
+            "net_bytes": leaky.dependencies["leaky_dependency"].size,
+            "net_blocks": leaky.dependencies["leaky_dependency"].count,
+        }
+    ]
+    assert report["routes"][0]["locations"][0]["location"].startswith(__file__)
+
+    tracker.reset()
+    assert tracker.report() == {"routes": []}
+
+
+def test_allocation_tracking_sampling(monkeypatch: pytest.MonkeyPatch) -> None:
+    tracker = AllocationTracker(sample_rate=0.5)
+    app = App([Path("/clean", get=clean_endpoint)], allocation_tracker=tracker)
+    rolls = iter([0.9, 0.1, 0.7])
+    monkeypatch.setattr(random, "random", lambda: next(rolls))
+
+    with TestClient(app) as client:
+        for _ in range(3):
+            assert client.get("/clean").status_code == 200
+
+    assert tracker.routes["GET /clean"].requests == 1
+
+
+def test_allocation_tracking_route() -> None:
+    tracker = AllocationTracker(
+        sample_rate=1.0, path="/_allocations", dependencies=[Depends(check_token)]
+    )
+    app = App([Path("/leaky", get=leaky_endpoint)], allocation_tracker=tracker)
+
+    with TestClient(app) as client:
+        assert client.get("/leaky").status_code == 200
+        assert client.get("/_allocations").status_code == 403
+        resp = client.get(
+            "/_allocations", params={"reset": True}, headers={"x-token": "secret"}
+        )
+        assert resp.status_code == 200, resp.content
+        assert [r["route"] for r in resp.json()["routes"]] == ["GET /leaky"]
+        resp = client.get("/_allocations", headers={"x-token": "secret"})
+        assert resp.json() == {"routes": []}
+
+
+def test_dependency_names_are_not_kept_for_old_routes() -> None:
+    inspector = _StackInspector()
+    operation = Operation(endpoint)
+    app = App([Path("/busy", get=operation)])
+
+    for _ in range(3):
+        # every time the App starts up the Operation is prepared again
+        with TestClient(app):
+            operation_app = operation._app
+            assert isinstance(operation_app, _OperationApp)
+            assert (
+                "busy_dependency"
+                in inspector._get_dependency_codes(operation_app).values()
+            )
+            del operation_app
+        gc.collect()
+        assert len(inspector._dependency_codes) <= 1
@@ -0,0 +1,110 @@
+from typing import List
+
+from pydantic import BaseModel
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from xpresso import App, Depends, FromJson, FromQuery, Path
+from xpresso.instrumentation import RequestTimings, get_request_timings
+from xpresso.middleware import Middleware
+from xpresso.middleware.server_timing import ServerTimingMiddleware
+from xpresso.testclient import TestClient
+from xpresso.typing import Annotated
+
+
+class Item(BaseModel):
+    name: str
+
+
+def dep() -> int:
+    return 1
+
+
+async def endpoint(
+    item: FromJson[Item], q: FromQuery[int], v: Annotated[int, Depends(dep)]
+) -> Item:
+    return item
+
+
+def test_request_timings_recorded() -> None:
+    recorded: List[RequestTimings] = []
+
+    class CaptureTimings:
+        def __init__(self, app: ASGIApp) -> None:
+            self.app = app
+
+        async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+            await self.app(scope, receive, send)
+            if scope["type"] == "http":
+                timings = get_request_timings(scope)
+                assert timings is not None
+                recorded.append(timings)
+
+    app = App(
+        [Path("/", post=endpoint)],
+        middleware=[Middleware(CaptureTimings)],
+        record_request_timings=True,
+    )
+
+    with TestClient(app) as client:
+        resp = client.post("/", params={"q": 1}, json={"name": "foo"})
+    assert resp.status_code == 200, resp.content
+
+    (timings,) = recorded
+    durations = timings.durations()
+    assert set(durations) == {
+        "routing",
+        "binding",
+        "body",
+        "dependencies",
+        "endpoint",
+        "encoding",
+        "send",
+    }
+    assert all(duration >= 0 for duration in durations.values())
+    assert all(start >= timings.start for _, start, _ in timings.spans)
+
+
+def test_request_timings_disabled_by_default() -> None:
+    recorded: List[object] = []
+
+    class CaptureTimings:
+        def __init__(self, app: ASGIApp) -> None:
+            self.app = app
+
+        async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+            await self.app(scope, receive, send)
+            if scope["type"] == "http":
+                recorded.append(get_request_timings(scope))
+
+    app = App([Path("/", post=endpoint)], middleware=[Middleware(CaptureTimings)])
+
+    with TestClient(app) as client:
+        client.post("/", params={"q": 1}, json={"name": "foo"})
+
+    assert recorded == [None]
+
+
+def test_server_timing_middleware() -> None:
+    app = App(
+        [Path("/", post=endpoint)], middleware=[Middleware(ServerTimingMiddleware)]
+    )
+
+    with TestClient(app) as client:
+        resp = client.post("/", params={"q": 1}, json={"name": "foo"})
+    assert resp.status_code == 200, resp.content
+
+    metrics = {
+        m.split(";")[0].strip() for m in resp.headers["Server-Timing"].split(",")
+    }
+    assert metrics == {
+        "routing",
+        "binding",
+        "body",
+        "dependencies",
+        "endpoint",
+        "encoding",
+    }
+
+
+def test_get_request_timings_outside_of_xpresso() -> None:
+    assert get_request_timings({"type": "http"}) is None
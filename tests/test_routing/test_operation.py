@@ -1,7 +1,9 @@
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 import pytest
 import starlette.routing
+from starlette.middleware import Middleware
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from xpresso import App, FromJson, FromRawBody, Operation, Path
 from xpresso.routing.operation import NotPreparedError
@@ -98,3 +100,46 @@ def test_include_in_schema() -> None:
     resp = client.get("/openapi.json")
     assert resp.status_code == 200, resp.content
     assert resp.json() == expected_openapi
+
+
+def test_operation_and_path_middleware() -> None:
+    calls: List[str] = []
+
+    class RecordCall:
+        def __init__(self, app: ASGIApp, name: str) -> None:
+            self.app = app
+            self.name = name
+
+        async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+            calls.append(self.name)
+            await self.app(scope, receive, send)
+
+    async def endpoint() -> None:
+        calls.append("endpoint")
+
+    app = App(
+        routes=[
+            Path(
+                "/",
+                get=Operation(
+                    endpoint,
+                    middleware=[
+                        Middleware(RecordCall, name="operation-1"),
+                        Middleware(RecordCall, name="operation-2"),
+                    ],
+                ),
+                post=endpoint,
+                middleware=[Middleware(RecordCall, name="path")],
+            ),
+        ]
+    )
+    client = TestClient(app)
+
+    resp = client.get("/")
+    assert resp.status_code == 200, resp.content
+    assert calls == ["path", "operation-1", "operation-2", "endpoint"]
+
+    calls.clear()
+    resp = client.post("/")
+    assert resp.status_code == 200, resp.content
+    assert calls == ["path", "endpoint"]
@@ -0,0 +1,277 @@
+import threading
+import time
+from typing import AsyncIterator, Generator, List
+
+import anyio
+import httpx
+import pytest
+
+from xpresso import App, Depends, FromQuery, Operation, Path
+from xpresso.dependencies import TTLCache
+from xpresso.testclient import TestClient
+from xpresso.threadpool import ThreadPool
+from xpresso.typing import Annotated
+
+
+@pytest.mark.anyio
+async def test_pool_limits_concurrency() -> None:
+    pool = ThreadPool("db", max_workers=2)
+    active: List[int] = []
+    max_active = 0
+    lock = threading.Lock()
+
+    def work() -> None:
+        nonlocal max_active
+        with lock:
+            active.append(1)
+            max_active = max(max_active, len(active))
+        time.sleep(0.01)
+        with lock:
+            active.pop()
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(6):
+            tg.start_soon(pool.run_sync, work)
+
+    assert max_active == 2
+    stats = pool.statistics()
+    assert stats.name == "db"
+    assert stats.max_workers == 2
+    assert stats.busy == 0
+    assert stats.waiting == 0
+    assert stats.completed == 6
+    assert stats.max_wait_time > 0
+    assert stats.total_wait_time >= stats.max_wait_time
+
+
+def test_invalid_max_workers() -> None:
+    with pytest.raises(ValueError, match="max_workers"):
+        ThreadPool("db", max_workers=0)
+
+
+def test_dependency_runs_in_pool() -> None:
+    pool = ThreadPool("db", max_workers=1)
+    main_thread = threading.get_ident()
+
+    def get_thread() -> int:
+        return threading.get_ident()
+
+    async def endpoint(
+        thread: Annotated[int, Depends(get_thread, thread_pool="db")]
+    ) -> bool:
+        return thread != main_thread
+
+    app = App([Path("/", get=endpoint)], thread_pools=[pool])
+
+    with TestClient(app) as client:
+        resp = client.get("/")
+    assert resp.status_code == 200, resp.content
+    assert resp.json() is True
+    assert pool.statistics().completed == 1
+
+
+def test_generator_dependency_runs_in_pool() -> None:
+    pool = ThreadPool("db", max_workers=1)
+    threads: List[int] = []
+
+    def get_value() -> Generator[int, None, None]:
+        threads.append(threading.get_ident())
+        yield 1
+        threads.append(threading.get_ident())
+
+    async def endpoint(v: Annotated[int, Depends(get_value, thread_pool="db")]) -> int:
+        return v
+
+    app = App([Path("/", get=endpoint)], thread_pools=[pool])
+
+    with TestClient(app) as client:
+        resp = client.get("/")
+    assert resp.status_code == 200, resp.content
+    assert resp.json() == 1
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
+
+
+def test_operation_thread_pool() -> None:
+    pool = ThreadPool("blocking", max_workers=1)
+
+    def endpoint() -> bool:
+        return threading.current_thread() is not threading.main_thread()
+
+    app = App(
+        [Path("/", get=Operation(endpoint, thread_pool="blocking"))],
+        thread_pools=[pool],
+    )
+
+    with TestClient(app) as client:
+        resp = client.get("/")
+    assert resp.status_code == 200, resp.content
+    assert resp.json() is True
+    assert pool.statistics().completed == 1
+
+
+def test_unknown_thread_pool() -> None:
+    def dep() -> None:
+        ...
+
+    async def endpoint(v: Annotated[None, Depends(dep, thread_pool="db")]) -> None:
+        ...
+
+    app = App([Path("/", get=endpoint)])
+
+    with pytest.raises(ValueError, match='Unknown thread pool "db"'):
+        with TestClient(app):
+            pass
+
+
+def test_duplicate_thread_pool_names() -> None:
+    with pytest.raises(ValueError, match="Duplicate"):
+        App(thread_pools=[ThreadPool("db", 1), ThreadPool("db", 2)])
+
+
+def test_dependency_override() -> None:
+    pool = ThreadPool("db", max_workers=1)
+
+    def dep() -> int:
+        return 1
+
+    async def endpoint(v: Annotated[int, Depends(dep, thread_pool="db")]) -> int:
+        return v
+
+    app = App([Path("/", get=endpoint)], thread_pools=[pool])
+
+    with app.dependency_overrides as overrides:
+        overrides[dep] = lambda: 2
+        with TestClient(app) as client:
+            assert client.get("/").json() == 2
+
+
+@pytest.mark.anyio
+async def test_statistics_while_waiting() -> None:
+    pool = ThreadPool("db", max_workers=1)
+    release = threading.Event()
+
+    def block() -> None:
+        release.wait()
+
+    async def endpoint(v: Annotated[None, Depends(block, thread_pool="db")]) -> None:
+        ...
+
+    app = App([Path("/", get=endpoint)], thread_pools=[pool])
+
+    async with httpx.AsyncClient(app=app, base_url="http://example.com") as client:
+        async with anyio.create_task_group() as tg:
+            for _ in range(3):
+                tg.start_soon(client.get, "/")
+            with anyio.fail_after(5):
+                while pool.statistics().waiting != 2:
+                    await anyio.sleep(0.001)
+            stats = pool.statistics()
+            assert stats.busy == 1
+            release.set()
+
+    assert pool.statistics().completed == 3
+
+
+def test_async_callables_are_rejected() -> None:
+    async def dep() -> None:
+        ...
+
+    async def gen_dep() -> AsyncIterator[None]:
+        yield
+
+    with pytest.raises(TypeError, match="sync callables"):
+        Depends(dep, thread_pool="db")
+    with pytest.raises(TypeError, match="sync callables"):
+        Depends(gen_dep, thread_pool="db")
+    app = App(
+        [Path("/", get=Operation(dep, thread_pool="db"))],
+        thread_pools=[ThreadPool("db", max_workers=1)],
+    )
+    with pytest.raises(TypeError, match="sync callables"):
+        with TestClient(app):
+            pass
+
+
+def test_apps_use_their_own_pools() -> None:
+    pool1 = ThreadPool("db", max_workers=1)
+    pool2 = ThreadPool("db", max_workers=1)
+
+    def dep() -> int:
+        return 1
+
+    async def endpoint(v: Annotated[int, Depends(dep, thread_pool="db")]) -> int:
+        return v
+
+    app1 = App([Path("/", get=endpoint)], thread_pools=[pool1])
+    app2 = App([Path("/", get=endpoint)], thread_pools=[pool2])
+
+    with TestClient(app1) as client1, TestClient(app2) as client2:
+        assert client1.get("/").json() == 1
+        assert client2.get("/").json() == 1
+        assert client1.get("/").json() == 1
+
+    assert pool1.statistics().completed == 2
+    assert pool2.statistics().completed == 1
+
+
+@pytest.mark.anyio
+async def test_generator_dependency_statistics() -> None:
+    pool = ThreadPool("db", max_workers=1)
+    release = threading.Event()
+
+    def dep() -> Generator[None, None, None]:
+        release.wait()
+        yield
+
+    async def endpoint(v: Annotated[None, Depends(dep, thread_pool="db")]) -> None:
+        ...
+
+    app = App([Path("/", get=endpoint)], thread_pools=[pool])
+
+    async with httpx.AsyncClient(app=app, base_url="http://example.com") as client:
+        async with anyio.create_task_group() as tg:
+            for _ in range(2):
+                tg.start_soon(client.get, "/")
+            with anyio.fail_after(5):
+                while pool.statistics().waiting != 1:
+                    await anyio.sleep(0.001)
+            await anyio.sleep(0.01)
+            release.set()
+
+    stats = pool.statistics()
+    assert stats.completed == 2
+    assert stats.max_wait_time > 0
+
+
+@pytest.mark.parametrize("option", ["cache", "single_flight"])
+def test_thread_pool_with_cache_or_single_flight(option: str) -> None:
+    pool = ThreadPool("db", max_workers=1)
+    cache = TTLCache(ttl=60)
+    calls: List[int] = []
+
+    def square(n: FromQuery[int]) -> int:
+        calls.append(n)
+        return n * n
+
+    if option == "cache":
+        marker = Depends(square, thread_pool="db", cache=cache)
+    else:
+        marker = Depends(square, thread_pool="db", single_flight=True)
+
+    async def endpoint(value: Annotated[int, marker]) -> int:
+        return value
+
+    app = App([Path("/", get=endpoint)], thread_pools=[pool])
+
+    with TestClient(app) as client:
+        for _ in range(2):
+            resp = client.get("/", params={"n": 3})
+            assert resp.status_code == 200, resp.content
+            assert resp.json() == 9
+    if option == "cache":
+        assert calls == [3]
+        assert len(cache) == 1
+    else:
+        assert calls == [3, 3]
+    assert pool.statistics().completed == len(calls)
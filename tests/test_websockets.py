@@ -0,0 +1,370 @@
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List
+
+import anyio
+import pytest
+from di.exceptions import UnknownScopeError
+from pydantic import BaseModel
+from starlette.types import Message
+
+from xpresso import App, Depends, FromWebSocketMessages, Path, WebSocket, WebSocketRoute
+from xpresso.exceptions import WebSocketValidationError
+from xpresso.testclient import TestClient
+from xpresso.typing import Annotated
+from xpresso.websockets import (
+    OverflowPolicy,
+    WebSocketDisconnect,
+    WebSocketMessages,
+    WebSocketReceiver,
+    WebSocketSender,
+)
+
+
+def test_receive_batches() -> None:
+    batches: List[List[Any]] = []
+    close_codes: List[Any] = []
+
+    def get_receiver(ws: WebSocket) -> WebSocketReceiver:
+        return WebSocketReceiver(ws, mode="json", max_batch=2)
+
+    async def endpoint(
+        receiver: Annotated[WebSocketReceiver, Depends(get_receiver)]
+    ) -> None:
+        async with receiver:
+            # let the messages pile up
+            await anyio.sleep(0.1)
+            async for batch in receiver.batches():
+                batches.append(batch)
+        close_codes.append(receiver.close_code)
+
+    app = App([WebSocketRoute("/ws", endpoint)])
+
+    with TestClient(app).websocket_connect("/ws") as ws:
+        for i in range(3):
+            ws.send_json({"i": i})
+        ws.close(code=1001)
+
+    assert batches == [[{"i": 0}, {"i": 1}], [{"i": 2}]]
+    assert close_codes == [1001]
+
+
+def test_receive_one_at_a_time() -> None:
+    async def endpoint(ws: WebSocket, receiver: WebSocketReceiver) -> None:
+        async with receiver:
+            async for message in receiver:
+                await ws.send_text(message.upper())
+
+    app = App([WebSocketRoute("/ws", endpoint)])
+
+    with TestClient(app).websocket_connect("/ws") as ws:
+        ws.send_text("hello")
+        assert ws.receive_text() == "HELLO"
+        ws.send_text("world")
+        assert ws.receive_text() == "WORLD"
+
+
+@pytest.mark.parametrize(
+    "policy,expected,dropped",
+    [
+        ("block", ["0", "1", "2", "3", "4"], 0),
+        ("drop_oldest", ["3", "4"], 3),
+        ("drop_newest", ["0", "1"], 3),
+    ],
+)
+def test_send_overflow_policy(
+    policy: OverflowPolicy, expected: List[str], dropped: int
+) -> None:
+    senders: List[WebSocketSender] = []
+
+    def get_sender(ws: WebSocket) -> WebSocketSender:
+        return WebSocketSender(ws, max_queue=2, policy=policy)
+
+    async def endpoint(
+        ws: WebSocket, sender: Annotated[WebSocketSender, Depends(get_sender)]
+    ) -> None:
+        senders.append(sender)
+        async with sender:
+            # send() doesn't yield to the writer unless it has to block,
+            # so the queue overflows
+            for i in range(5):
+                await sender.send(str(i))
+        await ws.close()
+
+    app = App([WebSocketRoute("/ws", endpoint)])
+
+    with TestClient(app).websocket_connect("/ws") as ws:
+        received = [ws.receive_text() for _ in expected]
+
+    assert received == expected
+    assert senders[0].dropped == dropped
+
+
+def test_send_coalesced() -> None:
+    def get_sender(ws: WebSocket) -> WebSocketSender:
+        return WebSocketSender(ws, mode="json", coalesce=lambda batch: batch)
+
+    async def endpoint(
+        ws: WebSocket, sender: Annotated[WebSocketSender, Depends(get_sender)]
+    ) -> None:
+        async with sender:
+            for i in range(3):
+                await sender.send({"i": i})
+            # wait for the writer to send those
+            await anyio.sleep(0.05)
+            await sender.send({"i": 3})
+        await ws.close()
+
+    app = App([WebSocketRoute("/ws", endpoint)])
+
+    with TestClient(app).websocket_connect("/ws") as ws:
+        first: List[Dict[str, int]] = ws.receive_json()
+        second: List[Dict[str, int]] = ws.receive_json()
+
+    assert first == [{"i": 0}, {"i": 1}, {"i": 2}]
+    assert second == [{"i": 3}]
+
+
+def test_send_after_close() -> None:
+    async def endpoint(ws: WebSocket, sender: WebSocketSender) -> None:
+        async with sender:
+            pass
+        with pytest.raises(RuntimeError, match="closed"):
+            await sender.send("too late")
+        await ws.close()
+
+    app = App([WebSocketRoute("/ws", endpoint)])
+
+    with TestClient(app).websocket_connect("/ws"):
+        pass
+
+
+def test_invalid_parameters() -> None:
+    with pytest.raises(ValueError):
+        WebSocketSender(None, max_queue=0)  # type: ignore[arg-type]
+    with pytest.raises(ValueError):
+        WebSocketSender(None, policy="drop")  # type: ignore[arg-type]
+    with pytest.raises(ValueError):
+        WebSocketReceiver(None, max_batch=0)  # type: ignore[arg-type]
+
+
+class Item(BaseModel):
+    name: str
+    price: float
+
+
+def test_typed_messages() -> None:
+    async def endpoint(ws: WebSocket, items: FromWebSocketMessages[Item]) -> None:
+        async for item in items:
+            assert isinstance(item, Item)
+            await ws.send_text(f"{item.name}={item.price}")
+
+    app = App([WebSocketRoute("/ws", endpoint)])
+
+    with TestClient(app).websocket_connect("/ws") as ws:
+        ws.send_json({"name": "a", "price": 1})
+        assert ws.receive_text() == "a=1.0"
+        ws.send_bytes(b'{"name": "b", "price": "2.5"}')
+        assert ws.receive_text() == "b=2.5"
+
+
+@pytest.mark.parametrize(
+    "payload",
+    ['{"name": "a"}', "not json"],
+)
+def test_invalid_message_closes_connection(payload: str) -> None:
+    async def endpoint(items: FromWebSocketMessages[Item]) -> None:
+        async for _ in items:
+            ...
+
+    app = App([WebSocketRoute("/ws", endpoint)])
+
+    with TestClient(app).websocket_connect("/ws") as ws:
+        ws.send_text(payload)
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            ws.receive_text()
+    assert exc_info.value.code == 1007
+
+
+def test_handle_invalid_message() -> None:
+    async def endpoint(
+        ws: WebSocket,
+        numbers: Annotated[AsyncIterator[int], WebSocketMessages(decoder=None)],
+    ) -> None:
+        while True:
+            try:
+                async for number in numbers:
+                    await ws.send_text(str(number * 2))
+                return
+            except WebSocketValidationError as exc:
+                await ws.send_json(exc.errors())
+
+    app = App([WebSocketRoute("/ws", endpoint)])
+
+    with TestClient(app).websocket_connect("/ws") as ws:
+        ws.send_text("2")
+        assert ws.receive_text() == "4"
+        ws.send_text("two")
+        assert ws.receive_json() == [
+            {
+                "loc": ["message"],
+                "msg": "value is not a valid integer",
+                "type": "type_error.integer",
+            }
+        ]
+        ws.send_text("3")
+        assert ws.receive_text() == "6"
+
+
+def test_message_dependencies() -> None:
+    calls: List[str] = []
+
+    def get_user(ws: WebSocket) -> str:
+        calls.append("get_user")
+        return ws.query_params["user"]
+
+    def check_rate_limit(user: Annotated[str, Depends(get_user)]) -> None:
+        calls.append(f"check_rate_limit {user}")
+        if calls.count(f"check_rate_limit {user}") > 2:
+            raise WebSocketValidationError([], close_code=1008)
+
+    async def endpoint(
+        ws: WebSocket,
+        user: Annotated[str, Depends(get_user)],
+        messages: Annotated[AsyncIterator[str], WebSocketMessages(decoder=None)],
+    ) -> None:
+        async for message in messages:
+            await ws.send_text(f"{user}: {message}")
+
+    app = App(
+        [
+            WebSocketRoute(
+                "/ws", endpoint, message_dependencies=[Depends(check_rate_limit)]
+            )
+        ]
+    )
+
+    with TestClient(app).websocket_connect("/ws?user=adrian") as ws:
+        ws.send_text("1")
+        assert ws.receive_text() == "adrian: 1"
+        ws.send_text("2")
+        assert ws.receive_text() == "adrian: 2"
+        ws.send_text("3")
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            ws.receive_text()
+
+    assert exc_info.value.code == 1008
+    # get_user was computed once for the connection and re-used for every message
+    assert calls == ["get_user"] + ["check_rate_limit adrian"] * 3
+
+
+def test_message_dependencies_with_receiver() -> None:
+    counts: List[int] = []
+
+    def count_message() -> None:
+        counts.append(len(counts))
+
+    async def endpoint(ws: WebSocket, receiver: WebSocketReceiver) -> None:
+        async with receiver:
+            async for message in receiver:
+                await ws.send_text(f"{message} {len(counts)}")
+
+    app = App(
+        [WebSocketRoute("/ws", endpoint, message_dependencies=[Depends(count_message)])]
+    )
+
+    with TestClient(app).websocket_connect("/ws") as ws:
+        ws.send_text("a")
+        assert ws.receive_text() == "a 1"
+        ws.send_text("b")
+        assert ws.receive_text() == "b 2"
+
+
+def test_differently_typed_message_parameters() -> None:
+    async def endpoint(
+        ws: WebSocket,
+        numbers: Annotated[AsyncIterator[int], WebSocketMessages()],
+        lists: Annotated[AsyncIterator[List[int]], WebSocketMessages()],
+        strict: Annotated[AsyncIterator[int], WebSocketMessages(close_code=1008)],
+    ) -> None:
+        await ws.send_json(await lists.__anext__())
+        await ws.send_json(await numbers.__anext__())
+        await strict.__anext__()
+
+    app = App([WebSocketRoute("/ws", endpoint)])
+
+    with TestClient(app).websocket_connect("/ws") as ws:
+        ws.send_text("[1, 2]")
+        assert ws.receive_json() == [1, 2]
+        ws.send_text("3")
+        assert ws.receive_json() == 3
+        ws.send_text("not a number")
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            ws.receive_text()
+    assert exc_info.value.code == 1008
+
+
+def test_message_scope_outside_of_websockets() -> None:
+    def message_scoped() -> None:
+        ...
+
+    async def endpoint(
+        _: Annotated[None, Depends(message_scoped, scope="message")]
+    ) -> None:
+        ...
+
+    app = App([Path("/", get=endpoint)])
+
+    with pytest.raises(UnknownScopeError):
+        with TestClient(app):
+            pass
+
+
+@pytest.mark.parametrize(
+    "policy,expected,dropped",
+    [
+        ("block", ["0", "1", "2", "3"], 0),
+        ("drop_oldest", ["0", "3"], 2),
+        ("drop_newest", ["0", "1"], 2),
+    ],
+)
+@pytest.mark.anyio
+async def test_send_overflow_while_sending(
+    policy: OverflowPolicy, expected: List[str], dropped: int
+) -> None:
+    sent: List[str] = []
+    release = anyio.Event()
+
+    async def receive() -> Message:
+        return {"type": "websocket.connect"}
+
+    async def send(message: Message) -> None:
+        if message["type"] == "websocket.send":
+            # the first message is held up until we release it
+            await release.wait()
+            sent.append(message["text"])
+
+    ws = WebSocket({"type": "websocket", "path": "/", "headers": []}, receive, send)
+    sender = WebSocketSender(ws, max_queue=2, policy=policy)
+
+    async with anyio.create_task_group() as tg:
+        async with sender:
+            await sender.send("0")
+            # let the writer pick up "0"
+            await anyio.sleep(0.01)
+            # "0" is being sent so there is only room for one more message
+            await sender.send("1")
+            if policy == "block":
+                # would go over max_queue until "0" is sent
+                tg.start_soon(sender.send, "2")
+                await anyio.sleep(0.01)
+                assert sender._queue == deque(["1"])
+                release.set()
+                await anyio.sleep(0.01)
+                await sender.send("3")
+            else:
+                await sender.send("2")
+                await sender.send("3")
+                release.set()
+
+    assert sent == expected
+    assert sender.dropped == dropped
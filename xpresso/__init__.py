@@ -39,7 +39,7 @@ from xpresso.routing.operation import Operation
 from xpresso.routing.pathitem import Path
 from xpresso.routing.router import Router
 from xpresso.routing.websockets import WebSocketRoute
-from xpresso.websockets import WebSocket
+from xpresso.websockets import FromWebSocketMessages, WebSocket
 
 __all__ = (
     "ExcHandler",
@@ -77,6 +77,7 @@ __all__ = (
     "Response",
     "WebSocketRoute",
     "WebSocket",
+    "FromWebSocketMessages",
     # backwards compatibility aliases
     # TODO: remove in a couple of releases
     "File",
@@ -0,0 +1,42 @@
+import typing
+
+from di.api.dependencies import DependentBase
+
+from xpresso.dependencies._dependencies import BoundDependsMarker
+from xpresso.routing.operation import Operation
+from xpresso.routing.pathitem import Path
+
+# requests and samples with no route are labeled with this
+NO_ROUTE = "<no route>"
+
+AdminDependencies = typing.Optional[
+    typing.Iterable[typing.Union[DependentBase[typing.Any], BoundDependsMarker]]
+]
+
+
+def check_admin_route(
+    path: typing.Optional[str], dependencies: AdminDependencies
+) -> None:
+    if path is not None and dependencies is None:
+        raise ValueError(
+            "The route must be protected, pass dependencies=[...]"
+            " (or dependencies=[] to serve it without any protection)"
+        )
+
+
+def get_admin_route(
+    path: typing.Optional[str],
+    endpoint: typing.Callable[..., typing.Any],
+    dependencies: AdminDependencies,
+) -> Path:
+    if path is None:
+        raise ValueError("No path was given")
+    return Path(
+        path,
+        get=Operation(
+            endpoint,
+            dependencies=dependencies,
+            include_in_schema=False,
+        ),
+        include_in_schema=False,
+    )
@@ -1,26 +1,60 @@
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 
 from di import ScopeState
 from starlette.responses import Response
+from starlette.types import Send
+
+from xpresso.instrumentation import RequestTimings
 
 
 class XpressoHTTPExtension:
-    __slots__ = ("di_container_state", "response", "response_sent")
+    __slots__ = (
+        "di_container_state",
+        "response",
+        "response_started",
+        "response_sent",
+        "route",
+        "timings",
+        "tracking_send",
+        "untracked_send",
+    )
 
     di_container_state: ScopeState
     response: Optional[Response]
+    # set by whoever starts sending a response so that middleware
+    # doesn't have to wrap send() to find out
+    response_started: bool
     response_sent: bool
-
-    def __init__(self, di_state: ScopeState) -> None:
+    # "{METHOD} {path}" of the Operation handling the request, if any
+    route: Optional[str]
+    timings: Optional[RequestTimings]
+    # set by the ExceptionMiddleware, which wraps send() (as tracking_send)
+    # to find out when routes that don't set response_started start a response.
+    # Operations set response_started themselves, so if they get tracking_send
+    # they use untracked_send instead to skip the wrapper.
+    tracking_send: Optional[Send]
+    untracked_send: Optional[Send]
+
+    def __init__(
+        self, di_state: ScopeState, timings: Optional[RequestTimings] = None
+    ) -> None:
         self.di_container_state = di_state
         self.response = None
+        self.response_started = False
         self.response_sent = False
+        self.route = None
+        self.timings = timings
+        self.tracking_send = None
+        self.untracked_send = None
 
 
 class XpressoWebSocketExtension:
-    __slots__ = ("di_container_state",)
+    __slots__ = ("di_container_state", "message_hook")
 
     di_container_state: ScopeState
+    # runs the route's message dependencies, called for every message
+    message_hook: Optional[Callable[[], Awaitable[None]]]
 
     def __init__(self, di_state: ScopeState) -> None:
         self.di_container_state = di_state
+        self.message_hook = None
@@ -7,6 +7,8 @@ from di.concurrency import as_async
 from di.dependent import Dependent
 
 from xpresso.dependencies._dependencies import Depends, DependsMarker
+from xpresso.dependencies._process import run_in_process as wrap_run_in_process
+from xpresso.dependencies._threadpool import run_in_thread_pool
 
 Endpoint = typing.Union[CallableProvider[typing.Any], CoroutineProvider[typing.Any]]
 
@@ -16,8 +18,14 @@ class EndpointDependent(Dependent[typing.Any]):
         self,
         endpoint: Endpoint,
         sync_to_thread: bool = False,
+        thread_pool: typing.Optional[str] = None,
+        run_in_process: bool = False,
     ) -> None:
-        if sync_to_thread:
+        if run_in_process:
+            endpoint = wrap_run_in_process(endpoint)
+        elif thread_pool is not None:
+            endpoint = run_in_thread_pool(endpoint, thread_pool)
+        elif sync_to_thread:
             endpoint = as_async(endpoint)
         super().__init__(
             call=endpoint,
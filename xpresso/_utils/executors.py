@@ -0,0 +1,112 @@
+import typing
+from time import perf_counter
+
+import anyio
+import anyio.abc
+from di.api.executor import ExecutionState  # type: ignore[attr-defined]
+from di.api.executor import SupportsAsyncExecutor, SupportsTaskGraph, Task
+from di.executors import AsyncExecutor, ConcurrentAsyncExecutor
+
+from xpresso.instrumentation import DependencyExecution, DependencyHook
+
+_UNSET: typing.Any = object()
+
+
+def _is_cache_hit(task: typing.Any, state: ExecutionState) -> bool:
+    # di does not expose this information, so we peek into the execution state
+    # di is pinned to an exact version so this is safe to do
+    if task.unwrapped_call in state._values:  # type: ignore[attr-defined]
+        return True
+    cache_key = getattr(task, "cache_key", None)
+    if cache_key is None:
+        return False
+    return (
+        state._cache.get_key(cache_key, scope=task.scope, default=_UNSET)  # type: ignore[attr-defined]
+        is not _UNSET
+    )
+
+
+class _InstrumentedExecutorBase:
+    __slots__ = ("hooks", "route")
+
+    def __init__(
+        self,
+        hooks: typing.Sequence[DependencyHook],
+        route: typing.Optional[str],
+    ) -> None:
+        self.hooks = hooks
+        self.route = route
+
+    async def compute(self, task: Task, state: ExecutionState) -> None:
+        t = typing.cast(typing.Any, task)
+        cache_hit = _is_cache_hit(t, state)
+        start = perf_counter()
+        try:
+            maybe_aw = task.compute(state)
+            if maybe_aw is not None:
+                await maybe_aw
+        finally:
+            execution = DependencyExecution(
+                dependent=t.dependent,
+                scope=t.scope,
+                route=self.route,
+                start=start,
+                end=perf_counter(),
+                cache_hit=cache_hit,
+            )
+            for hook in self.hooks:
+                hook(execution)
+
+
+class InstrumentedAsyncExecutor(_InstrumentedExecutorBase, SupportsAsyncExecutor):
+    """Like AsyncExecutor but reports every dependency execution to hooks"""
+
+    __slots__ = ()
+
+    async def execute_async(
+        self, tasks: SupportsTaskGraph, state: ExecutionState
+    ) -> None:
+        for task in tasks.static_order():
+            await self.compute(task, state)
+
+
+class InstrumentedConcurrentAsyncExecutor(
+    _InstrumentedExecutorBase, SupportsAsyncExecutor
+):
+    """Like ConcurrentAsyncExecutor but reports every dependency execution to hooks"""
+
+    __slots__ = ()
+
+    async def _worker(
+        self,
+        task: Task,
+        tasks: SupportsTaskGraph,
+        state: ExecutionState,
+        taskgroup: anyio.abc.TaskGroup,
+    ) -> None:
+        await self.compute(task, state)
+        tasks.done(task)
+        for task in tasks.get_ready():
+            taskgroup.start_soon(self._worker, task, tasks, state, taskgroup)
+
+    async def execute_async(
+        self, tasks: SupportsTaskGraph, state: ExecutionState
+    ) -> None:
+        async with anyio.create_task_group() as taskgroup:
+            for task in tasks.get_ready():
+                taskgroup.start_soon(self._worker, task, tasks, state, taskgroup)
+
+
+def get_executor(
+    concurrent: bool,
+    hooks: typing.Sequence[DependencyHook] = (),
+    route: typing.Optional[str] = None,
+) -> SupportsAsyncExecutor:
+    # only pay for instrumentation if someone is listening
+    if hooks:
+        if concurrent:
+            return InstrumentedConcurrentAsyncExecutor(hooks, route)
+        return InstrumentedAsyncExecutor(hooks, route)
+    if concurrent:
+        return ConcurrentAsyncExecutor()
+    return AsyncExecutor()
@@ -44,8 +44,12 @@ class DependencyOverrideManager:
                 type_ = get_type(param)
                 if type_ is target:
                     return dep
-            if dependent.call is not None and dependent.call is target:
-                return dep
+            call = dependent.call
+            while call is not None:
+                if call is target:
+                    return dep
+                # dependencies wrapped by TTLCache, single_flight, thread pools, etc.
+                call = getattr(call, "__xpresso_wrapped_call__", None)
             return None
 
         cm = self._container.bind(hook)
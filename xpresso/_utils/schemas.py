@@ -1,7 +1,10 @@
+import contextlib
+import typing
+from contextvars import ContextVar
 from typing import Any, Dict
 
 from pydantic.fields import ModelField
-from pydantic.schema import field_schema
+from pydantic.schema import TypeModelOrEnum, field_schema
 
 from xpresso._utils.pydantic_utils import filter_pydantic_models_from_mapping
 from xpresso.binders.api import ModelNameMap
@@ -9,16 +12,128 @@ from xpresso.openapi import models as openapi_models
 from xpresso.openapi._constants import REF_PREFIX
 
 
+class _KnownModels(typing.Set[typing.Any]):
+    # Pydantic replaces an empty set of known models with a new set
+    # which would keep us from accumulating them
+    def __bool__(self) -> bool:
+        return True
+
+
+class _NameMapMemo:
+    """Model schemas computed with a single model name map"""
+
+    __slots__ = ("pydantic_model_name_map", "known_models", "definitions", "refs")
+
+    def __init__(self, model_name_map: ModelNameMap) -> None:
+        self.pydantic_model_name_map = filter_pydantic_models_from_mapping(
+            model_name_map
+        )
+        # models in known_models have their definition in definitions
+        # so Pydantic only returns a $ref to them
+        self.known_models = _KnownModels()
+        self.definitions: Dict[str, Any] = {}
+        self.refs: Dict[str, typing.Set[str]] = {}
+
+    def _get_refs(self, name: str) -> typing.Set[str]:
+        if name not in self.refs:
+            refs: typing.Set[str] = set()
+            stack: typing.List[Any] = [self.definitions[name]]
+            while stack:
+                item = stack.pop()
+                if isinstance(item, dict):
+                    ref = item.get("$ref", None)
+                    if isinstance(ref, str) and ref.startswith(REF_PREFIX):
+                        refs.add(ref[len(REF_PREFIX) :])
+                    stack.extend(item.values())
+                elif isinstance(item, list):
+                    stack.extend(item)
+            self.refs[name] = refs
+        return self.refs[name]
+
+    def get_definitions(self, names: typing.Iterable[str]) -> Dict[str, Any]:
+        """Get the definitions for names and everything they reference"""
+        res: Dict[str, Any] = {}
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name in res or name not in self.definitions:
+                continue
+            res[name] = self.definitions[name]
+            stack.extend(self._get_refs(name))
+        return res
+
+
+class SchemaMemo:
+    """Schemas shared between all operations in an OpenAPI generation run.
+
+    Without this every operation re-generates the schema for every model it uses
+    (and all of their sub-models), even if other operations already did.
+    """
+
+    __slots__ = ("_name_maps", "response_schemas")
+
+    def __init__(self) -> None:
+        self._name_maps: Dict[int, typing.Tuple[ModelNameMap, _NameMapMemo]] = {}
+        # response model -> (schema, definitions)
+        self.response_schemas: Dict[
+            Any, typing.Tuple[Dict[str, Any], Dict[str, Any]]
+        ] = {}
+
+    def for_name_map(self, model_name_map: ModelNameMap) -> _NameMapMemo:
+        key = id(model_name_map)
+        if key not in self._name_maps:
+            # keep a reference to the map so that its id can't be re-used
+            self._name_maps[key] = (model_name_map, _NameMapMemo(model_name_map))
+        return self._name_maps[key][1]
+
+
+_schema_memo: "ContextVar[typing.Optional[SchemaMemo]]" = ContextVar(
+    "_schema_memo", default=None
+)
+
+
+@contextlib.contextmanager
+def schema_memo() -> typing.Iterator[SchemaMemo]:
+    """Share schemas between calls to openapi_schema_from_pydantic_field within this block"""
+    memo = SchemaMemo()
+    token = _schema_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _schema_memo.reset(token)
+
+
+def get_schema_memo() -> typing.Optional[SchemaMemo]:
+    return _schema_memo.get()
+
+
 def openapi_schema_from_pydantic_field(
     field: ModelField,
     model_name_map: ModelNameMap,
     schemas: Dict[str, Any],
 ) -> openapi_models.Schema:
-    schema, refs, _ = field_schema(
-        field,
-        by_alias=True,
-        ref_prefix=REF_PREFIX,
-        model_name_map=filter_pydantic_models_from_mapping(model_name_map),
-    )
-    schemas.update(refs)
+    memo = _schema_memo.get()
+    if memo is None:
+        schema, refs, _ = field_schema(
+            field,
+            by_alias=True,
+            ref_prefix=REF_PREFIX,
+            model_name_map=filter_pydantic_models_from_mapping(model_name_map),
+        )
+        schemas.update(refs)
+    else:
+        name_map_memo = memo.for_name_map(model_name_map)
+        schema, definitions, nested_models = field_schema(
+            field,
+            by_alias=True,
+            ref_prefix=REF_PREFIX,
+            model_name_map=typing.cast(
+                Dict[TypeModelOrEnum, str], name_map_memo.pydantic_model_name_map
+            ),
+            known_models=name_map_memo.known_models,
+        )
+        name_map_memo.definitions.update(definitions)
+        schemas.update(
+            name_map_memo.get_definitions([*definitions.keys(), *nested_models])
+        )
     return openapi_models.Schema(**schema, nullable=field.allow_none or None)
@@ -1,4 +1,4 @@
-from typing import Any, Sequence
+from typing import Any, Callable, Iterable, Sequence
 
 from di.api.dependencies import DependentBase
 from di.api.scopes import Scope
@@ -29,3 +29,31 @@ def lifespan_scope_resolver(
     if dep.scope is None:
         return "app"
     return dep.scope
+
+
+def get_message_scope_resolver(
+    message_dependencies: Iterable[DependentBase[Any]],
+) -> Callable[[DependentBase[Any], Sequence[Scope], Sequence[Scope]], Scope]:
+    """Resolve scopes for WebSocket message dependencies.
+
+    The message dependencies themselves default to the "message" scope so that
+    they are executed for every message.
+    Their sub-dependencies default to "connection" like in endpoint_scope_resolver
+    so that values that were already computed for the connection are re-used.
+    """
+    top_level = {id(dep) for dep in message_dependencies}
+
+    def message_scope_resolver(
+        dep: DependentBase[Any],
+        sub_dependent_scopes: Sequence[Scope],
+        _: Sequence[Scope],
+    ) -> Scope:
+        if dep.scope is not None:
+            return dep.scope
+        if id(dep) in top_level or "message" in sub_dependent_scopes:
+            return "message"
+        if "endpoint" in sub_dependent_scopes:
+            return "endpoint"
+        return "connection"
+
+    return message_scope_resolver
@@ -1,48 +1,71 @@
+import asyncio
 import contextlib
 import functools
 import inspect
+import logging
 import typing
+from urllib.parse import quote
 
+import anyio
+import anyio.to_thread
 import starlette.types
 from di import Container, ScopeState, SolvedDependent, bind_by_type
 from di.api.dependencies import DependentBase
 from di.dependent import Dependent, JoinedDependent
-from di.executors import AsyncExecutor
 from starlette.background import BackgroundTasks
 from starlette.exceptions import HTTPException
 from starlette.middleware import Middleware
 from starlette.middleware.errors import ServerErrorMiddleware
 from starlette.requests import HTTPConnection, Request
-from starlette.responses import HTMLResponse, Response
+from starlette.responses import HTMLResponse, JSONResponse, Response
 from starlette.routing import BaseRoute
 from starlette.routing import Route as StarletteRoute
 from starlette.websockets import WebSocket
 
 from xpresso._utils.asgi import XpressoHTTPExtension, XpressoWebSocketExtension
+from xpresso._utils.executors import get_executor
 from xpresso._utils.overrides import DependencyOverrideManager
 from xpresso._utils.routing import visit_routes
 from xpresso._utils.scope_resolver import lifespan_scope_resolver
+from xpresso._utils.typing import Literal
+from xpresso.broadcast import BroadcastHub
 from xpresso.dependencies._dependencies import BoundDependsMarker, Scopes
+from xpresso.dependencies._process import ProcessPool, process_pool_lifespan
+from xpresso.dependencies._single_flight import SingleFlights
+from xpresso.dependencies._threadpool import ThreadPools, bind_thread_pools
 from xpresso.exception_handlers import (
     ExcHandler,
     http_exception_handler,
+    validation_error_response,
     validation_exception_handler,
 )
 from xpresso.exceptions import RequestValidationError
+from xpresso.instrumentation import DependencyHook, RequestTimings
+from xpresso.metrics import MetricsRegistry
 from xpresso.middleware.exceptions import ExceptionMiddleware
+from xpresso.monitoring import EventLoopMonitor
 from xpresso.openapi import models as openapi_models
-from xpresso.openapi._builder import generate_openapi
+from xpresso.openapi._builder import OpenAPISplit, generate_openapi, get_partition_names
+from xpresso.openapi._document import OpenAPIDocument
 from xpresso.openapi._html import get_swagger_ui_html
+from xpresso.profiling import AllocationTracker, SamplingProfiler
 from xpresso.responses import ResponseSpec, ResponseStatusCode
 from xpresso.routing.pathitem import Path
 from xpresso.routing.router import Router
 from xpresso.routing.websockets import WebSocketRoute
+from xpresso.threadpool import ThreadPool
+
+logger = logging.getLogger(__name__)
+
+OpenAPIGeneration = Literal["lazy", "startup", "background"]
 
 
 class App:
     router: Router
     container: Container
     dependency_overrides: DependencyOverrideManager
+    dependency_hooks: typing.List[DependencyHook]
+    thread_pools: typing.Dict[str, ThreadPool]
 
     __slots__ = (
         "_container_state",
@@ -50,13 +73,25 @@ class App:
         "_openapi_info",
         "_openapi_servers",
         "_openapi_version",
-        "_openapi_content",
+        "_openapi_documents",
+        "_openapi_generation",
+        "_openapi_pending",
+        "_openapi_split_by",
+        "_record_request_timings",
         "_root_path",
         "_root_path_in_servers",
         "_setup_run",
+        "_validation_error_response",
+        "allocation_tracker",
+        "broadcast_hub",
         "container",
+        "dependency_hooks",
         "dependency_overrides",
+        "event_loop_monitor",
+        "metrics",
+        "profiler",
         "router",
+        "thread_pools",
     )
 
     def __init__(
@@ -87,12 +122,32 @@ class App:
         servers: typing.Optional[typing.Iterable[openapi_models.Server]] = None,
         root_path: str = "",
         root_path_in_servers: bool = True,
+        dependency_hooks: typing.Optional[typing.Iterable[DependencyHook]] = None,
+        record_request_timings: bool = False,
+        thread_pools: typing.Optional[typing.Iterable[ThreadPool]] = None,
+        process_pool_max_workers: typing.Optional[int] = None,
+        openapi_generation: OpenAPIGeneration = "lazy",
+        split_openapi_by: typing.Optional[OpenAPISplit] = None,
+        handle_validation_errors_in_routes: bool = False,
+        profiler: typing.Optional[SamplingProfiler] = None,
+        allocation_tracker: typing.Optional[AllocationTracker] = None,
+        event_loop_monitor: typing.Optional[EventLoopMonitor] = None,
+        metrics: typing.Optional[MetricsRegistry] = None,
+        broadcast_hub: typing.Optional[BroadcastHub] = None,
     ) -> None:
         self.container = container or Container()
-        _register_framework_dependencies(self.container, app=self)
+        _register_framework_dependencies(
+            self.container, app=self, process_pool_max_workers=process_pool_max_workers
+        )
         self.dependency_overrides = DependencyOverrideManager(self.container)
         self._container_state: ScopeState = ScopeState()
         self._setup_run = False
+        self.dependency_hooks = list(dependency_hooks or ())
+        self.thread_pools = ThreadPools()
+        for pool in thread_pools or ():
+            if pool.name in self.thread_pools:
+                raise ValueError(f'Duplicate thread pool name "{pool.name}"')
+            self.thread_pools[pool.name] = pool
 
         @contextlib.asynccontextmanager
         async def lifespan_ctx(*_: typing.Any) -> typing.AsyncIterator[None]:
@@ -101,7 +156,7 @@ class App:
             self._setup_run = True
             placeholder = Dependent(lambda: None, scope="app")
             dep: "DependentBase[typing.Any]"
-            executor = AsyncExecutor()
+            executor = get_executor(False, hooks=self.dependency_hooks)
 
             async with self._container_state.enter_scope(
                 "app"
@@ -125,6 +180,7 @@ class App:
                     scopes=Scopes,
                     scope_resolver=lifespan_scope_resolver,
                 )
+                bind_thread_pools((d.call for d in solved.dag), self.thread_pools)
                 try:
                     await self.container.execute_async(
                         solved, executor=executor, state=self._container_state
@@ -155,21 +211,74 @@ class App:
                         executor,
                         state=self._container_state,
                     )
-                    yield
+                    # all routes are prepared now, so we can build the OpenAPI document
+                    root_path = self._root_path.rstrip("/")
+                    if (
+                        self._openapi_generation == "startup"
+                        and (root_path, None) not in self._openapi_documents
+                    ):
+                        self._openapi_documents.update(
+                            self._build_openapi_documents(root_path)
+                        )
+                    async with anyio.create_task_group() as tg:
+                        if (
+                            self._openapi_generation == "background"
+                            and (root_path, None) not in self._openapi_documents
+                            and root_path not in self._openapi_pending
+                        ):
+                            self._openapi_pending.add(root_path)
+                            tg.start_soon(self._build_openapi_in_background, root_path)
+                        if self.event_loop_monitor is not None:
+                            tg.start_soon(self.event_loop_monitor.run)
+                        if self.broadcast_hub is not None:
+                            await tg.start(self.broadcast_hub.run)
+                        yield
+                        tg.cancel_scope.cancel()
                 finally:
                     # make this context manager reentrant for testing purposes
                     self._setup_run = False
                     self._container_state = ScopeState()
 
         self._debug = debug
+        self._openapi_generation = openapi_generation
+        self._openapi_pending: "typing.Set[str]" = set()
+        self._openapi_split_by = split_openapi_by
+        self._record_request_timings = record_request_timings
+
+        self.profiler = profiler
+        self.allocation_tracker = allocation_tracker
+        self.event_loop_monitor = event_loop_monitor
+        self.metrics = metrics
+        self.broadcast_hub = broadcast_hub
+        if broadcast_hub is not None:
+            self.container.bind(
+                bind_by_type(
+                    Dependent(lambda: broadcast_hub, scope="app", wire=False),
+                    BroadcastHub,
+                )
+            )
 
         routes = list(routes or [])
+        if profiler is not None and profiler.path is not None:
+            routes.append(profiler.get_route())
+        if allocation_tracker is not None and allocation_tracker.path is not None:
+            routes.append(allocation_tracker.get_route())
+        if metrics is not None and metrics.path is not None:
+            routes.append(metrics.get_route())
         routes.extend(
             self._get_doc_routes(
                 openapi_url=openapi_url,
                 docs_url=docs_url,
             )
         )
+        exception_handlers = list(exception_handlers or ())
+        # we can only skip the ExceptionMiddleware if it would have used the default handler
+        self._validation_error_response = (
+            validation_error_response
+            if handle_validation_errors_in_routes
+            and not any(h.exc is RequestValidationError for h in exception_handlers)
+            else None
+        )
         middleware = _build_middleware_stack(
             debug=debug,
             user_middleware=middleware or (),
@@ -192,7 +301,10 @@ class App:
             description=description,
         )
         self._openapi_servers = servers or []
-        self._openapi_content: "typing.Optional[bytes]" = None
+        # keyed by root_path since it determines the servers in the document
+        self._openapi_documents: "typing.Dict[typing.Tuple[str, typing.Optional[str]], OpenAPIDocument]" = (
+            {}
+        )
         self._root_path_in_servers = root_path_in_servers
         self._root_path = root_path
 
@@ -226,8 +338,12 @@ class App:
         if scope_type == "http":
             if "xpresso" not in extensions:
                 extensions["xpresso"] = XpressoHTTPExtension(
-                    di_state=self._container_state
+                    di_state=self._container_state,
+                    timings=RequestTimings() if self._record_request_timings else None,
                 )
+            if self.metrics is not None:
+                await self.metrics.record_request(self.router, scope, receive, send)
+                return
         else:  # websocket
             if "xpresso" not in extensions:
                 extensions["xpresso"] = XpressoWebSocketExtension(
@@ -262,7 +378,7 @@ class App:
                             _wrap_lifespan_as_async_generator(node.lifespan)
                         )
             if isinstance(route.route, Path):
-                for operation in route.route.operations.values():
+                for method, operation in route.route.operations.items():
                     prepare_cbs.append(
                         functools.partial(
                             operation.prepare,
@@ -272,6 +388,12 @@ class App:
                                 *operation.dependencies,
                             ],
                             container=self.container,
+                            dependency_hooks=self.dependency_hooks,
+                            route_name=f"{method} {route.path}",
+                            thread_pools=self.thread_pools,
+                            validation_error_response=self._validation_error_response,
+                            allocation_tracker=self.allocation_tracker,
+                            event_loop_monitor=self.event_loop_monitor,
                         )
                     )
             elif isinstance(route.route, WebSocketRoute):
@@ -283,12 +405,17 @@ class App:
                             *route.route.dependencies,
                         ],
                         container=self.container,
+                        dependency_hooks=self.dependency_hooks,
+                        route_name=route.path,
+                        thread_pools=self.thread_pools,
                     )
                 )
         return lifespans, prepare_cbs
 
     def get_openapi(
-        self, servers: typing.List[openapi_models.Server]
+        self,
+        servers: typing.List[openapi_models.Server],
+        partition: typing.Optional[str] = None,
     ) -> openapi_models.OpenAPI:
         return generate_openapi(
             visitor=visit_routes(
@@ -297,8 +424,80 @@ class App:
             version=self._openapi_version,
             info=self._openapi_info,
             servers=servers,
+            partition=partition,
+            split_by=self._openapi_split_by,
+        )
+
+    def get_openapi_partitions(self) -> typing.List[str]:
+        """Get the names of the partial OpenAPI documents if split_openapi_by is set"""
+        if self._openapi_split_by is None:
+            return []
+        return get_partition_names(
+            visit_routes(
+                app_type=App, router=self.router, nodes=[self, self.router], path=""
+            ),
+            self._openapi_split_by,
         )
 
+    def _build_openapi_document(
+        self, root_path: str, partition: typing.Optional[str] = None
+    ) -> OpenAPIDocument:
+        servers = list(self._openapi_servers)
+        if self._root_path_in_servers and root_path:
+            server_urls = {s.url for s in servers}
+            if root_path not in server_urls:
+                servers.insert(0, openapi_models.Server(url=root_path))
+        return OpenAPIDocument.from_content(
+            self.get_openapi(servers=servers, partition=partition)
+            .json(exclude_none=True, by_alias=True, sort_keys=True)
+            .encode()
+        )
+
+    def _build_openapi_documents(
+        self, root_path: str
+    ) -> typing.Dict[typing.Tuple[str, typing.Optional[str]], OpenAPIDocument]:
+        partitions: "typing.List[typing.Optional[str]]" = [
+            None,
+            *self.get_openapi_partitions(),
+        ]
+        return {
+            (root_path, partition): self._build_openapi_document(root_path, partition)
+            for partition in partitions
+        }
+
+    async def _build_openapi_in_background(self, root_path: str) -> None:
+        try:
+            # generation is CPU bound, keep it from blocking requests
+            self._openapi_documents.update(
+                await anyio.to_thread.run_sync(self._build_openapi_documents, root_path)
+            )
+        except Exception:
+            # requests will try again (and fail with a 500)
+            logger.exception("Failed to generate the OpenAPI document")
+        finally:
+            self._openapi_pending.discard(root_path)
+
+    def _get_openapi_response(
+        self, req: Request, partition: typing.Optional[str]
+    ) -> Response:
+        # get the root_path from the request and not just App._root_path
+        # so that we can use the value set by the ASGI server
+        # since ASGI servers also let you configure this
+        root_path: str = req.scope.get("root_path", "").rstrip("/")  # type: ignore
+        document = self._openapi_documents.get((root_path, partition), None)
+        if document is None:
+            if root_path in self._openapi_pending:
+                return JSONResponse(
+                    {"detail": "The OpenAPI document is being generated"},
+                    status_code=503,
+                    headers={"Retry-After": "1"},
+                )
+            if partition is not None and partition not in self.get_openapi_partitions():
+                raise HTTPException(status_code=404)
+            document = self._build_openapi_document(root_path, partition)
+            self._openapi_documents[(root_path, partition)] = document
+        return document.response(req.headers)
+
     def _get_doc_routes(
         self,
         openapi_url: typing.Optional[str],
@@ -310,30 +509,30 @@ class App:
             openapi_url = openapi_url
 
             async def openapi(req: Request) -> Response:
-                # get the root_path from the request and not just App._root_path
-                # so that we can use the value set by the ASGI server
-                # since ASGI servers also let you configure this
-                root_path: str = req.scope.get("root_path", "").rstrip("/")  # type: ignore
-                if self._openapi_content is None:
-                    servers = list(self._openapi_servers)
-                    if self._root_path_in_servers and root_path:
-                        server_urls = {s.url for s in servers}
-                        if root_path not in server_urls:
-                            servers.insert(0, openapi_models.Server(url=root_path))
-                    self._openapi_content = (
-                        self.get_openapi(servers=servers)
-                        .json(exclude_none=True, by_alias=True, sort_keys=True)
-                        .encode()
-                    )
-                return Response(
-                    self._openapi_content, media_type="application/json; charset=utf-8"
-                )
+                return self._get_openapi_response(req, None)
 
             routes.append(
                 StarletteRoute(
                     path=openapi_url, endpoint=openapi, include_in_schema=False
                 )
             )
+
+            # partial documents are served from /openapi/{partition}.json
+            partitions_url = openapi_url
+            if partitions_url.endswith(".json"):
+                partitions_url = partitions_url[: -len(".json")]
+            if self._openapi_split_by is not None:
+
+                async def openapi_partition(req: Request) -> Response:
+                    return self._get_openapi_response(req, req.path_params["partition"])
+
+                routes.append(
+                    StarletteRoute(
+                        path=partitions_url + "/{partition}.json",
+                        endpoint=openapi_partition,
+                        include_in_schema=False,
+                    )
+                )
         if openapi_url and docs_url:
 
             openapi_url = openapi_url
@@ -342,8 +541,14 @@ class App:
                 # see above for note on why we get root_path from the request
                 root_path: str = req.scope.get("root_path", "").rstrip("/")  # type: ignore  # for Pylance
                 full_openapi_url = root_path + openapi_url  # type: ignore[operator]
+                full_partitions_url = root_path + partitions_url
                 return get_swagger_ui_html(
                     openapi_url=full_openapi_url,
+                    openapi_urls=[
+                        (partition, f"{full_partitions_url}/{quote(partition)}.json")
+                        for partition in self.get_openapi_partitions()
+                    ]
+                    or None,
                     title=f"{self._openapi_info.title} - Swagger UI",
                     oauth2_redirect_url=None,
                     init_oauth=None,
@@ -377,10 +582,13 @@ def _build_middleware_stack(
 
     error_handler = None
     for hdlr in exception_handlers:
+        handler = hdlr.handler
+        if not hdlr.sync_to_thread and not asyncio.iscoroutinefunction(handler):
+            handler = _call_inline(handler)
         if hdlr.exc in (500, Exception):
-            error_handler = hdlr.handler
+            error_handler = handler
         else:
-            exc_handler_mapping[hdlr.exc] = hdlr.handler
+            exc_handler_mapping[hdlr.exc] = handler
 
     return (
         Middleware(ServerErrorMiddleware, handler=error_handler, debug=debug),
@@ -389,6 +597,18 @@ def _build_middleware_stack(
     )
 
 
+def _call_inline(
+    handler: typing.Callable[..., typing.Any]
+) -> typing.Callable[..., typing.Awaitable[typing.Any]]:
+    # Starlette runs sync exception handlers in a thread
+    # so we present them as async functions to call them directly
+    @functools.wraps(handler)
+    async def call_inline(request: Request, exc: Exception) -> typing.Any:
+        return handler(request, exc)
+
+    return call_inline
+
+
 def _wrap_lifespan_as_async_generator(
     lifespan: typing.Callable[..., typing.AsyncContextManager[None]]
 ) -> typing.Callable[..., typing.AsyncIterator[None]]:
@@ -409,7 +629,9 @@ def _wrap_lifespan_as_async_generator(
     return gen
 
 
-def _register_framework_dependencies(container: Container, app: App):
+def _register_framework_dependencies(
+    container: Container, app: App, process_pool_max_workers: typing.Optional[int]
+):
     container.bind(
         bind_by_type(
             Dependent(Request, scope="connection", wire=False),
@@ -468,3 +690,37 @@ def _register_framework_dependencies(container: Container, app: App):
             covariant=True,
         )
     )
+    container.bind(
+        bind_by_type(
+            Dependent(
+                process_pool_lifespan(process_pool_max_workers),
+                scope="app",
+                wire=False,
+            ),
+            ProcessPool,
+        )
+    )
+    container.bind(
+        bind_by_type(
+            Dependent(
+                lambda: app.thread_pools,
+                scope="app",
+                # not cached so that it works even if the lifespan never ran
+                use_cache=False,
+                wire=False,
+            ),
+            ThreadPools,
+        )
+    )
+    single_flights = SingleFlights()
+    container.bind(
+        bind_by_type(
+            Dependent(
+                lambda: single_flights,
+                scope="app",
+                use_cache=False,
+                wire=False,
+            ),
+            SingleFlights,
+        )
+    )
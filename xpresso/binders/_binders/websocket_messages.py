@@ -0,0 +1,149 @@
+import inspect
+import typing
+
+from pydantic import BaseConfig
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.fields import ModelField
+from starlette.requests import HTTPConnection
+from starlette.websockets import WebSocket, WebSocketState
+
+from xpresso._utils.asgi import XpressoWebSocketExtension
+from xpresso._utils.typing import Annotated, get_args, get_origin
+from xpresso.binders._binders.json_body import SupportsJsonDecoder
+from xpresso.binders.api import ModelNameMap, SupportsExtractor, SupportsOpenAPI
+from xpresso.exceptions import WebSocketValidationError
+from xpresso.openapi import models as openapi_models
+
+
+def _get_message_type(annotation: typing.Any) -> typing.Any:
+    if get_origin(annotation) is Annotated:
+        annotation = next(iter(get_args(annotation)))
+    args = get_args(annotation)
+    if not args:
+        raise TypeError(
+            "WebSocket messages must be annotated as an async iterator of messages"
+            f", like AsyncIterator[Model], not {annotation}"
+        )
+    return args[0]
+
+
+class _Messages:
+    __slots__ = ("ws", "extractor", "message_hook")
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        extractor: "Extractor",
+        message_hook: typing.Optional[typing.Callable[[], typing.Awaitable[None]]],
+    ) -> None:
+        self.ws = ws
+        self.extractor = extractor
+        self.message_hook = message_hook
+
+    def __aiter__(self) -> "_Messages":
+        return self
+
+    async def __anext__(self) -> typing.Any:
+        ws = self.ws
+        if ws.application_state == WebSocketState.CONNECTING:
+            await ws.accept()
+        if ws.client_state == WebSocketState.DISCONNECTED:
+            raise StopAsyncIteration
+        message = await ws.receive()
+        if message["type"] == "websocket.disconnect":
+            raise StopAsyncIteration
+        if self.message_hook is not None:
+            await self.message_hook()
+        payload = message.get("text", None)
+        if payload is None:
+            payload = message["bytes"]
+        return self.extractor.validate(payload)
+
+
+class Extractor(typing.NamedTuple):
+    field: ModelField
+    decoder: typing.Optional[SupportsJsonDecoder]
+    close_code: int
+
+    def __hash__(self) -> int:
+        return hash(("websocket_messages", self.close_code))
+
+    def __eq__(self, __o: object) -> bool:
+        # type_ is only the inner type (int for List[int])
+        return (
+            isinstance(__o, Extractor)
+            and __o.field.outer_type_ == self.field.outer_type_
+            and __o.decoder is self.decoder
+            and __o.close_code == self.close_code
+        )
+
+    def validate(self, payload: typing.Union[str, bytes]) -> typing.Any:
+        loc = ("message",)
+        value: typing.Any = payload
+        if self.decoder is not None:
+            try:
+                value = self.decoder(payload)
+            except Exception as e:
+                raise WebSocketValidationError(
+                    [
+                        ErrorWrapper(
+                            exc=TypeError("Message could not be decoded"), loc=loc
+                        )
+                    ],
+                    close_code=self.close_code,
+                ) from e
+        val, err_or_errors = self.field.validate(value, {}, loc=loc)
+        if err_or_errors:
+            errors: typing.List[ErrorWrapper]
+            if isinstance(err_or_errors, ErrorWrapper):
+                errors = [err_or_errors]
+            else:
+                errors = typing.cast(typing.List[ErrorWrapper], err_or_errors)
+            raise WebSocketValidationError(errors, close_code=self.close_code)
+        return val
+
+    async def extract(
+        self, connection: HTTPConnection
+    ) -> typing.AsyncIterator[typing.Any]:
+        assert isinstance(connection, WebSocket)
+        xpresso_scope: XpressoWebSocketExtension = connection.scope["extensions"][
+            "xpresso"
+        ]
+        return _Messages(connection, self, xpresso_scope.message_hook)
+
+
+class ExtractorMarker(typing.NamedTuple):
+    decoder: typing.Optional[SupportsJsonDecoder]
+    close_code: int
+
+    def register_parameter(self, param: inspect.Parameter) -> SupportsExtractor:
+        # build the field once per route so that validating a message
+        # doesn't need to figure out how to validate this type again
+        field = ModelField.infer(
+            name="message",
+            value=...,
+            annotation=_get_message_type(param.annotation),
+            class_validators={},
+            config=BaseConfig,
+        )
+        return Extractor(field=field, decoder=self.decoder, close_code=self.close_code)
+
+
+class OpenAPI(typing.NamedTuple):
+    # WebSockets are not part of OpenAPI documents
+
+    def get_models(self) -> typing.List[type]:
+        return []
+
+    def modify_operation_schema(
+        self,
+        model_name_map: ModelNameMap,
+        operation: openapi_models.Operation,
+        components: openapi_models.Components,
+    ) -> None:
+        pass
+
+
+class OpenAPIMarker(typing.NamedTuple):
+    def register_parameter(self, param: inspect.Parameter) -> SupportsOpenAPI:
+        return OpenAPI()
@@ -0,0 +1,309 @@
+import json
+import typing
+from types import TracebackType
+
+import anyio
+from anyio.abc import TaskStatus
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from starlette.status import WS_1013_TRY_AGAIN_LATER
+from starlette.types import Message
+from starlette.websockets import WebSocket, WebSocketState
+
+from xpresso._utils.typing import Protocol
+from xpresso.encoders import JsonableEncoder
+
+Payload = typing.Union[str, bytes]
+
+_ENCODER = JsonableEncoder()
+
+
+def encode_json(message: typing.Any) -> Payload:
+    return json.dumps(_ENCODER(message), separators=(",", ":"))
+
+
+class BroadcastBackend(Protocol):
+    """Moves encoded messages between publishers and the BroadcastHubs listening to them.
+
+    To fan out across processes implement this on top of an external broker
+    (like Redis pub/sub): `publish()` sends a message to the broker and
+    `listen()` yields the messages the broker delivers for subscribed channels.
+    """
+
+    async def publish(self, channel: str, message: Payload) -> None:
+        ...
+
+    async def subscribe(self, channel: str) -> None:
+        """Called when the first local subscriber joins a channel"""
+        ...
+
+    async def unsubscribe(self, channel: str) -> None:
+        """Called when the last local subscriber leaves a channel"""
+        ...
+
+    def listen(self) -> typing.AsyncIterator[typing.Tuple[str, Payload]]:
+        """Start listening for messages on subscribed channels.
+
+        Messages published after this is called must not be missed,
+        even if iteration hasn't started yet.
+        """
+        ...
+
+
+class InMemoryBackend:
+    """A backend for a single process, also useful as a stand-in for external brokers in tests.
+
+    Like a broker, every hub listening to the backend gets its own copy of each message
+    (in a buffer of up to `max_buffer` messages).
+    """
+
+    def __init__(self, max_buffer: int = 1024) -> None:
+        self.max_buffer = max_buffer
+        # channels that at least one hub is subscribed to
+        self.channels: typing.Set[str] = set()
+        self._subscriptions: typing.Dict[str, int] = {}
+        self._listeners: typing.List[
+            MemoryObjectSendStream[typing.Tuple[str, Payload]]
+        ] = []
+
+    async def publish(self, channel: str, message: Payload) -> None:
+        # like a broker, only deliver messages someone is listening for
+        if channel not in self.channels:
+            return
+        if not self._listeners:
+            # nothing would ever take the message out of the buffer
+            raise RuntimeError(
+                "No BroadcastHub is listening to this backend."
+                " Perhaps the App's lifespan is not running?"
+            )
+        for listener in tuple(self._listeners):
+            await listener.send((channel, message))
+
+    async def subscribe(self, channel: str) -> None:
+        self._subscriptions[channel] = self._subscriptions.get(channel, 0) + 1
+        self.channels.add(channel)
+
+    async def unsubscribe(self, channel: str) -> None:
+        remaining = self._subscriptions.pop(channel, 1) - 1
+        if remaining:
+            self._subscriptions[channel] = remaining
+        else:
+            self.channels.discard(channel)
+
+    def listen(self) -> typing.AsyncIterator[typing.Tuple[str, Payload]]:
+        send_stream, receive_stream = anyio.create_memory_object_stream(self.max_buffer)
+        # register right away, not once iteration starts,
+        # so that nothing published after this call is missed
+        self._listeners.append(send_stream)
+        return self._listen(send_stream, receive_stream)
+
+    async def _listen(
+        self,
+        send_stream: MemoryObjectSendStream[typing.Tuple[str, Payload]],
+        receive_stream: MemoryObjectReceiveStream[typing.Tuple[str, Payload]],
+    ) -> typing.AsyncIterator[typing.Tuple[str, Payload]]:
+        try:
+            async with receive_stream:
+                async for channel, message in receive_stream:
+                    yield channel, message
+        finally:
+            self._listeners.remove(send_stream)
+            send_stream.close()
+
+
+class Subscription:
+    """A WebSocket's subscription to one or more channels of a BroadcastHub.
+
+    Messages for the subscription are buffered in a queue of up to `max_queue` messages
+    until `run()` sends them.
+    If the queue is full when a message arrives, the WebSocket is considered too slow
+    to keep up: it is evicted from the hub and `run()` closes the connection.
+    """
+
+    def __init__(
+        self,
+        hub: "BroadcastHub",
+        ws: WebSocket,
+        channels: typing.Sequence[str],
+        max_queue: int,
+    ) -> None:
+        self.hub = hub
+        self.ws = ws
+        self.channels = tuple(channels)
+        self.evicted = False
+        self._cancel_scope: typing.Optional[anyio.CancelScope] = None
+        self._send_stream: MemoryObjectSendStream[Message]
+        self._send_stream, self._receive_stream = anyio.create_memory_object_stream(
+            max_queue
+        )
+
+    async def __aenter__(self) -> "Subscription":
+        if self.ws.application_state == WebSocketState.CONNECTING:
+            await self.ws.accept()
+        await self.hub._add(self)
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]],
+        exc_value: typing.Optional[BaseException],
+        traceback: typing.Optional[TracebackType],
+    ) -> None:
+        self._send_stream.close()
+        await self.hub._remove(self)
+
+    def _deliver(self, message: Message) -> None:
+        try:
+            self._send_stream.send_nowait(message)
+        except anyio.WouldBlock:
+            self._evict()
+        except anyio.ClosedResourceError:
+            pass
+
+    def _evict(self) -> None:
+        self.evicted = True
+        self.hub.evicted += 1
+        self._send_stream.close()
+        self.hub._discard(self)
+        if self._cancel_scope is not None:
+            # don't wait for the client to accept what we are sending it
+            self._cancel_scope.cancel()
+
+    async def run(self) -> None:
+        """Send messages to the client until the subscription is evicted"""
+        with anyio.CancelScope() as self._cancel_scope:
+            if self.evicted:
+                self._cancel_scope.cancel()
+            async for message in self._receive_stream:
+                await self.ws.send(message)
+        if self.evicted and self.ws.application_state == WebSocketState.CONNECTED:
+            await self.ws.close(self.hub.eviction_close_code)
+
+
+class BroadcastHub:
+    """Fan out messages to the WebSockets subscribed to a channel.
+
+    Messages are encoded once when they are published,
+    and the same encoded frame is then queued for every subscriber.
+    Each subscriber has its own bounded queue so that one slow client can't
+    hold up the others or use up memory; when it falls `max_queue` messages
+    behind it is evicted (and disconnected with `eviction_close_code`).
+
+    Pass the hub to `App(broadcast_hub=...)`, which runs it while the App is running
+    and makes it injectable into endpoints by type.
+    By default messages only reach subscribers in the same process,
+    pass a `backend` to fan out through an external broker.
+    """
+
+    def __init__(
+        self,
+        backend: typing.Optional[BroadcastBackend] = None,
+        *,
+        max_queue: int = 64,
+        encoder: typing.Callable[[typing.Any], Payload] = encode_json,
+        eviction_close_code: int = WS_1013_TRY_AGAIN_LATER,
+    ) -> None:
+        if max_queue < 1:
+            raise ValueError("max_queue must be at least 1")
+        self.backend: BroadcastBackend = backend or InMemoryBackend()
+        self.max_queue = max_queue
+        self.encoder = encoder
+        self.eviction_close_code = eviction_close_code
+        # number of subscriptions evicted for being too slow
+        self.evicted = 0
+        self._subscribers: typing.Dict[str, typing.Set[Subscription]] = {}
+        # channels we are subscribed to on the backend, which can outlive
+        # their local subscribers until the last one (or an evicted one) exits
+        self._backend_channels: typing.Set[str] = set()
+
+    async def publish(self, channel: str, message: typing.Any) -> None:
+        """Send a message to every subscriber of channel.
+
+        str and bytes are sent as text and binary messages,
+        anything else is encoded with `encoder` first.
+        """
+        if not isinstance(message, (str, bytes)):
+            message = self.encoder(message)
+        await self.backend.publish(channel, message)
+
+    def subscribe(self, ws: WebSocket, *channels: str) -> Subscription:
+        """Subscribe ws to channels, use this as an async context manager"""
+        return Subscription(self, ws, channels, self.max_queue)
+
+    async def serve(self, ws: WebSocket, *channels: str) -> None:
+        """Send messages on channels to ws until it disconnects or is evicted.
+
+        Anything the client sends is ignored.
+        """
+        async with self.subscribe(ws, *channels) as subscription:
+            async with anyio.create_task_group() as tg:
+
+                async def wait_for_disconnect() -> None:
+                    while True:
+                        message = await ws.receive()
+                        if message["type"] == "websocket.disconnect":
+                            tg.cancel_scope.cancel()
+                            return
+
+                tg.start_soon(wait_for_disconnect)
+                await subscription.run()
+                tg.cancel_scope.cancel()
+
+    async def run(self, *, task_status: TaskStatus = anyio.TASK_STATUS_IGNORED) -> None:
+        """Deliver messages from the backend to subscribers until cancelled.
+
+        Use `await task_group.start(hub.run)` to wait until the hub is listening.
+        """
+        subscribers = self._subscribers
+        messages = self.backend.listen()
+        task_status.started()
+        async for channel, payload in messages:
+            channel_subscribers = subscribers.get(channel, None)
+            if not channel_subscribers:
+                continue
+            # built once and shared by all subscribers
+            message: Message = {"type": "websocket.send"}
+            if isinstance(payload, str):
+                message["text"] = payload
+            else:
+                message["bytes"] = payload
+            for subscription in tuple(channel_subscribers):
+                subscription._deliver(message)
+
+    def subscribers(self, channel: str) -> int:
+        return len(self._subscribers.get(channel, ()))
+
+    async def _add(self, subscription: Subscription) -> None:
+        try:
+            for channel in subscription.channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+                if channel not in self._backend_channels:
+                    # marked first so that concurrent subscribers don't subscribe twice
+                    self._backend_channels.add(channel)
+                    try:
+                        await self.backend.subscribe(channel)
+                    except BaseException:
+                        self._backend_channels.discard(channel)
+                        raise
+        except BaseException:
+            # undo the channels that we did subscribe to
+            with anyio.CancelScope(shield=True):
+                await self._remove(subscription)
+            raise
+
+    def _discard(self, subscription: Subscription) -> None:
+        for channel in subscription.channels:
+            channel_subscribers = self._subscribers.get(channel, None)
+            if channel_subscribers is None:
+                continue
+            channel_subscribers.discard(subscription)
+            if not channel_subscribers:
+                del self._subscribers[channel]
+
+    async def _remove(self, subscription: Subscription) -> None:
+        # evicted subscriptions were already discarded, but the backend
+        # can only be told that their channels are empty from here
+        self._discard(subscription)
+        for channel in subscription.channels:
+            if channel not in self._subscribers and channel in self._backend_channels:
+                self._backend_channels.discard(channel)
+                await self.backend.unsubscribe(channel)
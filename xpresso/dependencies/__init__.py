@@ -1,3 +1,4 @@
+from xpresso.dependencies._cache import TTLCache
 from xpresso.dependencies._dependencies import Depends, Injectable, Singleton
 
-__all__ = ("Depends", "Injectable", "Singleton")
+__all__ = ("Depends", "Injectable", "Singleton", "TTLCache")
@@ -0,0 +1,185 @@
+import inspect
+import logging
+import time
+import typing
+from collections import OrderedDict
+
+import anyio
+import anyio.abc
+from di.dependent import Marker
+
+from xpresso._utils.typing import Annotated
+from xpresso.dependencies._single_flight import SingleFlight
+from xpresso.dependencies._wrap import (
+    CACHE_TASK_GROUP_PARAMETER,
+    WrapperMemo,
+    arguments_key,
+    as_coroutine_function,
+    copy_signature,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def _get_refresh_task_group() -> typing.AsyncIterator[anyio.abc.TaskGroup]:
+    # an "app" scoped task group used to refresh stale values in the background
+    async with anyio.create_task_group() as tg:
+        yield tg
+        tg.cancel_scope.cancel()
+
+
+_TaskGroupDependency = Annotated[
+    anyio.abc.TaskGroup, Marker(_get_refresh_task_group, scope="app")
+]
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "stale_until", "refreshing")
+
+    def __init__(self, value: typing.Any, expires_at: float, stale_until: float):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.refreshing = False
+
+
+class TTLCache:
+    """An app wide cache for dependency values that expire after `ttl` seconds.
+
+    Values are keyed by the dependency and the values of its parameters,
+    so parameters must be hashable and should be stable across requests
+    (e.g. a config object, not the Request).
+
+    If `stale_while_revalidate` is set, expired values keep being served for that
+    many seconds while a single refresh runs in the background.
+    Otherwise the first request after the value expires recomputes it
+    (concurrent requests all recompute it unless the dependency uses `single_flight`).
+
+    Like "app" scoped dependencies, this requires the App's lifespan to be running.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        *,
+        maxsize: int = 128,
+        stale_while_revalidate: float = 0.0,
+        timer: typing.Callable[[], float] = time.monotonic,
+    ) -> None:
+        if ttl <= 0:
+            raise ValueError("ttl must be greater than 0")
+        if maxsize <= 0:
+            raise ValueError("maxsize must be greater than 0")
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.stale_while_revalidate = stale_while_revalidate
+        self._timer = timer
+        self._entries: "OrderedDict[typing.Hashable, _Entry]" = OrderedDict()
+        self._wrappers = WrapperMemo()
+        self._flights = SingleFlight()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _set(self, key: typing.Hashable, value: typing.Any) -> None:
+        now = self._timer()
+        expires_at = now + self.ttl
+        self._entries[key] = _Entry(
+            value, expires_at, expires_at + self.stale_while_revalidate
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def _refresh(
+        self,
+        key: typing.Hashable,
+        entry: _Entry,
+        compute: typing.Callable[[], typing.Awaitable[typing.Any]],
+    ) -> None:
+        try:
+            self._set(key, await compute())
+        except Exception:
+            # keep serving the stale value until it is no longer usable
+            logger.exception("Failed to refresh cached dependency value")
+        finally:
+            entry.refreshing = False
+
+    def wrap(
+        self,
+        call: typing.Callable[..., typing.Any],
+        sync_to_thread: bool = False,
+        single_flight: bool = False,
+    ) -> typing.Callable[..., typing.Awaitable[typing.Any]]:
+        """Wrap a dependency so that its values are stored in this cache.
+
+        If `single_flight` is True concurrent cache misses for the same key share
+        a single computation.
+        """
+        return self._wrappers.get_or_wrap(
+            (call, sync_to_thread, single_flight),
+            lambda: self._wrap(call, sync_to_thread, single_flight),
+        )
+
+    def _wrap(
+        self,
+        call: typing.Callable[..., typing.Any],
+        sync_to_thread: bool,
+        single_flight: bool,
+    ) -> typing.Callable[..., typing.Awaitable[typing.Any]]:
+        compute = as_coroutine_function(call, sync_to_thread)
+
+        async def compute_and_set(
+            key: typing.Hashable, args: typing.Any, kwargs: typing.Any
+        ) -> typing.Any:
+            value = await compute(*args, **kwargs)
+            self._set(key, value)
+            return value
+
+        async def cached(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+            task_group: anyio.abc.TaskGroup = kwargs.pop(CACHE_TASK_GROUP_PARAMETER)
+            key = (call, arguments_key(args, kwargs))
+            try:
+                entry = self._entries.get(key, None)
+            except TypeError:
+                raise TypeError(
+                    f"The parameters of cached dependency {call} must be hashable"
+                ) from None
+            if entry is not None:
+                now = self._timer()
+                if now < entry.expires_at:
+                    self._entries.move_to_end(key)
+                    return entry.value
+                if now < entry.stale_until:
+                    if not entry.refreshing:
+                        entry.refreshing = True
+                        task_group.start_soon(
+                            self._refresh,
+                            key,
+                            entry,
+                            lambda: compute(*args, **kwargs),
+                        )
+                    return entry.value
+            if single_flight:
+                return await self._flights.do(
+                    key, lambda: compute_and_set(key, args, kwargs)
+                )
+            return await compute_and_set(key, args, kwargs)
+
+        # expose the original parameters to the dependency injection system
+        # plus the task group used for refreshes
+        copy_signature(
+            cached,
+            call,
+            [
+                inspect.Parameter(
+                    CACHE_TASK_GROUP_PARAMETER,
+                    inspect.Parameter.KEYWORD_ONLY,
+                    annotation=_TaskGroupDependency,
+                )
+            ],
+        )
+        return cached
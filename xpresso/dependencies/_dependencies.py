@@ -7,13 +7,19 @@ from di.dependent import Injectable as InjectableBase
 from di.dependent import Marker
 
 from xpresso._utils.typing import Literal
+from xpresso.dependencies._cache import TTLCache
+from xpresso.dependencies._process import run_in_process as wrap_run_in_process
+from xpresso.dependencies._single_flight import single_flight as wrap_single_flight
+from xpresso.dependencies._threadpool import run_in_thread_pool
 
-Scope = Literal["app", "connection", "endpoint"]
+# "message" is only available in WebSocketRoute's message_dependencies
+Scope = Literal["app", "connection", "endpoint", "message"]
 Scopes = (
     "app",
     "connection",
     "endpoint",
 )
+MessageScopes = (*Scopes, "message")
 
 
 @typing.overload
@@ -24,6 +30,10 @@ def Depends(
     wire: bool = ...,
     sync_to_thread: bool = ...,
     scope: Scope = ...,
+    cache: typing.Optional[TTLCache] = ...,
+    single_flight: typing.Union[bool, typing.Sequence[str]] = ...,
+    thread_pool: typing.Optional[str] = ...,
+    run_in_process: bool = ...,
 ) -> "BoundDependsMarker":
     ...
 
@@ -35,6 +45,10 @@ def Depends(
     wire: bool = ...,
     sync_to_thread: bool = ...,
     scope: Scope = ...,
+    cache: typing.Optional[TTLCache] = ...,
+    single_flight: typing.Union[bool, typing.Sequence[str]] = ...,
+    thread_pool: typing.Optional[str] = ...,
+    run_in_process: bool = ...,
 ) -> "DependsMarker[None]":
     ...
 
@@ -46,9 +60,14 @@ def Depends(
     wire: bool = True,
     sync_to_thread: bool = False,
     scope: typing.Optional[Scope] = None,
+    cache: typing.Optional[TTLCache] = None,
+    single_flight: typing.Union[bool, typing.Sequence[str]] = False,
+    thread_pool: typing.Optional[str] = None,
+    run_in_process: bool = False,
 ) -> typing.Any:
-    if sync_to_thread:
-        call = as_async(call)
+    call = _wrap_call(
+        call, sync_to_thread, cache, single_flight, thread_pool, run_in_process
+    )
     return DependsMarker(
         call=call,
         use_cache=use_cache,
@@ -57,6 +76,46 @@ def Depends(
     )
 
 
+def _wrap_call(
+    call: typing.Any,
+    sync_to_thread: bool,
+    cache: typing.Optional[TTLCache],
+    single_flight: typing.Union[bool, typing.Sequence[str]],
+    thread_pool: typing.Optional[str],
+    run_in_process: bool,
+) -> typing.Any:
+    if cache is not None or single_flight or thread_pool is not None or run_in_process:
+        if call is None:
+            raise ValueError(
+                "cache, single_flight, thread_pool and run_in_process can only be used"
+                " if you explicitly declare the target function"
+            )
+        if thread_pool is not None and run_in_process:
+            raise ValueError("thread_pool and run_in_process are mutually exclusive")
+        if thread_pool is not None:
+            call = run_in_thread_pool(call, thread_pool)
+            sync_to_thread = False
+        elif run_in_process:
+            call = wrap_run_in_process(call)
+            sync_to_thread = False
+        if cache is not None:
+            return cache.wrap(
+                call, sync_to_thread=sync_to_thread, single_flight=bool(single_flight)
+            )
+        return (
+            wrap_single_flight(
+                call,
+                sync_to_thread=sync_to_thread,
+                key=None if isinstance(single_flight, bool) else single_flight,
+            )
+            if single_flight
+            else call
+        )
+    if sync_to_thread:
+        return as_async(call)
+    return call
+
+
 DependencyType = typing.TypeVar(
     "DependencyType", bound=typing.Optional[DependencyProvider]
 )
@@ -71,6 +130,10 @@ class DependsMarker(Marker, typing.Generic[DependencyType]):
         wire: bool = True,
         sync_to_thread: bool = False,
         scope: typing.Optional[Scope] = None,
+        cache: typing.Optional[TTLCache] = None,
+        single_flight: typing.Union[bool, typing.Sequence[str]] = False,
+        thread_pool: typing.Optional[str] = None,
+        run_in_process: bool = False,
     ) -> None:
         super().__init__(
             call=call,
@@ -79,10 +142,28 @@ class DependsMarker(Marker, typing.Generic[DependencyType]):
             wire=wire,
         )
         self.sync_to_thread = sync_to_thread
+        self.cache = cache
+        self.single_flight = single_flight
+        self.thread_pool = thread_pool
+        self.run_in_process = run_in_process
 
     def as_dependent(self) -> Dependent[DependencyType]:
         call: "typing.Optional[DependencyProvider]"
-        if self.sync_to_thread:
+        if (
+            self.cache is not None
+            or self.single_flight
+            or self.thread_pool
+            or self.run_in_process
+        ):
+            call = _wrap_call(
+                self.call,
+                self.sync_to_thread,
+                self.cache,
+                self.single_flight,
+                self.thread_pool,
+                self.run_in_process,
+            )
+        elif self.sync_to_thread:
             if not self.call:
                 raise ValueError(
                     "sync_to_thread can only be used if you explicitly declare the target function"
@@ -110,8 +191,11 @@ class Injectable(InjectableBase):
         call: typing.Optional[DependencyProvider] = None,
         scope: typing.Optional[Scope] = None,
         use_cache: bool = True,
+        cache: typing.Optional[TTLCache] = None,
         **kwargs: typing.Any,
     ) -> None:
+        if cache is not None:
+            call = cache.wrap(call or cls)
         return super().__init_subclass__(call, scope, use_cache, **kwargs)
 
 
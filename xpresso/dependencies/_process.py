@@ -0,0 +1,105 @@
+import inspect
+import os
+import typing
+from concurrent.futures import ProcessPoolExecutor
+
+import anyio
+import anyio.to_thread
+from di.dependent import Marker
+
+from xpresso._utils.typing import Annotated
+from xpresso.dependencies._wrap import (
+    PROCESS_POOL_PARAMETER,
+    WrapperMemo,
+    copy_signature,
+)
+
+
+class ProcessPool:
+    """The process pool used by dependencies and endpoints with run_in_process=True.
+
+    It is an "app" scoped dependency: the App creates it on startup
+    and waits for work that is in flight to finish on shutdown.
+    """
+
+    __slots__ = ("executor", "limiter")
+
+    def __init__(self, executor: ProcessPoolExecutor, max_workers: int) -> None:
+        self.executor = executor
+        # each call blocks a thread until the result comes back
+        # so we don't let more calls through than there are worker processes
+        self.limiter = anyio.CapacityLimiter(max_workers)
+
+    async def run(
+        self,
+        call: typing.Callable[..., typing.Any],
+        args: typing.Tuple[typing.Any, ...],
+        kwargs: typing.Mapping[str, typing.Any],
+    ) -> typing.Any:
+        def submit_and_wait() -> typing.Any:
+            return self.executor.submit(call, *args, **kwargs).result()
+
+        return await anyio.to_thread.run_sync(submit_and_wait, limiter=self.limiter)
+
+
+def process_pool_lifespan(
+    max_workers: typing.Optional[int],
+) -> typing.Callable[[], typing.AsyncIterator[ProcessPool]]:
+    async def lifespan() -> typing.AsyncIterator[ProcessPool]:
+        workers = max_workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(workers)
+        try:
+            yield ProcessPool(executor, workers)
+        finally:
+            # drain the pool without blocking the event loop
+            await anyio.to_thread.run_sync(executor.shutdown)
+
+    return lifespan
+
+
+# the App binds ProcessPool to process_pool_lifespan
+_ProcessPoolDependency = Annotated[ProcessPool, Marker(scope="app")]
+
+_wrappers = WrapperMemo()
+
+
+def run_in_process(
+    call: typing.Callable[..., typing.Any]
+) -> typing.Callable[..., typing.Awaitable[typing.Any]]:
+    """Wrap a sync callable so that it gets executed in the App's process pool.
+
+    The callable, its arguments and its return value must be picklable.
+    Its parameters are still resolved (and validated) in the main process.
+    """
+    return _wrappers.get_or_wrap(call, lambda: _wrap_in_process(call))
+
+
+def _wrap_in_process(
+    call: typing.Callable[..., typing.Any]
+) -> typing.Callable[..., typing.Awaitable[typing.Any]]:
+    if (
+        inspect.isgeneratorfunction(call)
+        or inspect.isasyncgenfunction(call)
+        or inspect.iscoroutinefunction(call)
+        or inspect.iscoroutinefunction(getattr(call, "__call__", None))
+    ):
+        raise TypeError(
+            "run_in_process can only be used with sync callables that do not have teardown"
+        )
+
+    async def wrapper(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        pool: ProcessPool = kwargs.pop(PROCESS_POOL_PARAMETER)
+        return await pool.run(call, args, kwargs)
+
+    copy_signature(
+        wrapper,
+        call,
+        [
+            inspect.Parameter(
+                PROCESS_POOL_PARAMETER,
+                inspect.Parameter.KEYWORD_ONLY,
+                annotation=_ProcessPoolDependency,
+            )
+        ],
+    )
+    return wrapper
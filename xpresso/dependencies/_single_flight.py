@@ -0,0 +1,160 @@
+import inspect
+import typing
+import weakref
+
+import anyio
+from di.dependent import Marker
+
+from xpresso._utils.typing import Annotated
+from xpresso.dependencies._wrap import (
+    SINGLE_FLIGHTS_PARAMETER,
+    WrapperMemo,
+    arguments_key,
+    as_coroutine_function,
+    copy_signature,
+)
+
+T = typing.TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("done", "value", "error", "completed")
+
+    def __init__(self) -> None:
+        self.done = anyio.Event()
+        self.value: typing.Any = None
+        self.error: typing.Optional[Exception] = None
+        self.completed = False
+
+
+class SingleFlight:
+    """De-duplicate concurrent computations of the same key.
+
+    While a computation for a key is in flight, other callers for the same key
+    wait for it and receive its result (or exception) instead of computing it again.
+    If the computation is cancelled, one of the waiters takes over.
+    """
+
+    __slots__ = ("_flights",)
+
+    def __init__(self) -> None:
+        self._flights: "typing.Dict[typing.Hashable, _Flight]" = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(
+        self,
+        key: typing.Hashable,
+        compute: typing.Callable[[], typing.Awaitable[T]],
+    ) -> T:
+        flight = self._flights.get(key, None)
+        while flight is not None:
+            await flight.done.wait()
+            if flight.completed:
+                if flight.error is not None:
+                    raise flight.error
+                return typing.cast(T, flight.value)
+            # the computation was cancelled, try again
+            flight = self._flights.get(key, None)
+        flight = self._flights[key] = _Flight()
+        try:
+            flight.value = await compute()
+        except Exception as e:
+            flight.error = e
+            flight.completed = True
+            raise
+        else:
+            flight.completed = True
+        finally:
+            del self._flights[key]
+            flight.done.set()
+        return typing.cast(T, flight.value)
+
+
+class SingleFlights:
+    """The in flight computations of an App's single flight dependencies.
+
+    The App binds this type to its own instance so that
+    separate Apps never share in flight computations.
+    """
+
+    __slots__ = ("_flights",)
+
+    def __init__(self) -> None:
+        self._flights: "weakref.WeakKeyDictionary[typing.Callable[..., typing.Any], SingleFlight]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def get(self, wrapper: typing.Callable[..., typing.Any]) -> SingleFlight:
+        flights = self._flights.get(wrapper, None)
+        if flights is None:
+            flights = self._flights[wrapper] = SingleFlight()
+        return flights
+
+
+# the App binds SingleFlights to its own instance
+_SingleFlightsDependency = Annotated[SingleFlights, Marker(scope="app")]
+
+_wrappers = WrapperMemo()
+
+
+def single_flight(
+    call: typing.Callable[..., typing.Any],
+    sync_to_thread: bool = False,
+    key: typing.Optional[typing.Sequence[str]] = None,
+) -> typing.Callable[..., typing.Awaitable[typing.Any]]:
+    """Wrap a dependency so that concurrent connections share in flight computations.
+
+    Computations are keyed by the dependency and the values of its parameters,
+    or only the parameters named in `key` if given.
+    """
+    key_names = None if key is None else tuple(key)
+    return _wrappers.get_or_wrap(
+        (call, sync_to_thread, key_names),
+        lambda: _wrap_single_flight(call, sync_to_thread, key_names),
+    )
+
+
+def _wrap_single_flight(
+    call: typing.Callable[..., typing.Any],
+    sync_to_thread: bool,
+    key_names: typing.Optional[typing.Tuple[str, ...]],
+) -> typing.Callable[..., typing.Awaitable[typing.Any]]:
+    compute = as_coroutine_function(call, sync_to_thread)
+    sig = inspect.signature(call)
+    if key_names is not None:
+        unknown = set(key_names).difference(sig.parameters)
+        if unknown:
+            raise ValueError(
+                f"single_flight key parameters {sorted(unknown)} are not parameters of {call}"
+            )
+
+    async def wrapper(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        flights = kwargs.pop(SINGLE_FLIGHTS_PARAMETER).get(wrapper)
+        flight_key: typing.Hashable
+        if key_names is None:
+            flight_key = arguments_key(args, kwargs)
+        else:
+            arguments = sig.bind_partial(*args, **kwargs).arguments
+            flight_key = tuple(arguments.get(name, None) for name in key_names)
+        try:
+            hash(flight_key)
+        except TypeError:
+            raise TypeError(
+                f"The parameters of single flight dependency {call} must be hashable"
+            ) from None
+        return await flights.do(flight_key, lambda: compute(*args, **kwargs))
+
+    copy_signature(
+        wrapper,
+        call,
+        [
+            inspect.Parameter(
+                SINGLE_FLIGHTS_PARAMETER,
+                inspect.Parameter.KEYWORD_ONLY,
+                annotation=_SingleFlightsDependency,
+            )
+        ],
+    )
+    return wrapper
@@ -0,0 +1,128 @@
+import contextlib
+import inspect
+import typing
+
+import anyio
+import anyio.to_thread
+from di.dependent import Marker
+
+from xpresso._utils.typing import Annotated
+from xpresso.dependencies._wrap import (
+    THREAD_POOLS_PARAMETER,
+    WrapperMemo,
+    copy_signature,
+)
+from xpresso.threadpool import ThreadPool
+
+
+class ThreadPools(typing.Dict[str, ThreadPool]):
+    """An App's thread pools by name.
+
+    The App binds this type to its own pools so that each App
+    runs the calls wrapped by run_in_thread_pool in its own pools.
+    """
+
+
+# the App binds ThreadPools to App.thread_pools
+_ThreadPoolsDependency = Annotated[ThreadPools, Marker(scope="app")]
+
+_wrappers = WrapperMemo()
+
+
+def run_in_thread_pool(
+    call: typing.Callable[..., typing.Any], thread_pool: str
+) -> typing.Callable[..., typing.Any]:
+    """Wrap a sync callable so that it gets executed in the named thread pool.
+
+    The pool is looked up in the App's pools, which are injected into the wrapper.
+    """
+    return _wrappers.get_or_wrap(
+        (call, thread_pool), lambda: _wrap_in_thread_pool(call, thread_pool)
+    )
+
+
+def _wrap_in_thread_pool(
+    call: typing.Callable[..., typing.Any], thread_pool: str
+) -> typing.Callable[..., typing.Any]:
+    if (
+        inspect.isasyncgenfunction(call)
+        or inspect.iscoroutinefunction(call)
+        or inspect.iscoroutinefunction(getattr(call, "__call__", None))
+    ):
+        raise TypeError("thread_pool can only be used with sync callables")
+
+    def get_pool(pools: typing.Mapping[str, ThreadPool]) -> ThreadPool:
+        try:
+            return pools[thread_pool]
+        except KeyError:
+            raise LookupError(
+                f'Unknown thread pool "{thread_pool}".'
+                " Perhaps you tried to use it outside of an Xpresso App?"
+            ) from None
+
+    wrapped: typing.Callable[..., typing.Any]
+    if inspect.isgeneratorfunction(call):
+        cm_factory = contextlib.contextmanager(call)
+
+        async def wrapped_cm(
+            *args: typing.Any, **kwargs: typing.Any
+        ) -> typing.AsyncIterator[typing.Any]:
+            pool = get_pool(kwargs.pop(THREAD_POOLS_PARAMETER))
+            cm = cm_factory(*args, **kwargs)
+            # only setup goes through the pool (and its statistics),
+            # teardown gets its own limiter like in di so that a full pool
+            # can't keep dependencies from releasing their resources
+            exit_limiter = anyio.CapacityLimiter(1)
+            res = await pool.run_sync(cm.__enter__)
+            try:
+                yield res
+            except Exception as e:
+                ok = bool(
+                    await anyio.to_thread.run_sync(
+                        cm.__exit__, type(e), e, None, limiter=exit_limiter
+                    )
+                )
+                if not ok:
+                    raise e
+            else:
+                await anyio.to_thread.run_sync(
+                    cm.__exit__, None, None, None, limiter=exit_limiter
+                )
+
+        wrapped = wrapped_cm
+    else:
+
+        async def wrapped_callable(
+            *args: typing.Any, **kwargs: typing.Any
+        ) -> typing.Any:
+            pool = get_pool(kwargs.pop(THREAD_POOLS_PARAMETER))
+            return await pool.run_sync(lambda: call(*args, **kwargs))
+
+        wrapped = wrapped_callable
+
+    copy_signature(
+        wrapped,
+        call,
+        [
+            inspect.Parameter(
+                THREAD_POOLS_PARAMETER,
+                inspect.Parameter.KEYWORD_ONLY,
+                annotation=_ThreadPoolsDependency,
+            )
+        ],
+    )
+    setattr(wrapped, "__xpresso_thread_pool__", thread_pool)
+    return wrapped
+
+
+def bind_thread_pools(
+    calls: typing.Iterable[typing.Any],
+    thread_pools: typing.Mapping[str, ThreadPool],
+) -> None:
+    """Check that every call wrapped by run_in_thread_pool uses one of the App's pools"""
+    for call in calls:
+        name: "typing.Optional[str]" = getattr(call, "__xpresso_thread_pool__", None)
+        if name is not None and name not in thread_pools:
+            raise ValueError(
+                f'Unknown thread pool "{name}", did you forget to pass it to App(thread_pools=...)?'
+            )
@@ -0,0 +1,108 @@
+import inspect
+import typing
+import weakref
+
+import anyio.to_thread
+from di._utils.inspect import get_parameters
+
+# keyword parameters that Xpresso's wrappers add to a dependency's signature
+# to have the App's resources injected, they are not inputs of the dependency
+THREAD_POOLS_PARAMETER = "xpresso_thread_pools"
+PROCESS_POOL_PARAMETER = "xpresso_process_pool"
+CACHE_TASK_GROUP_PARAMETER = "xpresso_cache_task_group"
+SINGLE_FLIGHTS_PARAMETER = "xpresso_single_flights"
+_INJECTED_PARAMETERS = frozenset(
+    (
+        THREAD_POOLS_PARAMETER,
+        PROCESS_POOL_PARAMETER,
+        CACHE_TASK_GROUP_PARAMETER,
+        SINGLE_FLIGHTS_PARAMETER,
+    )
+)
+
+_Wrapper = typing.TypeVar("_Wrapper", bound=typing.Callable[..., typing.Any])
+
+
+class WrapperMemo:
+    """Wrappers by the callable they wrap and the options they were made with.
+
+    The dependency injection system identifies dependencies by their callable,
+    so wrapping the same callable twice with the same options must return the
+    same wrapper.
+    Wrappers reference the callable they wrap, so they are held weakly instead:
+    once nothing uses a wrapper anymore, it and its callable can be collected.
+    """
+
+    __slots__ = ("_wrappers",)
+
+    def __init__(self) -> None:
+        self._wrappers: "weakref.WeakValueDictionary[typing.Hashable, typing.Callable[..., typing.Any]]" = (
+            weakref.WeakValueDictionary()
+        )
+
+    def get_or_wrap(
+        self, key: typing.Hashable, wrap: typing.Callable[[], _Wrapper]
+    ) -> _Wrapper:
+        wrapper = self._wrappers.get(key, None)
+        if wrapper is None:
+            wrapper = self._wrappers[key] = wrap()
+        return typing.cast(_Wrapper, wrapper)
+
+
+def arguments_key(
+    args: typing.Tuple[typing.Any, ...], kwargs: typing.Mapping[str, typing.Any]
+) -> typing.Tuple[typing.Any, ...]:
+    """Key a call by its arguments, leaving out the ones injected by Xpresso"""
+    return (
+        args,
+        tuple(item for item in kwargs.items() if item[0] not in _INJECTED_PARAMETERS),
+    )
+
+
+def as_coroutine_function(
+    call: typing.Callable[..., typing.Any], sync_to_thread: bool
+) -> typing.Callable[..., typing.Awaitable[typing.Any]]:
+    if inspect.isgeneratorfunction(call) or inspect.isasyncgenfunction(call):
+        raise TypeError(
+            "Dependencies with teardown cannot be shared between connections"
+        )
+    if inspect.iscoroutinefunction(call) or inspect.iscoroutinefunction(
+        getattr(call, "__call__", None)
+    ):
+        return call
+
+    async def compute(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        if sync_to_thread:
+            return await anyio.to_thread.run_sync(lambda: call(*args, **kwargs))
+        return call(*args, **kwargs)
+
+    return compute
+
+
+def copy_signature(
+    wrapper: typing.Callable[..., typing.Any],
+    call: typing.Callable[..., typing.Any],
+    extra_keyword_parameters: typing.Sequence[inspect.Parameter] = (),
+) -> None:
+    """Make the dependency injection system see `wrapper` as having `call`'s parameters.
+
+    We can't use functools.wraps because the dependency injection system
+    would unwrap the wrapper and treat it as if it were `call` (e.g. a sync function).
+    """
+    params = list(get_parameters(call).values())
+    var_kw = [p for p in params if p.kind is inspect.Parameter.VAR_KEYWORD]
+    params = [p for p in params if p.kind is not inspect.Parameter.VAR_KEYWORD]
+    params = [*params, *extra_keyword_parameters, *var_kw]
+    setattr(wrapper, "__signature__", inspect.Signature(params))
+    wrapper.__annotations__ = {
+        p.name: p.annotation for p in params if p.annotation is not p.empty
+    }
+    wrapper.__doc__ = call.__doc__
+    wrapper.__name__ = getattr(call, "__name__", wrapper.__name__)
+    wrapper.__qualname__ = getattr(call, "__qualname__", wrapper.__qualname__)
+    # used to match dependency overrides against the original callable
+    setattr(wrapper, "__xpresso_wrapped_call__", call)
+    # keep track of which thread pool the call should be executed in
+    thread_pool = getattr(call, "__xpresso_thread_pool__", None)
+    if thread_pool is not None:
+        setattr(wrapper, "__xpresso_thread_pool__", thread_pool)
@@ -1,4 +1,6 @@
-from typing import Awaitable, Callable, Type, TypeVar, Union
+import http
+import json
+from typing import Any, Awaitable, Callable, Mapping, Sequence, Type, TypeVar, Union
 
 from starlette.exceptions import HTTPException
 from starlette.requests import Request
@@ -15,26 +17,87 @@ class ExcHandler:
         self,
         exc: Union[Type[ExcType], int],
         handler: Callable[[Request, ExcType], Union[Awaitable[Response], Response]],
+        *,
+        sync_to_thread: bool = True,
     ) -> None:
+        """Handle exceptions of type (or HTTPExceptions with status code) exc.
+
+        By default sync handlers are run in a thread.
+        Pass sync_to_thread=False for cheap handlers that don't block
+        to call them directly from the event loop.
+        """
         self.exc = exc
         self.handler = handler
+        self.sync_to_thread = sync_to_thread
+
+
+class _PrerenderedJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return content  # type: ignore[no-any-return]
+
+
+def _render_http_exception(detail: Any) -> bytes:
+    return json.dumps(
+        {"detail": detail},
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+# HTTPException(status_code) without a custom detail uses the status' phrase
+# so we can render the body for those ahead of time
+_DEFAULT_HTTP_EXCEPTION_BODIES = {
+    status.value: (status.phrase, _render_http_exception(status.phrase))
+    for status in http.HTTPStatus
+    if status.value >= 400
+}
 
 
 async def http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
+    headers = getattr(exc, "headers", None) or {}
+    default = _DEFAULT_HTTP_EXCEPTION_BODIES.get(exc.status_code, None)
+    if default is not None and default[0] == exc.detail:
+        return _PrerenderedJSONResponse(
+            default[1], status_code=exc.status_code, headers=headers
+        )
     return JSONResponse(
         {"detail": exc.detail},
         status_code=exc.status_code,
-        headers=getattr(exc, "headers", None) or {},
+        headers=headers,
     )
 
 
 _ENCODER = JsonableEncoder()
 
 
-async def validation_exception_handler(
-    request: Request, exc: RequestValidationError
-) -> JSONResponse:
-    return JSONResponse(
-        _ENCODER({"detail": exc.errors()}),
+def render_validation_errors(errors: Sequence[Mapping[str, Any]]) -> bytes:
+    """Render the output of RequestValidationError.errors() as a JSON response body.
+
+    This produces the same output as JSONResponse(JsonableEncoder()({"detail": errors}))
+    but lets the json module do the work and only falls back to JsonableEncoder
+    for values it can't serialize (which are rare in validation errors).
+    """
+    return json.dumps(
+        {"detail": errors},
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=_ENCODER,
+    ).encode("utf-8")
+
+
+def validation_error_response(exc: RequestValidationError) -> Response:
+    return Response(
+        render_validation_errors(exc.errors()),
         status_code=exc.status_code,
+        media_type="application/json",
     )
+
+
+async def validation_exception_handler(
+    request: Request, exc: RequestValidationError
+) -> Response:
+    return validation_error_response(exc)
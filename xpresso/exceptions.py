@@ -6,7 +6,7 @@ from pydantic import ValidationError as PydanticValidationError
 from pydantic import create_model
 from pydantic.error_wrappers import ErrorWrapper
 from starlette.exceptions import HTTPException as HTTPException  # noqa: F401
-from starlette.status import HTTP_422_UNPROCESSABLE_ENTITY
+from starlette.status import HTTP_422_UNPROCESSABLE_ENTITY, WS_1008_POLICY_VIOLATION
 
 _RequestErrorModel: Type[BaseModel] = create_model("Request")  # type: ignore
 _WebSocketErrorModel: Type[BaseModel] = create_model("WebSocket")  # type: ignore
@@ -28,5 +28,8 @@ class WebSocketValidationError(PydanticValidationError):
     def __init__(
         self,
         errors: typing.Sequence[ErrorWrapper],
+        close_code: int = WS_1008_POLICY_VIOLATION,
     ) -> None:
         super().__init__(errors, _WebSocketErrorModel)
+        # used to close the connection if it was already accepted
+        self.close_code = close_code
@@ -0,0 +1,169 @@
+import bisect
+import typing
+from time import perf_counter
+
+from di.api.dependencies import DependentBase
+from di.api.scopes import Scope
+from starlette.routing import get_name  # type: ignore
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class DependencyExecution(typing.NamedTuple):
+    """A record of a single dependency being resolved.
+
+    `start` and `end` are `time.perf_counter()` timestamps.
+    `cache_hit` is True if the value was re-used (from the cache or because
+    it was provided by the framework, e.g. `Request`) instead of calling the dependency.
+    `route` is `"{METHOD} {path}"` for HTTP operations, the path for WebSockets
+    and None for lifespans.
+    """
+
+    dependent: DependentBase[typing.Any]
+    scope: Scope
+    route: typing.Optional[str]
+    start: float
+    end: float
+    cache_hit: bool
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+DependencyHook = typing.Callable[[DependencyExecution], None]
+
+
+def get_dependency_name(dependent: DependentBase[typing.Any]) -> str:
+    if dependent.call is None:
+        return repr(dependent)
+    return typing.cast(str, get_name(dependent.call))
+
+
+class LatencyHistogram:
+    """A fixed bucket histogram of latencies in seconds"""
+
+    __slots__ = ("buckets", "bucket_counts", "count", "total", "cache_hits")
+
+    def __init__(self, buckets: typing.Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # the last bucket is +Inf
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.cache_hits = 0
+
+    def observe(self, value: float, cache_hit: bool = False) -> None:
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if cache_hit:
+            self.cache_hits += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket it falls into"""
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for upper, bucket_count in zip(self.buckets, self.bucket_counts):
+            seen += bucket_count
+            if seen >= target:
+                return upper
+        return float("inf")
+
+
+class DependencyLatencyCollector:
+    """A DependencyHook that aggregates latencies per route and per dependency.
+
+    Histograms are keyed by `(route, dependency_name)`.
+    """
+
+    def __init__(
+        self, buckets: typing.Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    ) -> None:
+        self._buckets = tuple(buckets)
+        self.histograms: "typing.Dict[typing.Tuple[typing.Optional[str], str], LatencyHistogram]" = (
+            {}
+        )
+
+    def __call__(self, execution: DependencyExecution) -> None:
+        key = (execution.route, get_dependency_name(execution.dependent))
+        histogram = self.histograms.get(key, None)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram(self._buckets)
+        histogram.observe(execution.end - execution.start, execution.cache_hit)
+
+    def reset(self) -> None:
+        self.histograms.clear()
+
+
+class RequestTimings:
+    """Monotonic (`time.perf_counter()`) timestamps for the phases of an HTTP request.
+
+    Phases recorded by Xpresso are:
+    - "routing": from the App receiving the request to the Operation being called.
+    - "binding": extracting parameters (query, path, headers, cookies).
+    - "body": reading and parsing request bodies.
+    - "dependencies": executing all other dependencies.
+    - "endpoint": calling the endpoint function.
+    - "encoding": encoding the return value and creating the response.
+    - "send": sending the response.
+
+    A phase can be recorded several times (e.g. once per parameter),
+    and spans may overlap if dependencies are executed concurrently.
+    """
+
+    __slots__ = ("start", "spans")
+
+    def __init__(self, start: typing.Optional[float] = None) -> None:
+        self.start = perf_counter() if start is None else start
+        self.spans: "typing.List[typing.Tuple[str, float, float]]" = []
+
+    def record(self, phase: str, start: float, end: float) -> None:
+        self.spans.append((phase, start, end))
+
+    def durations(self) -> typing.Dict[str, float]:
+        """Total time spent in each phase in seconds"""
+        res: "typing.Dict[str, float]" = {}
+        for phase, start, end in self.spans:
+            res[phase] = res.get(phase, 0.0) + (end - start)
+        return res
+
+    def server_timing(self) -> str:
+        """Render the recorded durations as a Server-Timing header value"""
+        return ", ".join(
+            f"{phase};dur={duration * 1000:.3f}"
+            for phase, duration in self.durations().items()
+        )
+
+
+def get_request_timings(
+    scope: typing.MutableMapping[str, typing.Any]
+) -> typing.Optional[RequestTimings]:
+    """Get the RequestTimings for an HTTP request, if timings are being recorded"""
+    extension = scope.get("extensions", {}).get("xpresso", None)
+    if extension is None:
+        return None
+    return typing.cast(
+        typing.Optional[RequestTimings], getattr(extension, "timings", None)
+    )
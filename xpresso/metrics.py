@@ -0,0 +1,291 @@
+import bisect
+import math
+import typing
+from time import perf_counter
+
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from xpresso._utils.admin import (
+    NO_ROUTE,
+    AdminDependencies,
+    check_admin_route,
+    get_admin_route,
+)
+from xpresso._utils.asgi import XpressoHTTPExtension
+from xpresso.instrumentation import DEFAULT_LATENCY_BUCKETS
+from xpresso.routing.pathitem import Path
+
+# see https://prometheus.io/docs/instrumenting/exposition_formats/
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+DEFAULT_SIZE_BUCKETS = (
+    100.0,
+    1_000.0,
+    10_000.0,
+    100_000.0,
+    1_000_000.0,
+    10_000_000.0,
+)
+
+_Labels = typing.Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(
+    labelnames: typing.Sequence[str], labels: typing.Sequence[str]
+) -> str:
+    if not labelnames:
+        return ""
+    pairs = (
+        '{}="{}"'.format(
+            name,
+            value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'),
+        )
+        for name, value in zip(labelnames, labels)
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    """A counter with a fixed set of label names.
+
+    Values are only updated from the event loop's thread, so they don't need a lock.
+    """
+
+    type = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: typing.Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: typing.Dict[_Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"Expected labels {self.labelnames}, got {labels}")
+        values = self.values
+        values[labels] = values.get(labels, 0) + amount
+
+    def _render(self) -> typing.Iterator[str]:
+        for labels, value in self.values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class _HistogramValue:
+    __slots__ = ("bucket_counts", "count", "total")
+
+    def __init__(self, buckets: int) -> None:
+        # the last bucket is +Inf
+        self.bucket_counts = [0] * (buckets + 1)
+        self.count = 0
+        self.total = 0.0
+
+
+class Histogram:
+    """A fixed bucket histogram with a fixed set of label names"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: typing.Sequence[str] = (),
+        buckets: typing.Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.values: typing.Dict[_Labels, _HistogramValue] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        histogram = self.values.get(labels, None)
+        if histogram is None:
+            if len(labels) != len(self.labelnames):
+                raise ValueError(f"Expected labels {self.labelnames}, got {labels}")
+            histogram = self.values[labels] = _HistogramValue(len(self.buckets))
+        histogram.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        histogram.count += 1
+        histogram.total += value
+
+    def _render(self) -> typing.Iterator[str]:
+        labelnames = (*self.labelnames, "le")
+        for labels, histogram in self.values.items():
+            # Prometheus buckets are cumulative
+            cumulative = 0
+            for upper, count in zip((*self.buckets, math.inf), histogram.bucket_counts):
+                cumulative += count
+                bucket_labels = _format_labels(
+                    labelnames, (*labels, _format_value(upper))
+                )
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            formatted = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{formatted} {_format_value(histogram.total)}"
+            yield f"{self.name}_count{formatted} {histogram.count}"
+
+
+Metric = typing.Union[Counter, Histogram]
+
+
+class MetricsRegistry:
+    """Per-route HTTP metrics that can be exported in the Prometheus text format.
+
+    Once installed with `App(metrics=...)` this records, for every request:
+
+    - `xpresso_http_requests_total`, by route and status code.
+      Requests that fail without sending a response are left out
+      (the server sends their response, so we don't know its status).
+    - `xpresso_http_request_duration_seconds`, by route.
+    - `xpresso_http_request_size_bytes` (from the Content-Length header), by route.
+      Chunked requests don't declare their size, so they are left out.
+    - `xpresso_http_response_size_bytes`, by route.
+      Only responses with a Content-Length header are included.
+
+    Routes are labeled with the Operation's `"{METHOD} {path}"`, using the path template
+    (so `/items/{item_id}` and not `/items/123`).
+    Requests that don't reach an Operation (like 404s) are labeled `"<no route>"`.
+
+    You can add your own metrics with `counter()` and `histogram()`.
+    If `path` is given, the App serves `render()` from a GET route on that path.
+    Like the profiler's route, it must be protected with `dependencies`
+    (or explicitly left unprotected with `dependencies=[]`).
+    """
+
+    def __init__(
+        self,
+        *,
+        path: typing.Optional[str] = None,
+        dependencies: AdminDependencies = None,
+        latency_buckets: typing.Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        size_buckets: typing.Sequence[float] = DEFAULT_SIZE_BUCKETS,
+    ) -> None:
+        check_admin_route(path, dependencies)
+        self.path = path
+        self._dependencies = dependencies
+        self.metrics: typing.Dict[str, Metric] = {}
+        self.requests = self.counter(
+            "xpresso_http_requests_total",
+            "Total number of HTTP requests.",
+            ("route", "status"),
+        )
+        self.request_duration = self.histogram(
+            "xpresso_http_request_duration_seconds",
+            "Time spent handling HTTP requests, in seconds.",
+            ("route",),
+            latency_buckets,
+        )
+        self.request_size = self.histogram(
+            "xpresso_http_request_size_bytes",
+            "Size of HTTP request bodies, in bytes.",
+            ("route",),
+            size_buckets,
+        )
+        self.response_size = self.histogram(
+            "xpresso_http_response_size_bytes",
+            "Size of HTTP response bodies, in bytes.",
+            ("route",),
+            size_buckets,
+        )
+
+    def _register(self, metric: Metric) -> None:
+        if metric.name in self.metrics:
+            raise ValueError(f"A metric named {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: typing.Sequence[str] = ()
+    ) -> Counter:
+        counter = Counter(name, documentation, labelnames)
+        self._register(counter)
+        return counter
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: typing.Sequence[str] = (),
+        buckets: typing.Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        histogram = Histogram(name, documentation, labelnames, buckets)
+        self._register(histogram)
+        return histogram
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format"""
+        lines: typing.List[str] = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric._render())
+        return "\n".join(lines) + "\n"
+
+    async def record_request(
+        self, app: ASGIApp, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        """Call app and record the request and its response"""
+        status: typing.Optional[int] = None
+        response_size: typing.Optional[int] = None
+
+        # this wraps the whole app, so it sees responses sent by middleware too
+        async def observing_send(message: Message) -> None:
+            nonlocal status, response_size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_size = _get_response_size(message.get("headers", ()))
+            await send(message)
+
+        start = perf_counter()
+        try:
+            await app(scope, receive, observing_send)
+        finally:
+            duration = perf_counter() - start
+            xpresso_scope: XpressoHTTPExtension = scope["extensions"]["xpresso"]
+            route = xpresso_scope.route or NO_ROUTE
+            # if no response was sent the server responds for us,
+            # so there is no status for us to record
+            if status is not None:
+                self.requests.inc(route, str(status))
+            self.request_duration.observe(duration, route)
+            request_size = _get_request_size(scope)
+            if request_size is not None:
+                self.request_size.observe(request_size, route)
+            if response_size is not None:
+                self.response_size.observe(response_size, route)
+
+    def get_route(self) -> Path:
+        async def metrics() -> PlainTextResponse:
+            return PlainTextResponse(self.render(), media_type=CONTENT_TYPE)
+
+        return get_admin_route(self.path, metrics, self._dependencies)
+
+
+def _get_request_size(scope: Scope) -> typing.Optional[int]:
+    size: typing.Optional[int] = 0
+    for name, value in scope["headers"]:
+        if name == b"content-length":
+            return int(value) if value.isdigit() else None
+        if name == b"transfer-encoding":
+            # chunked uploads don't tell us their size upfront
+            size = None
+    return size
+
+
+def _get_response_size(
+    headers: typing.Iterable[typing.Tuple[bytes, bytes]]
+) -> typing.Optional[int]:
+    for name, value in headers:
+        if name == b"content-length":
+            return int(value) if value.isdigit() else None
+    # streamed without a Content-Length
+    return None
@@ -1,4 +1,5 @@
 import asyncio
+import typing
 
 from starlette.concurrency import run_in_threadpool
 from starlette.exceptions import HTTPException
@@ -6,17 +7,75 @@ from starlette.middleware.exceptions import (
     ExceptionMiddleware as StarletteExceptionMiddleware,
 )
 from starlette.requests import Request
-from starlette.types import Message, Receive, Scope, Send
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from xpresso._utils.asgi import XpressoHTTPExtension
 
+_AsyncHandler = typing.Callable[[Request, Exception], typing.Awaitable[Response]]
+
 
 class ExceptionMiddleware(StarletteExceptionMiddleware):
+    def __init__(
+        self,
+        app: ASGIApp,
+        handlers: typing.Optional[
+            typing.Mapping[typing.Any, typing.Callable[..., typing.Any]]
+        ] = None,
+        debug: bool = False,
+    ) -> None:
+        # exception type -> resolved handler so that we only walk the
+        # MRO of each exception type once
+        self._handler_cache: typing.Dict[
+            typing.Type[Exception], typing.Optional[_AsyncHandler]
+        ] = {}
+        self._async_handlers: typing.Dict[typing.Any, _AsyncHandler] = {}
+        super().__init__(app, handlers=handlers, debug=debug)  # type: ignore[arg-type]
+
+    def add_exception_handler(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        super().add_exception_handler(*args, **kwargs)
+        self._handler_cache.clear()
+
+    def _as_async_handler(self, handler: typing.Any) -> _AsyncHandler:
+        async_handler = self._async_handlers.get(handler, None)
+        if async_handler is None:
+            if asyncio.iscoroutinefunction(handler):
+                async_handler = handler
+            else:
+
+                async def async_handler(request: Request, exc: Exception) -> Response:
+                    return await run_in_threadpool(handler, request, exc)
+
+            self._async_handlers[handler] = async_handler
+        return async_handler
+
+    def _lookup_handler(self, exc: Exception) -> typing.Optional[_AsyncHandler]:
+        if isinstance(exc, HTTPException):
+            handler = self._status_handlers.get(exc.status_code)  # type: ignore
+            if handler is not None:
+                return self._as_async_handler(handler)
+        exc_type = type(exc)
+        try:
+            return self._handler_cache[exc_type]
+        except KeyError:
+            pass
+        handler = self._lookup_exception_handler(exc)  # type: ignore
+        res = None if handler is None else self._as_async_handler(handler)
+        self._handler_cache[exc_type] = res
+        return res
+
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         if scope["type"] != "http":
             await self.app(scope, receive, send)  # type: ignore
             return
 
+        # Xpresso's Operations record when they start sending a response
+        # and skip this wrapper (see XpressoHTTPExtension.tracking_send)
+        # so that streaming responses don't pay for it on every message.
+        # Other routes and mounted apps go through it.
+        extension: typing.Optional[XpressoHTTPExtension] = scope.get(
+            "extensions", {}
+        ).get("xpresso", None)
         response_started = False
 
         async def sender(message: Message) -> None:
@@ -26,30 +85,29 @@ class ExceptionMiddleware(StarletteExceptionMiddleware):
                 response_started = True
             await send(message)
 
+        if extension is not None:
+            extension.tracking_send = sender
+            extension.untracked_send = send
+
         try:
             await self.app(scope, receive, sender)  # type: ignore
         except Exception as exc:
-            handler = None
-
-            if isinstance(exc, HTTPException):
-                handler = self._status_handlers.get(exc.status_code)  # type: ignore
-
-            if handler is None:
-                handler = self._lookup_exception_handler(exc)  # type: ignore
+            handler = self._lookup_handler(exc)
 
             if handler is None:
                 raise exc
 
-            if response_started:
+            if response_started or (
+                extension is not None and extension.response_started
+            ):
                 msg = "Caught handled exception, but response already started."
                 raise RuntimeError(msg) from exc
 
             request = Request(scope, receive=receive)
-            if asyncio.iscoroutinefunction(handler):  # type: ignore
-                response = await handler(request, exc)  # type: ignore
-            else:
-                response = await run_in_threadpool(handler, request, exc)  # type: ignore
-            extension: XpressoHTTPExtension = scope["extensions"]["xpresso"]
-            extension.response = response
+            response = await handler(request, exc)
+            if extension is not None:
+                extension.response = response
+                extension.response_started = True
             await response(scope, receive, sender)
-            extension.response_sent = True
+            if extension is not None:
+                extension.response_sent = True
@@ -0,0 +1,33 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from xpresso._utils.asgi import XpressoHTTPExtension
+from xpresso.instrumentation import RequestTimings
+
+
+class ServerTimingMiddleware:
+    """Add a Server-Timing header with the time spent in each phase of the request.
+
+    This turns on RequestTimings for every request that passes through it.
+    Since the header is sent before the response body, the "send" phase is not included.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        extension: XpressoHTTPExtension = scope["extensions"]["xpresso"]
+        if extension.timings is None:
+            extension.timings = RequestTimings()
+        timings = extension.timings
+
+        async def sender(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timings.server_timing())
+            await send(message)
+
+        await self.app(scope, receive, sender)
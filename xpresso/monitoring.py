@@ -0,0 +1,126 @@
+import logging
+import sys
+import threading
+import typing
+from time import perf_counter
+
+import anyio
+import anyio.to_thread
+
+from xpresso.instrumentation import DEFAULT_LATENCY_BUCKETS, LatencyHistogram
+from xpresso.profiling import _StackInspector
+
+logger = logging.getLogger(__name__)
+
+
+class _Culprit(typing.NamedTuple):
+    route: str
+    dependency: typing.Optional[str]
+    # code names from the outermost frame to the innermost one
+    stack: typing.List[str]
+
+
+class EventLoopMonitor:
+    """Measure event loop lag and count in-flight requests per route.
+
+    Once installed with `App(event_loop_monitor=...)`, a task wakes up every
+    `interval` seconds and records how late it woke up (the lag) in `lag_histogram`.
+    Anything that blocks the event loop (like a slow sync dependency
+    that is not marked `sync_to_thread=True`) shows up as lag.
+
+    A watchdog thread checks that the task keeps waking up.
+    If it doesn't for more than `interval + lag_threshold` seconds, the watchdog
+    captures the stack of the event loop's thread.
+    The lag spike is logged (to the "xpresso.monitoring" logger)
+    along with the route and dependency that were running.
+
+    `in_flight` counts the requests each Operation is handling, keyed by `"{METHOD} {path}"`.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        lag_threshold: float = 0.1,
+        buckets: typing.Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        if interval <= 0:
+            raise ValueError("interval must be greater than 0")
+        self.interval = interval
+        self.lag_threshold = lag_threshold
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.lag_histogram = LatencyHistogram(buckets)
+        # number of times the lag exceeded lag_threshold
+        self.spikes = 0
+        self.in_flight: typing.Dict[str, int] = {}
+        self._inspector = _StackInspector()
+        self._heartbeat = 0.0
+        self._culprit: typing.Optional[_Culprit] = None
+
+    def register_route(self, route: str) -> typing.Dict[str, int]:
+        """Start counting in-flight requests for route and get the counters"""
+        self.in_flight.setdefault(route, 0)
+        return self.in_flight
+
+    async def run(self) -> None:
+        """Monitor the event loop this is running on until cancelled"""
+        stop = threading.Event()
+        self._heartbeat = perf_counter()
+        watchdog = threading.Thread(
+            target=self._watch,
+            args=(threading.get_ident(), stop),
+            name="xpresso-event-loop-monitor",
+            daemon=True,
+        )
+        watchdog.start()
+        try:
+            while True:
+                start = perf_counter()
+                await anyio.sleep(self.interval)
+                end = self._heartbeat = perf_counter()
+                self._observe(max(0.0, end - start - self.interval))
+        finally:
+            stop.set()
+            # the watchdog notices within one check interval,
+            # wait for it from a worker thread so that the event loop isn't blocked
+            with anyio.CancelScope(shield=True):
+                await anyio.to_thread.run_sync(watchdog.join)
+
+    def _observe(self, lag: float) -> None:
+        self.lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self.lag_histogram.observe(lag)
+        culprit, self._culprit = self._culprit, None
+        if lag <= self.lag_threshold:
+            return
+        self.spikes += 1
+        if culprit is None:
+            logger.warning("Event loop lag of %.3fs", lag)
+            return
+        logger.warning(
+            "Event loop lag of %.3fs while running route %s (dependency: %s)\n%s",
+            lag,
+            culprit.route,
+            culprit.dependency or "unknown",
+            "\n".join(f"  {frame}" for frame in culprit.stack),
+        )
+
+    def _watch(self, thread_id: int, stop: threading.Event) -> None:
+        check_interval = min(self.interval, self.lag_threshold) / 2
+        while not stop.wait(check_interval):
+            if self._culprit is not None:
+                continue
+            if perf_counter() - self._heartbeat <= self.interval + self.lag_threshold:
+                continue
+            frame = sys._current_frames().get(thread_id, None)
+            if frame is None:
+                return
+            sample = self._inspector.inspect(frame)
+            self._culprit = _Culprit(
+                route=sample.route,
+                dependency=sample.dependency,
+                stack=[
+                    f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+                    for code in reversed(sample.codes)
+                ],
+            )
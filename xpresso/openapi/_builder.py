@@ -1,16 +1,28 @@
 import inspect
 from http import HTTPStatus
-from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple, Union
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 from pydantic import BaseConfig
 from pydantic.fields import ModelField
 from pydantic.schema import field_schema, get_flat_models_from_fields
 from pydantic.schema import get_model_name_map as get_model_name_map_pydantic
 from starlette.responses import Response
-from starlette.routing import compile_path  # type: ignore[import]
+from starlette.routing import Mount, compile_path  # type: ignore[import]
 
 from xpresso._utils.routing import VisitedRoute
-from xpresso._utils.typing import get_args, get_origin, get_type_hints
+from xpresso._utils.schemas import get_schema_memo, schema_memo
+from xpresso._utils.typing import Literal, get_args, get_origin, get_type_hints
 from xpresso.binders import dependents as binder_dependents
 from xpresso.openapi import models
 from xpresso.openapi._constants import REF_PREFIX
@@ -24,6 +36,11 @@ ModelNameMap = Dict[type, str]
 
 Routes = Mapping[str, Tuple[Path, Mapping[str, Operation]]]
 
+OpenAPISplit = Literal["tag", "router"]
+
+# the partition for operations without tags or routes that are not in a Mount
+DEFAULT_PARTITION = "default"
+
 
 validation_error_schema = models.Schema.parse_obj(
     {
@@ -88,6 +105,17 @@ def get_model_name_map(unique_models: Set[type]) -> Dict[type, str]:
 def get_schema(
     type_: type, model_name_map: ModelNameMap, schemas: Dict[str, Any]
 ) -> models.Schema:
+    memo = get_schema_memo()
+    if memo is not None:
+        try:
+            cached = memo.response_schemas.get(type_, None)
+        except TypeError:  # unhashable type
+            memo = None
+        else:
+            if cached is not None:
+                schema, new_schemas = cached
+                schemas.update(new_schemas)
+                return models.Schema(**schema)
     field = ModelField.infer(
         name="Response",
         value=...,
@@ -100,6 +128,8 @@ def get_schema(
     schema, new_schemas, _ = field_schema(field, model_name_map=model_name_map, ref_prefix=REF_PREFIX)  # type: ignore[arg-type]
     if "title" in schema and schema["title"] == "Response":
         schema.pop("title", None)
+    if memo is not None:
+        memo.response_schemas[type_] = (schema, new_schemas)
     schemas.update(new_schemas)
     return models.Schema(**schema)
 
@@ -290,6 +320,130 @@ def get_operation(
     return operation
 
 
+class _CachedOperation(NamedTuple):
+    # the inputs the fragments were generated with
+    tags: List[str]
+    response_specs: Dict[str, ResponseSpec]
+    model_names: Dict[type, str]
+    # the fragments
+    operation: models.Operation
+    components: models.Components
+
+
+class _OperationSchemaCache:
+    """Schema fragments for an Operation, stored on the Operation between generations.
+
+    Everything is only valid for the inputs it was computed from (see get_schema_inputs).
+    Documents can be generated concurrently (in a background thread and on the event loop)
+    so the fragments are replaced as a whole, never modified in place.
+    """
+
+    __slots__ = ("inputs", "flat_models", "entry")
+
+    def __init__(self, inputs: Tuple[Any, ...], flat_models: Set[type]) -> None:
+        self.inputs = inputs
+        self.flat_models = flat_models
+        self.entry: Optional[_CachedOperation] = None
+
+
+def get_schema_inputs(route: Operation) -> Tuple[Any, ...]:
+    """Everything an Operation's own schema is built from.
+
+    Binders are created again every time the Operation gets prepared
+    (e.g. on every lifespan) so they are identified by the parameter they were
+    created from, which also holds their marker.
+    Dependency overrides that change the parameters change the inputs.
+    """
+    binders = [
+        (type(param.dependency.openapi), param.parameter)
+        for params in route.dependent.dag.values()
+        for param in params
+        if isinstance(param.dependency, binder_dependents.Binder)
+    ]
+    return (
+        binders,
+        route.endpoint,
+        route.summary,
+        route.description,
+        route.deprecated,
+        route.servers,
+        route.external_docs,
+        route.operation_id,
+        route.responses,
+        route.response_status_code,
+        route.response_media_type,
+        route.response_model,
+        route.response_description,
+        route.response_examples,
+        route.response_headers,
+    )
+
+
+def _get_schema_cache(route: Operation) -> _OperationSchemaCache:
+    inputs = get_schema_inputs(route)
+    cache: "Optional[_OperationSchemaCache]" = route._openapi_cache
+    if cache is None or cache.inputs != inputs:
+        cache = route._openapi_cache = _OperationSchemaCache(
+            inputs, get_operation_models(route)
+        )
+    return cache
+
+
+def merge_components(target: models.Components, source: models.Components) -> None:
+    for name in models.Components.__fields__:
+        items = getattr(source, name)
+        if not items:
+            continue
+        existing = getattr(target, name)
+        if existing is None:
+            setattr(target, name, dict(items))
+        else:
+            existing.update(items)
+
+
+def get_cached_operation(
+    route: Operation,
+    model_name_map: ModelNameMap,
+    components: models.Components,
+    tags: List[str],
+    response_specs: Dict[str, ResponseSpec],
+) -> models.Operation:
+    """Like get_operation but re-uses the fragments from the last generation if none
+    of its inputs changed"""
+    cache = _get_schema_cache(route)
+    model_names = {
+        model: model_name_map[model]
+        for model in cache.flat_models
+        if model in model_name_map
+    }
+    entry = cache.entry
+    if (
+        entry is None
+        or entry.tags != tags
+        or entry.response_specs != response_specs
+        or entry.model_names != model_names
+    ):
+        # get_operation modifies response_specs in place
+        cached_response_specs = dict(response_specs)
+        operation_components = models.Components()
+        operation = get_operation(
+            route,
+            model_name_map=model_name_map,
+            components=operation_components,
+            tags=tags,
+            response_specs=response_specs,
+        )
+        entry = cache.entry = _CachedOperation(
+            tags=list(tags),
+            response_specs=cached_response_specs,
+            model_names=model_names,
+            operation=operation,
+            components=operation_components,
+        )
+    merge_components(components, entry.components)
+    return entry.operation
+
+
 def merge_node_openapi_metadata(
     node: Union[Router, Path, Operation],
     tags: List[str],
@@ -307,29 +461,45 @@ def merge_node_openapi_metadata(
     return [*tags, *node.tags], new_responses
 
 
+def get_path_metadata(
+    visited_route: VisitedRoute[Any],
+) -> Optional[Tuple[List[str], Dict[str, ResponseSpec]]]:
+    """Get the tags and responses a Path collects from its Routers and itself,
+    or None if it is excluded from the schema"""
+    path_item = visited_route.route
+    assert isinstance(path_item, Path)
+    if not path_item.include_in_schema:
+        return None
+    tags: "List[str]" = []
+    responses: "Dict[str, ResponseSpec]" = {}
+    for node in visited_route.nodes:
+        if isinstance(node, Router):
+            if not node.include_in_schema:
+                return None
+            tags, responses = merge_node_openapi_metadata(node, tags, responses)
+    return merge_node_openapi_metadata(path_item, tags, responses)
+
+
+def in_tag_partition(tags: List[str], partition: str) -> bool:
+    if not tags:
+        return partition == DEFAULT_PARTITION
+    return partition in tags
+
+
 def get_paths_items(
     visitor: Iterable[VisitedRoute[Any]],
     model_name_map: ModelNameMap,
     components: models.Components,
+    tag: Optional[str] = None,
 ) -> Dict[str, models.PathItem]:
     paths: "Dict[str, models.PathItem]" = {}
     for visited_route in visitor:
         if isinstance(visited_route.route, Path):
             path_item = visited_route.route
-            if not path_item.include_in_schema:
-                continue
-            tags: "List[str]" = []
-            include_in_schema = True
-            responses: "Dict[str, ResponseSpec]" = {}
-            for node in visited_route.nodes:
-                if isinstance(node, Router):
-                    if not node.include_in_schema:
-                        include_in_schema = False
-                        break
-                    tags, responses = merge_node_openapi_metadata(node, tags, responses)
-            if not include_in_schema:
+            metadata = get_path_metadata(visited_route)
+            if metadata is None:
                 continue
-            tags, responses = merge_node_openapi_metadata(path_item, tags, responses)
+            tags, responses = metadata
             operations: "Dict[str, models.Operation]" = {}
             for method, operation in path_item.operations.items():
                 if not operation.include_in_schema:
@@ -337,13 +507,17 @@ def get_paths_items(
                 operation_tags, operation_responses = merge_node_openapi_metadata(
                     operation, tags, responses
                 )
-                operations[method.lower()] = get_operation(
+                if tag is not None and not in_tag_partition(operation_tags, tag):
+                    continue
+                operations[method.lower()] = get_cached_operation(
                     operation,
                     model_name_map=model_name_map,
                     components=components,
                     tags=operation_tags,
                     response_specs=operation_responses,
                 )
+            if tag is not None and not operations:
+                continue
             path = compile_path(visited_route.path)[1]
             paths[path] = models.PathItem(
                 description=visited_route.route.description,
@@ -371,40 +545,120 @@ def filter_routes(visitor: Iterable[VisitedRoute[Any]]) -> Routes:
     return res
 
 
+def get_operation_models(operation: Operation) -> Set[type]:
+    res: Set[type] = set()
+    dependent = operation.dependent
+    flat_dependencies = dependent.dag.keys()
+    for dep in flat_dependencies:
+        if isinstance(
+            dep,
+            binder_dependents.Binder,
+        ):
+            res.update(dep.openapi.get_models())
+    for response in operation.responses.values():
+        for response_model in (response.content or {}).values():
+            if (
+                isinstance(response_model, ResponseModel)
+                and response_model.model is not TypeUnset
+            ):
+                res.add(response_model.model)
+    return res
+
+
 def get_flat_models(routes: Routes) -> Set[type]:
     res: Set[type] = set()
     for _, operations in routes.values():
         for operation in operations.values():
-            dependent = operation.dependent
-            flat_dependencies = dependent.dag.keys()
-            for dep in flat_dependencies:
-                if isinstance(
-                    dep,
-                    binder_dependents.Binder,
-                ):
-                    res.update(dep.openapi.get_models())
-            for response in operation.responses.values():
-                for response_model in (response.content or {}).values():
-                    if (
-                        isinstance(response_model, ResponseModel)
-                        and response_model.model is not TypeUnset
-                    ):
-                        res.add(response_model.model)
+            res.update(_get_schema_cache(operation).flat_models)
     return res
 
 
+def get_router_partitions(visitor: Iterable[VisitedRoute[Any]]) -> Dict[str, str]:
+    """Map each route path to the name of the top level Mount it belongs to"""
+    mount_names: "Dict[int, str]" = {}
+    partitions: "Dict[str, str]" = {}
+    for visited_route in visitor:
+        if isinstance(visited_route.route, Mount):
+            # top level mounts are visited before anything inside of them
+            mounted = visited_route.nodes[2]
+            if id(mounted) not in mount_names:
+                name = visited_route.route.path.strip("/").replace("/", "-")
+                mount_names[id(mounted)] = name or DEFAULT_PARTITION
+        elif isinstance(visited_route.route, Path):
+            if len(visited_route.nodes) > 2:
+                name = mount_names[id(visited_route.nodes[2])]
+            else:
+                name = DEFAULT_PARTITION
+            partitions[visited_route.path] = name
+    return partitions
+
+
+def get_partition_names(
+    visitor: Iterable[VisitedRoute[Any]], split_by: OpenAPISplit
+) -> List[str]:
+    visitor = list(visitor)
+    names: "Set[str]" = set()
+    if split_by == "router":
+        routes = filter_routes(visitor)
+        names.update(
+            name
+            for path, name in get_router_partitions(visitor).items()
+            if path in routes
+        )
+    else:
+        for visited_route in visitor:
+            if not isinstance(visited_route.route, Path):
+                continue
+            metadata = get_path_metadata(visited_route)
+            if metadata is None:
+                continue
+            tags, _ = metadata
+            for operation in visited_route.route.operations.values():
+                if operation.include_in_schema:
+                    names.update([*tags, *operation.tags] or [DEFAULT_PARTITION])
+    return sorted(names)
+
+
 def generate_openapi(
     visitor: Iterable[VisitedRoute[Any]],
     version: str,
     info: models.Info,
     servers: Optional[Iterable[models.Server]],
+    partition: Optional[str] = None,
+    split_by: Optional[OpenAPISplit] = None,
 ) -> models.OpenAPI:
-    visitor = list(visitor)
+    """Generate the OpenAPI document for an app or, if split_by is given,
+    for one of its partitions"""
+    with schema_memo():
+        return _generate_openapi(
+            list(visitor), version, info, servers, partition, split_by
+        )
+
+
+def _generate_openapi(
+    visitor: List[VisitedRoute[Any]],
+    version: str,
+    info: models.Info,
+    servers: Optional[Iterable[models.Server]],
+    partition: Optional[str],
+    split_by: Optional[OpenAPISplit],
+) -> models.OpenAPI:
+    tag: Optional[str] = None
+    if split_by == "router" and partition is not None:
+        partitions = get_router_partitions(visitor)
+        visitor = [
+            visited_route
+            for visited_route in visitor
+            if not isinstance(visited_route.route, Path)
+            or partitions[visited_route.path] == partition
+        ]
+    elif split_by == "tag":
+        tag = partition
     routes = filter_routes(visitor)
     flat_models = get_flat_models(routes)
     model_name_map = get_model_name_map(flat_models)
     components = models.Components()
-    paths = get_paths_items(visitor, model_name_map, components)
+    paths = get_paths_items(visitor, model_name_map, components, tag=tag)
     return models.OpenAPI(
         openapi=version,
         info=info,
@@ -0,0 +1,78 @@
+import gzip
+import hashlib
+import io
+import typing
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+
+MEDIA_TYPE = "application/json; charset=utf-8"
+
+
+class OpenAPIDocument(typing.NamedTuple):
+    """A serialized OpenAPI document and its pre-compressed variants"""
+
+    content: bytes
+    gzipped: bytes
+    etag: str
+    gzip_etag: str
+
+    @classmethod
+    def from_content(cls, content: bytes) -> "OpenAPIDocument":
+        buffer = io.BytesIO()
+        # a fixed mtime keeps the output (and thus the ETag) deterministic
+        with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as f:
+            f.write(content)
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        return cls(
+            content=content,
+            gzipped=buffer.getvalue(),
+            etag=f'"{digest}"',
+            # different encodings of the same document need different strong ETags
+            gzip_etag=f'"{digest}-gzip"',
+        )
+
+    def response(self, request_headers: Headers) -> Response:
+        accepts_gzip = _accepts_gzip(request_headers.get("accept-encoding", ""))
+        etag = self.gzip_etag if accepts_gzip else self.etag
+        headers = {"etag": etag, "vary": "Accept-Encoding"}
+        if_none_match = request_headers.get("if-none-match", None)
+        if if_none_match is not None and _etag_matches(
+            if_none_match, (self.etag, self.gzip_etag)
+        ):
+            return Response(status_code=304, headers=headers)
+        if accepts_gzip:
+            headers["content-encoding"] = "gzip"
+            return Response(self.gzipped, headers=headers, media_type=MEDIA_TYPE)
+        return Response(self.content, headers=headers, media_type=MEDIA_TYPE)
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    accepted = False
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if coding not in ("gzip", "*"):
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding == "gzip":
+            # an explicit entry takes precedence over the wildcard
+            return q > 0
+        accepted = q > 0
+    return accepted
+
+
+def _etag_matches(if_none_match: str, etags: typing.Iterable[str]) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison function
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    candidates = {tag[2:] if tag.startswith("W/") else tag for tag in candidates}
+    return any(etag in candidates for etag in etags)
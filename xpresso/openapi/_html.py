@@ -1,5 +1,5 @@
 import json
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Sequence, Tuple
 
 from starlette.responses import HTMLResponse
 
@@ -16,6 +16,8 @@ def get_swagger_ui_html(
     oauth2_redirect_url: Optional[str] = None,
     init_oauth: Optional[Dict[str, Any]] = None,
     encoder: Encoder = JsonableEncoder(),
+    openapi_urls: Optional[Sequence[Tuple[str, str]]] = None,
+    swagger_standalone_preset_js_url: str = "https://cdn.jsdelivr.net/npm/swagger-ui-dist@4/swagger-ui-standalone-preset.js",
 ) -> HTMLResponse:
     if swagger_favicon_url:
         swagger_favicon_html = (
@@ -34,27 +36,49 @@ def get_swagger_ui_html(
     <body>
     <div id="swagger-ui">
     </div>
-    <script src="{swagger_js_url}"></script>
+    <script src="{swagger_js_url}"></script>"""
+
+    if openapi_urls:
+        # the top bar with the document selector is part of the standalone preset
+        html += f"""
+    <script src="{swagger_standalone_preset_js_url}"></script>"""
+        layout = "StandaloneLayout"
+        standalone_preset = "SwaggerUIStandalonePreset"
+    else:
+        layout = "BaseLayout"
+        standalone_preset = "SwaggerUIBundle.SwaggerUIStandalonePreset"
+
+    html += """
     <!-- `SwaggerUIBundle` is now available on the page -->
     <script>
-    const ui = SwaggerUIBundle({{
-        url: '{openapi_url}',
+    const ui = SwaggerUIBundle({"""
+
+    if openapi_urls:
+        # show a selector for the partial documents
+        urls = [{"name": name, "url": url} for name, url in openapi_urls]
+        html += f"""
+        urls: {json.dumps(urls)},
+        'urls.primaryName': {json.dumps(openapi_urls[0][0])},"""
+    else:
+        html += f"""
+        url: '{openapi_url}',"""
+    html += """
     """
 
     if oauth2_redirect_url:
         html += f"oauth2RedirectUrl: window.location.origin + '{oauth2_redirect_url}',"
 
-    html += """
+    html += f"""
         dom_id: '#swagger-ui',
         presets: [
         SwaggerUIBundle.presets.apis,
-        SwaggerUIBundle.SwaggerUIStandalonePreset
+        {standalone_preset}
         ],
-        layout: "BaseLayout",
+        layout: "{layout}",
         deepLinking: true,
         showExtensions: true,
         showCommonExtensions: true
-    })"""
+    }})"""
 
     if init_oauth:
         html += f"""
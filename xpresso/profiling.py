@@ -0,0 +1,477 @@
+import dis
+import inspect
+import random
+import sys
+import threading
+import tracemalloc
+import typing
+import weakref
+from types import CodeType, FrameType
+
+import anyio
+from di import SolvedDependent
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from xpresso._utils.admin import (
+    NO_ROUTE,
+    AdminDependencies,
+    check_admin_route,
+    get_admin_route,
+)
+from xpresso.instrumentation import get_dependency_name
+from xpresso.parameters import FromQuery
+from xpresso.routing.operation import Operation, _OperationApp
+from xpresso.routing.pathitem import Path
+
+_OPERATION_APP_CODE = _OperationApp.__call__.__code__
+
+
+def _get_code(call: typing.Any) -> typing.Optional[CodeType]:
+    # see xpresso.dependencies._wrap
+    while hasattr(call, "__xpresso_wrapped_call__"):
+        call = call.__xpresso_wrapped_call__
+    call = inspect.unwrap(call)
+    if inspect.isclass(call):
+        call = call.__init__
+    elif not (inspect.isfunction(call) or inspect.ismethod(call)):
+        call = getattr(type(call), "__call__", None)
+    call = getattr(call, "__func__", call)
+    return getattr(call, "__code__", None)
+
+
+def _get_label(code: CodeType) -> str:
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+class _StackSample(typing.NamedTuple):
+    # from the innermost frame to the outermost one
+    codes: typing.List[CodeType]
+    # False if the thread was not running a coroutine (e.g. an idle event loop)
+    running_coroutine: bool
+    route: str
+    dependency: typing.Optional[str]
+
+
+class _StackInspector:
+    """Find the Operation and dependency a thread's stack belongs to"""
+
+    def __init__(self) -> None:
+        # SolvedDependent of an _OperationApp -> code -> dependency name
+        # weakly referenced so that we don't keep the routes of Apps
+        # that were prepared again (or thrown away) alive
+        self._dependency_codes: "weakref.WeakKeyDictionary[SolvedDependent[typing.Any], typing.Dict[CodeType, str]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _get_dependency_codes(
+        self, operation_app: _OperationApp
+    ) -> typing.Dict[CodeType, str]:
+        dependent = operation_app.dependent
+        codes = self._dependency_codes.get(dependent, None)
+        if codes is None:
+            codes = {}
+            for dep in dependent.dag:
+                if dep.call is None:
+                    continue
+                code = _get_code(dep.call)
+                if code is not None:
+                    codes[code] = get_dependency_name(dep)
+            self._dependency_codes[dependent] = codes
+        return codes
+
+    def inspect(self, frame: typing.Optional[FrameType]) -> _StackSample:
+        codes: typing.List[CodeType] = []
+        operation_app: typing.Optional[_OperationApp] = None
+        running_coroutine = False
+        while frame is not None:
+            code = frame.f_code
+            codes.append(code)
+            if code.co_flags & inspect.CO_COROUTINE:
+                running_coroutine = True
+            if code is _OPERATION_APP_CODE and operation_app is None:
+                operation_app = frame.f_locals.get("self", None)
+            frame = frame.f_back
+        route = NO_ROUTE
+        dependency: typing.Optional[str] = None
+        if operation_app is not None:
+            route = operation_app.route
+            dependency_codes = self._get_dependency_codes(operation_app)
+            for code in codes:
+                dependency = dependency_codes.get(code, None)
+                if dependency is not None:
+                    break
+        return _StackSample(codes, running_coroutine, route, dependency)
+
+
+class SamplingProfiler:
+    """A statistical profiler for the thread running the event loop.
+
+    While running, a background thread captures the stack of the event loop's
+    thread every `interval` seconds.
+    Each sample is attributed to the Operation that was running
+    (as `"{METHOD} {path}"`) and to the innermost dependency (or endpoint)
+    on the stack.
+    Sync dependencies that run in a thread are not sampled.
+
+    Samples taken while the event loop is idle are only counted (in `idle_samples`).
+
+    If `path` is set, `App(profiler=...)` serves the profile from a route at that path.
+    `GET {path}?seconds=10` profiles the app for 10 seconds and returns the samples
+    in collapsed stack format, which most flame graph tools can render.
+    Since this exposes the internals of your app, you must pass `dependencies`
+    to protect the route (for example one that checks an API key).
+    To knowingly expose it without any protection, pass `dependencies=[]`.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        *,
+        path: typing.Optional[str] = None,
+        dependencies: AdminDependencies = None,
+        max_duration: float = 60.0,
+    ) -> None:
+        if interval <= 0:
+            raise ValueError("interval must be greater than 0")
+        check_admin_route(path, dependencies)
+        self.interval = interval
+        self.path = path
+        self.max_duration = max_duration
+        self._dependencies = list(dependencies or ())
+        # (route, frame labels from the outermost frame) -> count
+        self.samples: "typing.Dict[typing.Tuple[str, typing.Tuple[str, ...]], int]" = {}
+        self.samples_by_route: typing.Dict[str, int] = {}
+        self.samples_by_dependency: "typing.Dict[typing.Tuple[str, str], int]" = {}
+        self.idle_samples = 0
+        self._lock = threading.Lock()
+        self._labels: typing.Dict[CodeType, str] = {}
+        self._inspector = _StackInspector()
+        self._stop: typing.Optional[threading.Event] = None
+        self._thread: typing.Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Start sampling the current thread, which should be running the event loop"""
+        if self._thread is not None:
+            raise RuntimeError("The profiler is already running")
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(threading.get_ident(), self._stop),
+            name="xpresso-profiler",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None or self._stop is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = self._stop = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self.samples.clear()
+            self.samples_by_route.clear()
+            self.samples_by_dependency.clear()
+            self.idle_samples = 0
+
+    def collapsed(self) -> str:
+        """Render the samples in collapsed stack format (one `frame;frame;... count` line per stack)"""
+        with self._lock:
+            samples = list(self.samples.items())
+        return "".join(
+            f"{';'.join((route, *labels))} {count}\n"
+            for (route, labels), count in samples
+        )
+
+    async def profile(self, seconds: float) -> str:
+        """Discard previous samples, sample for `seconds` and return the collapsed stacks"""
+        self.reset()
+        self.start()
+        try:
+            await anyio.sleep(seconds)
+        finally:
+            self.stop()
+        return self.collapsed()
+
+    def get_route(self) -> Path:
+        async def profile(seconds: FromQuery[float] = 10.0) -> PlainTextResponse:
+            if not 0 < seconds <= self.max_duration:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"seconds must be between 0 and {self.max_duration}",
+                )
+            if self.running:
+                raise HTTPException(
+                    status_code=409, detail="A profile is already being taken"
+                )
+            return PlainTextResponse(await self.profile(seconds))
+
+        return get_admin_route(self.path, profile, self._dependencies)
+
+    def _run(self, thread_id: int, stop: threading.Event) -> None:
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id, None)
+            if frame is None:
+                # the thread exited
+                return
+            self._record(frame)
+
+    def _record(self, frame: FrameType) -> None:
+        sample = self._inspector.inspect(frame)
+        if not sample.running_coroutine:
+            with self._lock:
+                self.idle_samples += 1
+            return
+        route, dependency = sample.route, sample.dependency
+        labels: typing.List[str] = []
+        for code in reversed(sample.codes):
+            label = self._labels.get(code, None)
+            if label is None:
+                label = self._labels[code] = _get_label(code)
+            labels.append(label)
+        key = (route, tuple(labels))
+        with self._lock:
+            self.samples[key] = self.samples.get(key, 0) + 1
+            self.samples_by_route[route] = self.samples_by_route.get(route, 0) + 1
+            if dependency is not None:
+                dep_key = (route, dependency)
+                self.samples_by_dependency[dep_key] = (
+                    self.samples_by_dependency.get(dep_key, 0) + 1
+                )
+
+
+class AllocationStats:
+    """Net memory allocated (still allocated once the request finished)"""
+
+    __slots__ = ("size", "count")
+
+    def __init__(self) -> None:
+        # bytes
+        self.size = 0
+        # memory blocks
+        self.count = 0
+
+    def add(self, size: int, count: int) -> None:
+        self.size += size
+        self.count += count
+
+
+class RouteAllocationStats(AllocationStats):
+    __slots__ = ("requests", "dependencies", "locations")
+
+    def __init__(self) -> None:
+        super().__init__()
+        # number of sampled requests
+        self.requests = 0
+        self.dependencies: typing.Dict[str, AllocationStats] = {}
+        # "filename:lineno" of the line that made the allocation
+        self.locations: typing.Dict[str, AllocationStats] = {}
+
+
+def _get_line_range(code: CodeType) -> typing.Tuple[int, int]:
+    lines = [lineno for _, lineno in dis.findlinestarts(code) if lineno is not None]
+    return code.co_firstlineno, max(lines, default=code.co_firstlineno)
+
+
+class _TrackedOperationApp:
+    __slots__ = ("app", "tracker", "route", "dependency_lines")
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        tracker: "AllocationTracker",
+        route: str,
+        dependent: SolvedDependent[typing.Any],
+    ) -> None:
+        self.app = app
+        self.tracker = tracker
+        self.route = route
+        # filename -> [(first line, last line, dependency name)]
+        self.dependency_lines: "typing.Dict[str, typing.List[typing.Tuple[int, int, str]]]" = (
+            {}
+        )
+        for dep in dependent.dag:
+            if dep.call is None:
+                continue
+            code = _get_code(dep.call)
+            if code is None:
+                continue
+            first, last = _get_line_range(code)
+            self.dependency_lines.setdefault(code.co_filename, []).append(
+                (first, last, get_dependency_name(dep))
+            )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        tracker = self.tracker
+        # only one request is traced at a time so that concurrent sampled
+        # requests don't see each other's allocations
+        if tracker._tracing or random.random() >= tracker.sample_rate:
+            await self.app(scope, receive, send)
+            return
+        tracker._tracing = True
+        started = not tracemalloc.is_tracing()
+        before: typing.Optional[tracemalloc.Snapshot] = None
+        if started:
+            tracemalloc.start(tracker.nframes)
+        else:
+            # someone else is using tracemalloc, leave it running
+            before = tracemalloc.take_snapshot()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            try:
+                after = tracemalloc.take_snapshot()
+            finally:
+                if started:
+                    tracemalloc.stop()
+                tracker._tracing = False
+            self._record(after, before)
+
+    def _get_dependency(self, traceback: tracemalloc.Traceback) -> typing.Optional[str]:
+        # from the most recent frame to the oldest one
+        for frame in reversed(traceback):
+            for first, last, name in self.dependency_lines.get(frame.filename, ()):
+                if first <= frame.lineno <= last:
+                    return name
+        return None
+
+    def _record(
+        self,
+        after: tracemalloc.Snapshot,
+        before: typing.Optional[tracemalloc.Snapshot],
+    ) -> None:
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        after = after.filter_traces(filters)
+        stats: typing.Iterable[typing.Tuple[int, int, tracemalloc.Traceback]]
+        if before is None:
+            # tracing started with this request, everything traced was allocated by it
+            stats = (
+                (stat.size, stat.count, stat.traceback)
+                for stat in after.statistics("traceback")
+            )
+        else:
+            stats = (
+                (stat.size_diff, stat.count_diff, stat.traceback)
+                for stat in after.compare_to(before.filter_traces(filters), "traceback")
+            )
+        route_stats = self.tracker.routes.get(self.route, None)
+        if route_stats is None:
+            route_stats = self.tracker.routes[self.route] = RouteAllocationStats()
+        route_stats.requests += 1
+        for size, count, traceback in stats:
+            if not size and not count:
+                continue
+            route_stats.add(size, count)
+            dependency = self._get_dependency(traceback)
+            if dependency is not None:
+                dep_stats = route_stats.dependencies.get(dependency, None)
+                if dep_stats is None:
+                    dep_stats = route_stats.dependencies[dependency] = AllocationStats()
+                dep_stats.add(size, count)
+            frame = traceback[-1]
+            location = f"{frame.filename}:{frame.lineno}"
+            loc_stats = route_stats.locations.get(location, None)
+            if loc_stats is None:
+                loc_stats = route_stats.locations[location] = AllocationStats()
+            loc_stats.add(size, count)
+
+
+class AllocationTracker:
+    """Track the memory allocated by requests that is still allocated after they finish.
+
+    Each request to an Operation is traced with `tracemalloc` with probability
+    `sample_rate`, and at most one request is traced at a time.
+    The allocations that are still alive once the request finished are then aggregated
+    by route (`"{METHOD} {path}"`), by the innermost dependency (or binder or endpoint)
+    that made them and by the line that made them.
+    Growth that keeps showing up for a route is a good candidate for a leak or an
+    unbounded cache.
+
+    Requests that are not sampled have almost no overhead,
+    but tracing slows down a request considerably, so keep `sample_rate` low.
+    Requests running concurrently with a traced request can add noise to its numbers.
+
+    If `path` is set, `App(allocation_tracker=...)` serves a JSON report from a route
+    at that path (`GET {path}?limit=10&reset=false`).
+    You must pass `dependencies` to protect it, or `dependencies=[]` to knowingly
+    serve it without any protection.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.01,
+        *,
+        nframes: int = 16,
+        path: typing.Optional[str] = None,
+        dependencies: AdminDependencies = None,
+    ) -> None:
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be greater than 0 and at most 1")
+        check_admin_route(path, dependencies)
+        self.sample_rate = sample_rate
+        self.nframes = nframes
+        self.path = path
+        self._dependencies = list(dependencies or ())
+        self.routes: typing.Dict[str, RouteAllocationStats] = {}
+        self._tracing = False
+        self._admin_operations: typing.List[Operation] = []
+
+    def wrap(self, operation: Operation, app: ASGIApp, route: str) -> ASGIApp:
+        if any(operation is admin for admin in self._admin_operations):
+            # don't track requests to our own route
+            return app
+        return _TrackedOperationApp(app, self, route, operation.dependent)
+
+    def reset(self) -> None:
+        self.routes.clear()
+
+    def report(self, limit: int = 10) -> typing.Dict[str, typing.Any]:
+        """A JSON serializable summary with the top `limit` dependencies and lines per route"""
+
+        def top(
+            stats: typing.Mapping[str, AllocationStats], key: str
+        ) -> typing.List[typing.Dict[str, typing.Any]]:
+            items = sorted(stats.items(), key=lambda item: item[1].size, reverse=True)
+            return [
+                {key: name, "net_bytes": s.size, "net_blocks": s.count}
+                for name, s in items[:limit]
+            ]
+
+        routes = sorted(
+            self.routes.items(), key=lambda item: item[1].size, reverse=True
+        )
+        return {
+            "routes": [
+                {
+                    "route": route,
+                    "sampled_requests": stats.requests,
+                    "net_bytes": stats.size,
+                    "net_blocks": stats.count,
+                    "net_bytes_per_request": stats.size / stats.requests,
+                    "dependencies": top(stats.dependencies, "dependency"),
+                    "locations": top(stats.locations, "location"),
+                }
+                for route, stats in routes
+            ]
+        }
+
+    def get_route(self) -> Path:
+        async def allocations(
+            limit: FromQuery[int] = 10, reset: FromQuery[bool] = False
+        ) -> JSONResponse:
+            report = self.report(limit)
+            if reset:
+                self.reset()
+            return JSONResponse(report)
+
+        route = get_admin_route(self.path, allocations, self._dependencies)
+        self._admin_operations.append(route.operations["GET"])
+        return route
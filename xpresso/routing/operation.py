@@ -1,36 +1,87 @@
 import typing
 from functools import partial
+from time import perf_counter
 
+import starlette.middleware
 from di import Container, SolvedDependent
 from di.api.dependencies import DependentBase
 from di.api.executor import SupportsAsyncExecutor
 from di.dependent import JoinedDependent
-from di.executors import AsyncExecutor, ConcurrentAsyncExecutor
 from starlette.datastructures import URLPath
 from starlette.requests import HTTPConnection, Request
-from starlette.responses import JSONResponse, Response
+from starlette.responses import JSONResponse, Response, StreamingResponse
 from starlette.routing import BaseRoute, NoMatchFound, get_name  # type: ignore
-from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 import xpresso.openapi.models as openapi_models
 from xpresso._utils.asgi import XpressoHTTPExtension
 from xpresso._utils.endpoint_dependent import Endpoint, EndpointDependent
+from xpresso._utils.executors import get_executor
 from xpresso._utils.scope_resolver import endpoint_scope_resolver
+from xpresso.binders._binders.param_openapi import OpenAPI as ParameterOpenAPI
+from xpresso.binders.dependents import Binder
 from xpresso.dependencies._dependencies import BoundDependsMarker, Scopes
+from xpresso.dependencies._threadpool import bind_thread_pools
 from xpresso.encoders import Encoder, JsonableEncoder
+from xpresso.exceptions import RequestValidationError
+from xpresso.instrumentation import DependencyExecution, DependencyHook, RequestTimings
 from xpresso.responses import ResponseSpec, ResponseStatusCode, TypeUnset
+from xpresso.routing.router import _MiddlewareIterator
+from xpresso.threadpool import ThreadPool
+
+if typing.TYPE_CHECKING:
+    from xpresso.monitoring import EventLoopMonitor
+    from xpresso.profiling import AllocationTracker
 
 
 class NotPreparedError(Exception):
     pass
 
 
+# Responses that are known to send http.response.start before anything
+# that can fail, so we can mark the response as started up front
+# and pass them the unwrapped send
+_STARTS_IMMEDIATELY = frozenset((Response.__call__, StreamingResponse.__call__))
+
+
+async def _send_response(
+    response: Response,
+    xpresso_scope: XpressoHTTPExtension,
+    scope: Scope,
+    receive: Receive,
+    send: Send,
+) -> None:
+    if type(response).__call__ in _STARTS_IMMEDIATELY:
+        xpresso_scope.response_started = True
+        await response(scope, receive, send)
+        return
+
+    async def tracking_send(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            xpresso_scope.response_started = True
+        await send(message)
+
+    await response(scope, receive, tracking_send)
+
+
 class _OperationApp(typing.NamedTuple):
     dependent: SolvedDependent[typing.Any]
     container: Container
     executor: SupportsAsyncExecutor
     response_factory: typing.Callable[[typing.Any], Response]
     response_encoder: typing.Optional[Encoder]
+    # used only if the request is recording RequestTimings
+    timed_executor: typing.Callable[[DependencyHook], SupportsAsyncExecutor]
+    phases: typing.Mapping[DependentBase[typing.Any], str]
+    # if set, RequestValidationErrors are turned into responses right here
+    # instead of being handled by the ExceptionMiddleware
+    validation_error_response: typing.Optional[
+        typing.Callable[[RequestValidationError], Response]
+    ]
+    # "{METHOD} {path}", used to attribute samples in xpresso.profiling
+    route: str
+    # in-flight requests per route, see xpresso.monitoring
+    in_flight: typing.Optional[typing.Dict[str, int]]
 
     async def __call__(
         self,
@@ -39,31 +90,86 @@ class _OperationApp(typing.NamedTuple):
         send: Send,
     ) -> None:
         xpresso_scope: "XpressoHTTPExtension" = scope["extensions"]["xpresso"]
+        xpresso_scope.route = self.route
+        if send is xpresso_scope.tracking_send:
+            # we set response_started ourselves
+            send = typing.cast(Send, xpresso_scope.untracked_send)
+        timings = xpresso_scope.timings
+        executor = self.executor
+        if timings is not None:
+            timings.record("routing", timings.start, perf_counter())
+            executor = self.timed_executor(
+                partial(_record_dependency_phase, timings, self.phases)
+            )
         request = Request(scope=scope, receive=receive, send=send)
         values: "typing.Dict[typing.Any, typing.Any]" = {
             Request: request,
             HTTPConnection: request,
         }
-        async with self.container.enter_scope(
-            "connection",
-            xpresso_scope.di_container_state,
-        ) as connection_state:
-            async with connection_state.enter_scope("endpoint") as endpoint_state:
-                endpoint_return = await self.container.execute_async(
-                    self.dependent,
-                    values=values,
-                    executor=self.executor,
-                    state=endpoint_state,
-                )
-                if isinstance(endpoint_return, Response):
-                    response = endpoint_return
-                else:
-                    if self.response_encoder:
-                        endpoint_return = self.response_encoder(endpoint_return)
-                    response = self.response_factory(endpoint_return)
-                xpresso_scope.response = response
-            await response(scope, receive, send)
+        in_flight = self.in_flight
+        if in_flight is not None:
+            in_flight[self.route] += 1
+        try:
+            async with self.container.enter_scope(
+                "connection",
+                xpresso_scope.di_container_state,
+            ) as connection_state:
+                async with connection_state.enter_scope("endpoint") as endpoint_state:
+                    endpoint_return = await self.container.execute_async(
+                        self.dependent,
+                        values=values,
+                        executor=executor,
+                        state=endpoint_state,
+                    )
+                    if timings is not None:
+                        start = perf_counter()
+                    if isinstance(endpoint_return, Response):
+                        response = endpoint_return
+                    else:
+                        if self.response_encoder:
+                            endpoint_return = self.response_encoder(endpoint_return)
+                        response = self.response_factory(endpoint_return)
+                    if timings is not None:
+                        timings.record("encoding", start, perf_counter())
+                    xpresso_scope.response = response
+                if timings is not None:
+                    start = perf_counter()
+                await _send_response(response, xpresso_scope, scope, receive, send)
+                if timings is not None:
+                    timings.record("send", start, perf_counter())
+                xpresso_scope.response_sent = True
+        except RequestValidationError as exc:
+            if self.validation_error_response is None or xpresso_scope.response_started:
+                raise
+            # like the ExceptionMiddleware would, but without unwinding
+            # through the Routers and middleware first
+            response = self.validation_error_response(exc)
+            xpresso_scope.response = response
+            await _send_response(response, xpresso_scope, scope, receive, send)
             xpresso_scope.response_sent = True
+        finally:
+            if in_flight is not None:
+                in_flight[self.route] -= 1
+
+
+def _record_dependency_phase(
+    timings: RequestTimings,
+    phases: typing.Mapping[DependentBase[typing.Any], str],
+    execution: DependencyExecution,
+) -> None:
+    timings.record(
+        phases.get(execution.dependent, "dependencies"),
+        execution.start,
+        execution.end,
+    )
+
+
+def _get_phase(dependent: DependentBase[typing.Any]) -> str:
+    if isinstance(dependent, Binder):
+        if isinstance(dependent.openapi, ParameterOpenAPI):
+            return "binding"
+        return "body"
+    return "dependencies"
 
 
 async def _not_prepared_app(*args: typing.Any) -> None:
@@ -101,6 +207,11 @@ class Operation(BaseRoute):
         ] = None,
         response_encoder: typing.Optional[Encoder] = JsonableEncoder(),
         sync_to_thread: bool = False,
+        thread_pool: typing.Optional[str] = None,
+        run_in_process: bool = False,
+        middleware: typing.Optional[
+            typing.Sequence[starlette.middleware.Middleware]
+        ] = None,
         # responses
         response_status_code: int = 200,
         response_media_type: str = "application/json",
@@ -135,6 +246,7 @@ class Operation(BaseRoute):
             dep if isinstance(dep, DependentBase) else dep.as_dependent()
             for dep in dependencies or ()
         )
+        self.middleware = tuple(middleware or ())
         self._app: ASGIApp = _not_prepared_app
         self._execute_dependencies_concurrently = execute_dependencies_concurrently
         self._response_factory = response_factory or partial(
@@ -144,6 +256,10 @@ class Operation(BaseRoute):
         )
         self._response_encoder = response_encoder
         self._sync_to_thread = sync_to_thread
+        self._thread_pool = thread_pool
+        self._run_in_process = run_in_process
+        # schema fragments re-used between OpenAPI generations (see xpresso.openapi._builder)
+        self._openapi_cache: typing.Any = None
 
     async def handle(
         self,
@@ -157,27 +273,67 @@ class Operation(BaseRoute):
         self,
         container: Container,
         dependencies: typing.Iterable[DependentBase[typing.Any]],
+        *,
+        dependency_hooks: typing.Sequence[DependencyHook] = (),
+        route_name: typing.Optional[str] = None,
+        thread_pools: typing.Optional[typing.Mapping[str, ThreadPool]] = None,
+        validation_error_response: typing.Optional[
+            typing.Callable[[RequestValidationError], Response]
+        ] = None,
+        allocation_tracker: "typing.Optional[AllocationTracker]" = None,
+        event_loop_monitor: "typing.Optional[EventLoopMonitor]" = None,
     ) -> SolvedDependent[typing.Any]:
         self.dependent = container.solve(
             JoinedDependent(
-                EndpointDependent(self.endpoint, sync_to_thread=self._sync_to_thread),
+                EndpointDependent(
+                    self.endpoint,
+                    sync_to_thread=self._sync_to_thread,
+                    thread_pool=self._thread_pool,
+                    run_in_process=self._run_in_process,
+                ),
                 siblings=[*dependencies, *self.dependencies],
             ),
             scopes=Scopes,
             scope_resolver=endpoint_scope_resolver,
         )
-        executor: SupportsAsyncExecutor
-        if self._execute_dependencies_concurrently:
-            executor = ConcurrentAsyncExecutor()
-        else:
-            executor = AsyncExecutor()
-        self._app = _OperationApp(  # type: ignore[assignment]
+        bind_thread_pools((dep.call for dep in self.dependent.dag), thread_pools or {})
+        route = self.name if route_name is None else route_name
+
+        def timed_executor(hook: DependencyHook) -> SupportsAsyncExecutor:
+            return get_executor(
+                self._execute_dependencies_concurrently,
+                hooks=[*dependency_hooks, hook],
+                route=route,
+            )
+
+        app: ASGIApp = _OperationApp(  # type: ignore[assignment]
             container=container,
             dependent=self.dependent,
-            executor=executor,
+            executor=get_executor(
+                self._execute_dependencies_concurrently,
+                hooks=dependency_hooks,
+                route=route,
+            ),
             response_encoder=self._response_encoder,
             response_factory=self._response_factory,
+            timed_executor=timed_executor,
+            phases={
+                **{dep: _get_phase(dep) for dep in self.dependent.dag},
+                self.dependent.dependency: "endpoint",
+            },
+            validation_error_response=validation_error_response,
+            route=route,
+            in_flight=None
+            if event_loop_monitor is None
+            else event_loop_monitor.register_route(route),
         )
+        if allocation_tracker is not None:
+            app = allocation_tracker.wrap(self, app, route)
+        # wrap the operation directly so that per-route middleware
+        # doesn't need a Router and Mount of its own
+        for cls, options in typing.cast(_MiddlewareIterator, reversed(self.middleware)):
+            app = cls(app=app, **options)
+        self._app = app
         return self.dependent
 
     def url_path_for(self, name: str, **path_params: str) -> URLPath:
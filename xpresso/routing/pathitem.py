@@ -1,5 +1,6 @@
 import typing
 
+import starlette.middleware
 import starlette.routing
 import starlette.types
 from di.api.dependencies import DependentBase
@@ -11,6 +12,7 @@ import xpresso.openapi.models as openapi_models
 from xpresso.dependencies._dependencies import DependsMarker
 from xpresso.responses import ResponseSpec, ResponseStatusCode
 from xpresso.routing.operation import Operation
+from xpresso.routing.router import _ASGIApp, _MiddlewareIterator
 
 
 class _PathApp(typing.NamedTuple):
@@ -60,6 +62,9 @@ class Path(starlette.routing.Route):
             typing.Mapping[ResponseStatusCode, ResponseSpec]
         ] = None,
         tags: typing.Optional[typing.Iterable[str]] = None,
+        middleware: typing.Optional[
+            typing.Sequence[starlette.middleware.Middleware]
+        ] = None,
     ) -> None:
         if not path.startswith("/"):
             raise ValueError("Routed paths must start with '/'")
@@ -95,12 +100,16 @@ class Path(starlette.routing.Route):
                     else Operation(operation_or_endpoint)
                 )
         self.operations = operations
+        self.middleware = tuple(middleware or ())
+        # this needs to be an object so that Starlette
+        # detects it as an ASGI app and passes us the raw Scope, Receive and Send
+        # as well as not wrapping it in a threadpool
+        app: _ASGIApp = _PathApp(operations)
+        for cls, kwargs in typing.cast(_MiddlewareIterator, reversed(self.middleware)):
+            app = cls(app=app, **kwargs)
         super().__init__(  # type: ignore  # for Pylance
             path=path,
-            # this needs to be an object so that Starlette
-            # detects it as an ASGI app and passes us the raw Scope, Receive and Send
-            # as well as not wrapping it in a threadpool
-            endpoint=_PathApp(operations),  # type: ignore[arg-type]
+            endpoint=app,  # type: ignore[arg-type]
             name=name or path,
             include_in_schema=include_in_schema,
             methods=list(operations.keys()),
@@ -1,34 +1,64 @@
 import typing
+from functools import partial
 
 import starlette.requests
 import starlette.responses
 import starlette.routing
 import starlette.types
 import starlette.websockets
-from di import Container, SolvedDependent
+from di import Container, ScopeState, SolvedDependent
 from di.api.dependencies import DependentBase
 from di.api.executor import SupportsAsyncExecutor
-from di.dependent import JoinedDependent
-from di.executors import AsyncExecutor, ConcurrentAsyncExecutor
+from di.dependent import Dependent, JoinedDependent
 
 from xpresso._utils.asgi import XpressoWebSocketExtension
 from xpresso._utils.endpoint_dependent import Endpoint, EndpointDependent
-from xpresso._utils.scope_resolver import endpoint_scope_resolver
-from xpresso.dependencies._dependencies import BoundDependsMarker, Scopes
+from xpresso._utils.executors import get_executor
+from xpresso._utils.scope_resolver import (
+    endpoint_scope_resolver,
+    get_message_scope_resolver,
+)
+from xpresso.dependencies._dependencies import BoundDependsMarker, MessageScopes, Scopes
+from xpresso.dependencies._threadpool import bind_thread_pools
+from xpresso.exceptions import WebSocketValidationError
+from xpresso.instrumentation import DependencyHook
+from xpresso.threadpool import ThreadPool
+
+
+def _message_dependencies_root() -> None:
+    ...
 
 
 class _WebSocketRoute:
-    __slots__ = ("container", "dependent", "executor")
+    __slots__ = ("container", "dependent", "executor", "message_dependent")
 
     def __init__(
         self,
         dependent: SolvedDependent[typing.Any],
         executor: SupportsAsyncExecutor,
         container: Container,
+        message_dependent: typing.Optional[SolvedDependent[typing.Any]] = None,
     ) -> None:
         self.dependent = dependent
         self.executor = executor
         self.container = container
+        self.message_dependent = message_dependent
+
+    async def _execute_message_dependencies(
+        self,
+        values: typing.Dict[typing.Any, typing.Any],
+        state: ScopeState,
+    ) -> None:
+        assert self.message_dependent is not None
+        # only the "message" scope is entered, the connection's scopes
+        # (and the values cached in them) are re-used
+        async with self.container.enter_scope("message", state=state) as message_state:
+            await self.container.execute_async(
+                self.message_dependent,
+                values=values,
+                executor=self.executor,
+                state=message_state,
+            )
 
     async def __call__(
         self,
@@ -42,19 +72,30 @@ class _WebSocketRoute:
             starlette.websockets.WebSocket: ws,
             starlette.requests.HTTPConnection: ws,
         }
-        async with self.container.enter_scope(
-            "connection",
-            state=xpresso_scope.di_container_state,
-        ) as conn_state:
+        try:
             async with self.container.enter_scope(
-                "endpoint", state=conn_state
-            ) as endpoint_state:
-                await self.container.execute_async(
-                    self.dependent,
-                    values=values,
-                    executor=self.executor,
-                    state=endpoint_state,
-                )
+                "connection",
+                state=xpresso_scope.di_container_state,
+            ) as conn_state:
+                async with self.container.enter_scope(
+                    "endpoint", state=conn_state
+                ) as endpoint_state:
+                    if self.message_dependent is not None:
+                        xpresso_scope.message_hook = partial(
+                            self._execute_message_dependencies, values, endpoint_state
+                        )
+                    await self.container.execute_async(
+                        self.dependent,
+                        values=values,
+                        executor=self.executor,
+                        state=endpoint_state,
+                    )
+        except WebSocketValidationError as exc:
+            # before the connection is accepted (e.g. invalid headers)
+            # there is nothing better to do than letting the server reject it
+            if ws.application_state != starlette.websockets.WebSocketState.CONNECTED:
+                raise
+            await ws.close(exc.close_code)
 
 
 class WebSocketRoute(starlette.routing.WebSocketRoute):
@@ -70,6 +111,9 @@ class WebSocketRoute(starlette.routing.WebSocketRoute):
             typing.Iterable[typing.Union[DependentBase[typing.Any], BoundDependsMarker]]
         ] = None,
         execute_dependencies_concurrently: bool = False,
+        message_dependencies: typing.Optional[
+            typing.Iterable[typing.Union[DependentBase[typing.Any], BoundDependsMarker]]
+        ] = None,
     ) -> None:
         super().__init__(  # type: ignore
             path=path,
@@ -82,11 +126,19 @@ class WebSocketRoute(starlette.routing.WebSocketRoute):
             for dep in dependencies or ()
         )
         self.execute_dependencies_concurrently = execute_dependencies_concurrently
+        self.message_dependencies = tuple(
+            dep if isinstance(dep, DependentBase) else dep.as_dependent()
+            for dep in message_dependencies or ()
+        )
 
     def prepare(
         self,
         container: Container,
         dependencies: typing.Iterable[DependentBase[typing.Any]],
+        *,
+        dependency_hooks: typing.Sequence[DependencyHook] = (),
+        route_name: typing.Optional[str] = None,
+        thread_pools: typing.Optional[typing.Mapping[str, ThreadPool]] = None,
     ) -> SolvedDependent[typing.Any]:
         self.dependent = container.solve(
             JoinedDependent(
@@ -96,14 +148,30 @@ class WebSocketRoute(starlette.routing.WebSocketRoute):
             scopes=Scopes,
             scope_resolver=endpoint_scope_resolver,
         )
-        executor: SupportsAsyncExecutor
-        if self.execute_dependencies_concurrently:
-            executor = ConcurrentAsyncExecutor()
-        else:
-            executor = AsyncExecutor()
+        bind_thread_pools((dep.call for dep in self.dependent.dag), thread_pools or {})
+        executor = get_executor(
+            self.execute_dependencies_concurrently,
+            hooks=dependency_hooks,
+            route=self.path if route_name is None else route_name,
+        )
+        message_dependent: typing.Optional[SolvedDependent[typing.Any]] = None
+        if self.message_dependencies:
+            # solved once here so that messages only need to execute the plan
+            message_dependent = container.solve(
+                JoinedDependent(
+                    Dependent(_message_dependencies_root, scope="message"),
+                    siblings=self.message_dependencies,
+                ),
+                scopes=MessageScopes,
+                scope_resolver=get_message_scope_resolver(self.message_dependencies),
+            )
+            bind_thread_pools(
+                (dep.call for dep in message_dependent.dag), thread_pools or {}
+            )
         self.app = _WebSocketRoute(
             dependent=self.dependent,
             executor=executor,
             container=container,
+            message_dependent=message_dependent,
         )
         return self.dependent
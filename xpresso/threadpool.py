@@ -0,0 +1,97 @@
+import math
+import typing
+from time import perf_counter
+
+import anyio
+import anyio.to_thread
+
+T = typing.TypeVar("T")
+
+
+class ThreadPoolStatistics(typing.NamedTuple):
+    name: str
+    max_workers: int
+    # number of calls currently running in a thread
+    busy: int
+    # number of calls waiting for a free worker (the queue depth)
+    waiting: int
+    completed: int
+    # seconds spent waiting for a free worker
+    total_wait_time: float
+    max_wait_time: float
+
+
+class ThreadPool:
+    """A named pool of at most `max_workers` threads.
+
+    Sync dependencies and endpoints can be assigned to a pool with
+    `Depends(..., thread_pool="name")` or `Operation(..., thread_pool="name")`
+    once the pool is registered with `App(thread_pools=[...])`.
+    Calls in a pool do not count towards the limits of other pools
+    or of the default thread pool used by `sync_to_thread=True`.
+    """
+
+    __slots__ = (
+        "name",
+        "max_workers",
+        "_limiter",
+        "_passthrough_limiter",
+        "_completed",
+        "_total_wait_time",
+        "_max_wait_time",
+    )
+
+    def __init__(self, name: str, max_workers: int) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.name = name
+        self.max_workers = max_workers
+        # limiters can only be created from within an event loop
+        self._limiter: "typing.Optional[anyio.CapacityLimiter]" = None
+        self._passthrough_limiter: "typing.Optional[anyio.CapacityLimiter]" = None
+        self._completed = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    @property
+    def limiter(self) -> anyio.CapacityLimiter:
+        if self._limiter is None:
+            self._limiter = anyio.CapacityLimiter(self.max_workers)
+        return self._limiter
+
+    async def run_sync(self, func: typing.Callable[..., T], *args: typing.Any) -> T:
+        """Run func(*args) in a thread from this pool"""
+        limiter = self.limiter
+        if self._passthrough_limiter is None:
+            # we acquire our limiter ourselves to measure the wait time
+            # so we don't want anyio's default limiter to get in the way
+            self._passthrough_limiter = anyio.CapacityLimiter(math.inf)
+        start = perf_counter()
+        async with limiter:
+            waited = perf_counter() - start
+            self._total_wait_time += waited
+            if waited > self._max_wait_time:
+                self._max_wait_time = waited
+            try:
+                return await anyio.to_thread.run_sync(
+                    func, *args, limiter=self._passthrough_limiter
+                )
+            finally:
+                self._completed += 1
+
+    def statistics(self) -> ThreadPoolStatistics:
+        if self._limiter is None:
+            busy = waiting = 0
+        else:
+            stats = self._limiter.statistics()
+            busy = stats.borrowed_tokens
+            waiting = stats.tasks_waiting
+        return ThreadPoolStatistics(
+            name=self.name,
+            max_workers=self.max_workers,
+            busy=busy,
+            waiting=waiting,
+            completed=self._completed,
+            total_wait_time=self._total_wait_time,
+            max_wait_time=self._max_wait_time,
+        )
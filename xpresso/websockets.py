@@ -1,4 +1,287 @@
+import json
+import typing
+from collections import deque
+from types import TracebackType
+
+import anyio
+from anyio.abc import TaskGroup
+from starlette.status import WS_1007_INVALID_FRAME_PAYLOAD_DATA
 from starlette.websockets import WebSocket as WebSocket  # noqa: F401
 from starlette.websockets import (  # noqa: F401
     WebSocketDisconnect as WebSocketDisconnect,
 )
+from starlette.websockets import WebSocketState
+
+import xpresso.binders.dependents as dependents
+from xpresso._utils.asgi import XpressoWebSocketExtension
+from xpresso._utils.typing import Annotated, Literal
+from xpresso.binders._binders import websocket_messages
+from xpresso.binders._binders.json_body import SupportsJsonDecoder
+
+MessageMode = Literal["text", "bytes", "json"]
+OverflowPolicy = Literal["block", "drop_oldest", "drop_newest"]
+
+_T = typing.TypeVar("_T")
+
+
+def WebSocketMessages(
+    *,
+    decoder: typing.Optional[SupportsJsonDecoder] = json.loads,
+    close_code: int = WS_1007_INVALID_FRAME_PAYLOAD_DATA,
+) -> dependents.BinderMarker:
+    """Inject an async iterator over the WebSocket's messages.
+
+    Each message is decoded with `decoder` (pass `None` to validate the raw
+    str or bytes) and then validated against the iterator's item type.
+    If a message is invalid a WebSocketValidationError is raised and,
+    unless the endpoint handles it, the connection is closed with `close_code`.
+    The connection is accepted when the first message is requested, if it wasn't already.
+    """
+    return dependents.BinderMarker(
+        extractor_marker=websocket_messages.ExtractorMarker(
+            decoder=decoder,
+            close_code=close_code,
+        ),
+        openapi_marker=websocket_messages.OpenAPIMarker(),
+    )
+
+
+FromWebSocketMessages = Annotated[typing.AsyncIterator[_T], WebSocketMessages()]
+
+
+def _decode(mode: MessageMode, message: typing.Mapping[str, typing.Any]) -> typing.Any:
+    if mode == "text":
+        return message["text"]
+    if mode == "bytes":
+        return message["bytes"]
+    text = message.get("text", None)
+    return json.loads(message["bytes"] if text is None else text)
+
+
+async def _accept(ws: WebSocket) -> None:
+    if ws.application_state == WebSocketState.CONNECTING:
+        await ws.accept()
+
+
+class WebSocketReceiver:
+    """Read a WebSocket's messages in the background into a bounded buffer.
+
+    Iterate over the receiver to get messages one at a time,
+    or over `batches()` to get all of the messages that arrived while you were busy.
+    When the buffer is full the receiver stops reading from the WebSocket,
+    so a client that sends faster than you can keep up with is slowed down
+    instead of using up memory.
+    Iteration stops when the client disconnects, see `close_code`.
+
+    The receiver can be injected into WebSocket endpoints and must be entered
+    with `async with` before use, which accepts the connection if needed.
+    To change its parameters, inject it with `Depends` and a function that creates it.
+    """
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        *,
+        mode: MessageMode = "text",
+        max_queue: int = 64,
+        max_batch: int = 64,
+        decode: typing.Optional[typing.Callable[[typing.Any], typing.Any]] = None,
+    ) -> None:
+        if max_queue < 1 or max_batch < 1:
+            raise ValueError("max_queue and max_batch must be at least 1")
+        self.ws = ws
+        self.mode = mode
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.decode = decode
+        # set once the client disconnects
+        self.close_code: typing.Optional[int] = None
+        self._task_group: typing.Optional[TaskGroup] = None
+        (
+            self._send_stream,
+            self._receive_stream,
+        ) = anyio.create_memory_object_stream(max_queue)
+
+    async def __aenter__(self) -> "WebSocketReceiver":
+        await _accept(self.ws)
+        self._task_group = anyio.create_task_group()
+        await self._task_group.__aenter__()
+        self._task_group.start_soon(self._read)
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]],
+        exc_value: typing.Optional[BaseException],
+        traceback: typing.Optional[TracebackType],
+    ) -> typing.Optional[bool]:
+        assert self._task_group is not None
+        # nobody is going to read the rest of the messages
+        self._task_group.cancel_scope.cancel()
+        return await self._task_group.__aexit__(exc_type, exc_value, traceback)
+
+    async def _read(self) -> None:
+        mode, decode = self.mode, self.decode
+        xpresso_scope: XpressoWebSocketExtension = self.ws.scope["extensions"][
+            "xpresso"
+        ]
+        message_hook = xpresso_scope.message_hook
+        async with self._send_stream:
+            while True:
+                message = await self.ws.receive()
+                if message["type"] == "websocket.disconnect":
+                    self.close_code = message.get("code", 1000)
+                    return
+                if message_hook is not None:
+                    await message_hook()
+                value = _decode(mode, message)
+                if decode is not None:
+                    value = decode(value)
+                await self._send_stream.send(value)
+
+    def __aiter__(self) -> typing.AsyncIterator[typing.Any]:
+        return self._receive_stream.__aiter__()
+
+    async def batches(self) -> typing.AsyncIterator[typing.List[typing.Any]]:
+        """Iterate over lists of up to max_batch messages that are ready"""
+        receive_stream = self._receive_stream
+        async for message in receive_stream:
+            batch = [message]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(receive_stream.receive_nowait())
+                except (anyio.WouldBlock, anyio.EndOfStream):
+                    break
+            yield batch
+
+
+class WebSocketSender:
+    """Send messages to a WebSocket from a background task through a bounded queue.
+
+    `send()` only puts the message in the queue, so producers don't wait for
+    the client unless the queue is full.
+    What happens then is up to `policy`:
+
+    - "block": wait until there is room in the queue.
+    - "drop_oldest": drop the oldest queued message to make room for this one
+      (or this one if all of the queued messages are already being sent).
+    - "drop_newest": drop this message.
+
+    Messages that are being sent count towards `max_queue` until they have been sent.
+    Dropped messages are counted in `dropped`.
+    All of the messages that are queued when the background task wakes up are sent
+    in one go, and if `coalesce` is given they are combined into a single message
+    by calling `coalesce(messages)`.
+
+    The sender can be injected into WebSocket endpoints and must be entered
+    with `async with` before use, which accepts the connection if needed.
+    When the block exits without errors, messages that are still queued are sent.
+    To change its parameters, inject it with `Depends` and a function that creates it.
+    """
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        *,
+        mode: MessageMode = "text",
+        max_queue: int = 64,
+        policy: OverflowPolicy = "block",
+        coalesce: typing.Optional[
+            typing.Callable[[typing.List[typing.Any]], typing.Any]
+        ] = None,
+    ) -> None:
+        if max_queue < 1:
+            raise ValueError("max_queue must be at least 1")
+        if policy not in ("block", "drop_oldest", "drop_newest"):
+            raise ValueError(f"Unknown overflow policy {policy!r}")
+        self.ws = ws
+        self.mode = mode
+        self.max_queue = max_queue
+        self.policy = policy
+        self.coalesce = coalesce
+        self.dropped = 0
+        self._queue: typing.Deque[typing.Any] = deque()
+        # number of messages taken from the queue that are being sent
+        self._in_flight = 0
+        self._not_empty = anyio.Event()
+        self._not_full = anyio.Event()
+        self._closing = False
+        self._task_group: typing.Optional[TaskGroup] = None
+
+    async def __aenter__(self) -> "WebSocketSender":
+        await _accept(self.ws)
+        self._task_group = anyio.create_task_group()
+        await self._task_group.__aenter__()
+        self._task_group.start_soon(self._write)
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: typing.Optional[typing.Type[BaseException]],
+        exc_value: typing.Optional[BaseException],
+        traceback: typing.Optional[TracebackType],
+    ) -> typing.Optional[bool]:
+        assert self._task_group is not None
+        self._closing = True
+        if exc_type is None:
+            # let the writer flush the queue and exit
+            self._not_empty.set()
+        else:
+            self._task_group.cancel_scope.cancel()
+        return await self._task_group.__aexit__(exc_type, exc_value, traceback)
+
+    def _is_full(self) -> bool:
+        # messages that are being sent still count towards max_queue
+        return len(self._queue) + self._in_flight >= self.max_queue
+
+    async def send(self, message: typing.Any) -> None:
+        if self._closing:
+            raise RuntimeError("The sender is closed")
+        queue = self._queue
+        if self._is_full():
+            if self.policy == "drop_newest":
+                self.dropped += 1
+                return
+            if self.policy == "drop_oldest":
+                self.dropped += 1
+                if not queue:
+                    # everything is already being sent, this is the oldest we can drop
+                    return
+                queue.popleft()
+            else:
+                while self._is_full():
+                    if self._not_full.is_set():
+                        self._not_full = anyio.Event()
+                    await self._not_full.wait()
+        queue.append(message)
+        self._not_empty.set()
+
+    async def _send_one(self, message: typing.Any) -> None:
+        if self.mode == "text":
+            await self.ws.send({"type": "websocket.send", "text": message})
+        elif self.mode == "bytes":
+            await self.ws.send({"type": "websocket.send", "bytes": message})
+        else:
+            text = json.dumps(message, separators=(",", ":"))
+            await self.ws.send({"type": "websocket.send", "text": text})
+
+    async def _write(self) -> None:
+        queue = self._queue
+        while True:
+            while not queue:
+                if self._closing:
+                    return
+                self._not_empty = anyio.Event()
+                await self._not_empty.wait()
+            batch = list(queue)
+            queue.clear()
+            self._in_flight = len(batch)
+            if self.coalesce is not None:
+                await self._send_one(self.coalesce(batch))
+            else:
+                for message in batch:
+                    await self._send_one(message)
+            # only make room once the batch was sent so that a slow client
+            # holds up producers instead of growing our memory
+            self._in_flight = 0
+            self._not_full.set()